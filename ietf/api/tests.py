@@ -6,14 +6,17 @@
 import html
 import mock
 import os
+import shutil
 import sys
 
 from importlib import import_module
 from pathlib import Path
 from random import randrange
+from tempfile import mkdtemp
 
 from django.apps import apps
 from django.conf import settings
+from django.core.cache import caches
 from django.http import HttpResponseForbidden
 from django.test import Client, RequestFactory
 from django.test.utils import override_settings
@@ -25,7 +28,7 @@
 import debug                            # pyflakes:ignore
 
 import ietf
-from ietf.doc.storage_utils import retrieve_str
+from ietf.doc.storage_utils import retrieve_str, store_str
 from ietf.doc.utils import get_unicode_document_content
 from ietf.doc.models import RelatedDocument, State
 from ietf.doc.factories import IndividualDraftFactory, WgDraftFactory, WgRfcFactory
@@ -876,6 +879,41 @@ def test_api_nfs_metrics(self):
         r = self.client.get(url, headers={"X-Api-Key": "valid-token"})
         self.assertContains(r, 'nfs_latency_seconds{operation="write"}')
 
+    def test_api_cache_metrics(self):
+        cache_dir = mkdtemp()
+        try:
+            with override_settings(
+                APP_API_TOKENS={"ietf.api.views.cache_metrics": ["valid-token"]},
+                CACHES=settings.CACHES | {"htmlized": {"BACKEND": "ietf.utils.cache.TieredFileCache", "LOCATION": cache_dir}},
+            ):
+                caches["htmlized"].set("key", "value")
+                url = urlreverse("ietf.api.views.cache_metrics")
+                r = self.client.get(url)
+                self.assertEqual(r.status_code, 403)
+                r = self.client.get(url, headers={"X-Api-Key": "valid-token"})
+                self.assertContains(r, 'cache_entries{cache="htmlized"} 1')
+                self.assertContains(r, 'cache_events_total{cache="htmlized",event="sets"} 1')
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_api_blobstore_write_behind_metrics(self):
+        queue_dir = mkdtemp()
+        try:
+            with override_settings(
+                APP_API_TOKENS={"ietf.api.views.blobstore_write_behind_metrics": ["valid-token"]},
+                BLOBSTORAGE_WRITE_BEHIND=True,
+                BLOBSTORAGE_WRITE_BEHIND_DIR=queue_dir,
+            ):
+                store_str("staging", "write-behind-metrics.txt", "content")
+                url = urlreverse("ietf.api.views.blobstore_write_behind_metrics")
+                r = self.client.get(url)
+                self.assertEqual(r.status_code, 403)
+                r = self.client.get(url, headers={"X-Api-Key": "valid-token"})
+                self.assertContains(r, "blobstore_write_behind_queue_depth 1\n")
+                self.assertContains(r, "blobstore_write_behind_queue_lag_seconds ")
+        finally:
+            shutil.rmtree(queue_dir)
+
     def test_api_get_session_matherials_no_agenda_meeting_url(self):
         meeting = MeetingFactory(type_id='ietf')
         session = SessionFactory(meeting=meeting)
@@ -84,6 +84,10 @@
     url(r'^appauth/(?P<app>authortools|bibxml)$', api_views.app_auth),
     # NFS metrics endpoint
     url(r'^metrics/nfs/?$', api_views.nfs_metrics),
+    # Tiered cache metrics endpoint
+    url(r'^metrics/cache/?$', api_views.cache_metrics),
+    # Blob store write-behind queue metrics endpoint
+    url(r'^metrics/blobstore/?$', api_views.blobstore_write_behind_metrics),
     # latest versions
     url(r'^rfcdiff-latest-json/%(name)s(?:-%(rev)s)?(\.txt|\.html)?/?$' % settings.URL_REGEXPS, api_views.rfcdiff_latest_json),
     url(r'^rfcdiff-latest-json/(?P<name>[Rr][Ff][Cc] [0-9]+?)(\.txt|\.html)?/?$', api_views.rfcdiff_latest_json),
@@ -16,6 +16,7 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.core.cache import caches
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
 from django.http import HttpResponse, Http404, JsonResponse
@@ -40,6 +41,7 @@
 from ietf.api import _api_list
 from ietf.api.ietf_utils import is_valid_token, requires_api_token
 from ietf.api.serializer import JsonExportMixin
+from ietf.doc.storage_queue import write_behind_queue_stats
 from ietf.doc.utils import DraftAliasGenerator, fuzzy_find_documents
 from ietf.group.utils import GroupAliasGenerator, role_holder_emails
 from ietf.ietfauth.utils import role_required
@@ -52,6 +54,7 @@
 from ietf.stats.models import MeetingRegistration
 from ietf.sync.iana import ingest_review_email as iana_ingest_review_email
 from ietf.utils import log
+from ietf.utils.cache import TieredFileCache
 from ietf.utils.decorators import require_api_key
 from ietf.utils.mail import send_smtp
 from ietf.utils.models import DumpInfo
@@ -284,6 +287,25 @@ def nfs_metrics(request):
     response=f'nfs_latency_seconds{{operation="write"}} {write_latency}\nnfs_latency_seconds{{operation="read"}} {read_latency}\n'
     return HttpResponse(response)
 
+@requires_api_token
+@csrf_exempt
+def cache_metrics(request):
+    lines = []
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if isinstance(cache, TieredFileCache):
+            stats = cache.stats()
+            lines.append(f'cache_entries{{cache="{alias}"}} {stats.pop("entries")}')
+            lines.extend(f'cache_events_total{{cache="{alias}",event="{name}"}} {value}' for name, value in stats.items())
+    return HttpResponse("".join(f"{line}\n" for line in lines))
+
+@requires_api_token
+@csrf_exempt
+def blobstore_write_behind_metrics(request):
+    stats = write_behind_queue_stats()
+    response = f'blobstore_write_behind_queue_depth {stats["depth"]}\nblobstore_write_behind_queue_lag_seconds {stats["lag"]}\n'
+    return HttpResponse(response)
+
 def find_doc_for_rfcdiff(name, rev):
     """rfcdiff lookup heuristics
 
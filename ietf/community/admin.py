@@ -4,7 +4,7 @@
 
 from django.contrib import admin
 
-from ietf.community.models import CommunityList, SearchRule, EmailSubscription
+from ietf.community.models import CommunityList, SearchRule, EmailSubscription, TrackedDocument
 
 class CommunityListAdmin(admin.ModelAdmin):
     list_display = ['id', 'person', 'group']
@@ -22,3 +22,7 @@ class EmailSubscriptionAdmin(admin.ModelAdmin):
     raw_id_fields = ['community_list', 'email']
 admin.site.register(EmailSubscription, EmailSubscriptionAdmin)
 
+class TrackedDocumentAdmin(admin.ModelAdmin):
+    list_display = ['id', 'community_list', 'document']
+    raw_id_fields = ['community_list', 'document']
+admin.site.register(TrackedDocument, TrackedDocumentAdmin)
@@ -0,0 +1,100 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.db import migrations, models
+from django.db.models import Q
+import django.db.models.deletion
+import ietf.utils.models
+
+
+def forward(apps, schema_editor):
+    """Track the documents that the lists' added documents and rules give them
+
+    A copy of the rule matching in ietf.community.utils as of this migration,
+    written against the historical models.
+    """
+    CommunityList = apps.get_model("community", "CommunityList")
+    Document = apps.get_model("doc", "Document")
+    RelatedDocument = apps.get_model("doc", "RelatedDocument")
+    TrackedDocument = apps.get_model("community", "TrackedDocument")
+
+    def docs_matching_rule(rule):
+        if rule.rule_type.endswith("_rfc"):
+            docs = Document.objects.filter(type_id="rfc")  # rule.state is ignored for RFCs
+        else:
+            docs = Document.objects.filter(type_id="draft", states=rule.state_id)
+        if rule.rule_type in ["group", "area", "group_rfc", "area_rfc"]:
+            return docs.filter(Q(group=rule.group_id) | Q(group__parent=rule.group_id))
+        elif rule.rule_type == "group_exp":
+            return docs.filter(group=rule.group_id)
+        elif rule.rule_type.startswith("state_"):
+            return docs
+        elif rule.rule_type in ["author", "author_rfc"]:
+            return docs.filter(documentauthor__person=rule.person_id)
+        elif rule.rule_type == "ad":
+            return docs.filter(ad=rule.person_id)
+        elif rule.rule_type == "shepherd":
+            return docs.filter(shepherd__person=rule.person_id)
+        elif rule.rule_type == "name_contains":
+            return docs.filter(searchrule=rule.pk)
+        return docs.none()
+
+    for clist in CommunityList.objects.all():
+        doc_ids = set(clist.added_docs.values_list("pk", flat=True))
+        doc_ids.update(
+            RelatedDocument.objects.filter(
+                source__in=doc_ids, relationship="became_rfc"
+            ).values_list("target", flat=True)
+        )
+        for rule in clist.searchrule_set.all():
+            doc_ids.update(docs_matching_rule(rule).values_list("pk", flat=True))
+        TrackedDocument.objects.bulk_create(
+            [TrackedDocument(community_list=clist, document_id=doc_id) for doc_id in doc_ids],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0005_user_to_person"),
+        ("doc", "0025_storedobject_storedobject_unique_name_per_store"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrackedDocument",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "community_list",
+                    ietf.utils.models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="community.communitylist",
+                    ),
+                ),
+                (
+                    "document",
+                    ietf.utils.models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="doc.document",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="trackeddocument",
+            constraint=models.UniqueConstraint(
+                fields=("community_list", "document"),
+                name="unique_tracked_document_per_list",
+            ),
+        ),
+        migrations.RunPython(forward, migrations.RunPython.noop),
+    ]
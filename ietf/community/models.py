@@ -81,6 +81,27 @@ class SearchRule(models.Model):
     def __str__(self):
         return "%s %s %s/%s/%s/%s" % (self.community_list, self.rule_type, self.state, self.group, self.person, self.text)
 
+class TrackedDocument(models.Model):
+    """A document tracked by a community list
+
+    Materializes the documents added to a list and those matched by its search
+    rules, so the list can be read with a single join. Kept up to date by the
+    signal receivers in ietf.community.signals; the
+    update_community_list_tracked_docs management command rebuilds it.
+    """
+    community_list = ForeignKey(CommunityList)
+    document = ForeignKey(Document)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["community_list", "document"], name="unique_tracked_document_per_list"
+            ),
+        ]
+
+    def __str__(self):
+        return "%s tracked by %s" % (self.document, self.community_list)
+
 class EmailSubscription(models.Model):
     community_list = ForeignKey(CommunityList)
     email = ForeignKey(Email)
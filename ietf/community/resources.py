@@ -10,7 +10,7 @@
 
 from ietf import api
 
-from ietf.community.models import CommunityList, SearchRule, EmailSubscription
+from ietf.community.models import CommunityList, SearchRule, EmailSubscription, TrackedDocument
 
 
 from ietf.doc.resources import DocumentResource
@@ -66,3 +66,20 @@ class Meta:
             "community_list": ALL_WITH_RELATIONS,
         }
 api.community.register(EmailSubscriptionResource())
+
+
+class TrackedDocumentResource(ModelResource):
+    community_list   = ToOneField(CommunityListResource, 'community_list')
+    document         = ToOneField(DocumentResource, 'document')
+    class Meta:
+        cache = SimpleCache()
+        queryset = TrackedDocument.objects.all()
+        serializer = api.Serializer()
+        #resource_name = 'trackeddocument'
+        ordering = ['id', ]
+        filtering = { 
+            "id": ALL,
+            "community_list": ALL_WITH_RELATIONS,
+            "document": ALL_WITH_RELATIONS,
+        }
+api.community.register(TrackedDocumentResource())
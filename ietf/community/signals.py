@@ -1,12 +1,18 @@
 # Copyright The IETF Trust 2024, All Rights Reserved
 
+import weakref
+
 from django.conf import settings
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
 from django.dispatch import receiver
 
-from ietf.doc.models import DocEvent
+from ietf.doc.models import DocEvent, Document, DocumentAuthor, RelatedDocument
+from .models import CommunityList, SearchRule
 from .tasks import notify_event_to_subscribers_task
+from .utils import (invalidate_search_rule_index, update_tracked_docs_for_community_list,
+                    update_tracked_docs_for_doc)
 
 
 def notify_of_event(event: DocEvent):
@@ -42,3 +48,130 @@ def notify_of_events_receiver(sender, instance, **kwargs):
         return  # only notify on creation
 
     notify_of_event(instance)
+
+
+@receiver([post_save, post_delete], sender=SearchRule, dispatch_uid="search_rule_changed_receiver_uid")
+def search_rule_changed_receiver(sender, instance, **kwargs):
+    """Invalidate the in-memory search rule indexes when a rule changes"""
+    # Wait for the commit so no process rebuilds its index from the old rules
+    transaction.on_commit(invalidate_search_rule_index)
+
+
+# The receivers below keep the TrackedDocument table up to date. Changes to a
+# document update its own rows; changes to a list's rules update the whole list.
+
+def deleted_by_cascade_from(origin, model):
+    """Was a post_delete signal sent because an instance of model was deleted?"""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+# Document fields the search rules look at. Authors and states are m2m
+# relations, which have receivers of their own.
+RULE_RELEVANT_DOCUMENT_FIELDS = ("type_id", "group_id", "ad_id", "shepherd_id", "name")
+
+
+def rule_relevant_fields(doc):
+    # read __dict__ so that deferred fields are not loaded
+    return tuple(doc.__dict__.get(field) for field in RULE_RELEVANT_DOCUMENT_FIELDS)
+
+
+class TrackedDocUpdate:
+    """on_commit callback that updates a document's TrackedDocuments"""
+    def __init__(self, doc_id):
+        self.doc_id = doc_id
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        doc = Document.objects.filter(pk=self.doc_id).first()
+        if doc is not None:
+            update_tracked_docs_for_doc(doc)
+
+
+# The TrackedDocUpdates waiting for each connection's transaction to commit, by
+# document id. Only the transaction holds on to them, so they drop out of here
+# when it has run them or has been rolled back.
+_pending_updates = weakref.WeakKeyDictionary()
+
+
+def update_tracked_doc(doc):
+    """Update a document's TrackedDocuments when the transaction commits
+
+    Updates of the same document within a transaction are done once.
+    """
+    if doc.type_id not in ["draft", "rfc"]:
+        return
+    pending = _pending_updates.setdefault(transaction.get_connection(), weakref.WeakValueDictionary())
+    update = pending.get(doc.pk)
+    if update is not None and not update.done:
+        return  # already queued
+    update = TrackedDocUpdate(doc.pk)
+    pending[doc.pk] = update
+    transaction.on_commit(update)
+
+
+@receiver(post_init, sender=Document, dispatch_uid="tracked_document_loaded_receiver_uid")
+def tracked_document_loaded_receiver(sender, instance, **kwargs):
+    instance._rule_relevant_fields = rule_relevant_fields(instance)
+
+
+@receiver(post_save, sender=Document, dispatch_uid="tracked_document_saved_receiver_uid")
+def tracked_document_saved_receiver(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    fields = rule_relevant_fields(instance)
+    if not created and fields == getattr(instance, "_rule_relevant_fields", None):
+        return  # nothing the rules look at changed
+    instance._rule_relevant_fields = fields
+    update_tracked_doc(instance)
+
+
+@receiver(m2m_changed, sender=Document.states.through, dispatch_uid="tracked_document_states_changed_receiver_uid")
+def tracked_document_states_changed_receiver(sender, instance, action, reverse, **kwargs):
+    if action in ["post_add", "post_remove", "post_clear"] and not reverse:
+        update_tracked_doc(instance)
+
+
+@receiver([post_save, post_delete], sender=DocumentAuthor, dispatch_uid="tracked_document_author_changed_receiver_uid")
+def tracked_document_author_changed_receiver(sender, instance, raw=False, origin=None, **kwargs):
+    if not raw and not deleted_by_cascade_from(origin, Document):
+        update_tracked_doc(instance.document)
+
+
+@receiver([post_save, post_delete], sender=RelatedDocument, dispatch_uid="tracked_document_became_rfc_receiver_uid")
+def tracked_document_became_rfc_receiver(sender, instance, raw=False, origin=None, **kwargs):
+    if instance.relationship_id != "became_rfc" or raw or deleted_by_cascade_from(origin, Document):
+        return
+    update_tracked_doc(instance.target)
+
+
+@receiver(m2m_changed, sender=CommunityList.added_docs.through, dispatch_uid="tracked_document_added_docs_changed_receiver_uid")
+def tracked_document_added_docs_changed_receiver(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+    if not reverse and not pk_set:
+        update_tracked_docs_for_community_list(instance)
+        return
+    # lists track the RFCs that their added drafts became, too
+    for doc in [instance] if reverse else Document.objects.filter(pk__in=pk_set):
+        update_tracked_doc(doc)
+        for rfc in doc.related_that_doc("became_rfc"):
+            update_tracked_doc(rfc)
+
+
+@receiver([post_save, post_delete], sender=SearchRule, dispatch_uid="tracked_document_rule_changed_receiver_uid")
+def tracked_document_rule_changed_receiver(sender, instance, raw=False, origin=None, **kwargs):
+    if not raw and not deleted_by_cascade_from(origin, CommunityList):
+        update_tracked_docs_for_community_list(instance.community_list)
+
+
+@receiver(m2m_changed, sender=SearchRule.name_contains_index.through, dispatch_uid="tracked_document_name_contains_index_changed_receiver_uid")
+def tracked_document_name_contains_index_changed_receiver(sender, instance, action, reverse, **kwargs):
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+    if reverse:
+        update_tracked_doc(instance)
+    else:
+        update_tracked_docs_for_community_list(instance.community_list)
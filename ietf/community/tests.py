@@ -4,15 +4,20 @@
 import mock
 from pyquery import PyQuery
 
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
 from django.test.utils import override_settings
 from django.urls import reverse as urlreverse
 
 import debug                            # pyflakes:ignore
 
-from ietf.community.models import CommunityList, SearchRule, EmailSubscription
-from ietf.community.signals import notify_of_event
+from ietf.community.models import CommunityList, SearchRule, EmailSubscription, TrackedDocument
+from ietf.community.signals import TrackedDocUpdate, notify_of_event
 from ietf.community.utils import docs_matching_community_list_rule, community_list_rules_matching_doc
 from ietf.community.utils import reset_name_contains_index_for_rule, notify_event_to_subscribers
+from ietf.community.utils import search_rule_index, update_name_contains_indexes_with_new_doc, community_lists_tracking_doc
+from ietf.community.utils import docs_tracked_by_community_list
 from ietf.community.tasks import notify_event_to_subscribers_task
 import ietf.community.views
 from ietf.group.models import Group
@@ -22,7 +27,7 @@
 from ietf.doc.utils import add_state_change_event
 from ietf.person.models import Person, Email, Alias
 from ietf.utils.test_utils import TestCase, login_testing_unauthorized
-from ietf.doc.factories import DocEventFactory, WgDraftFactory
+from ietf.doc.factories import DocEventFactory, WgDraftFactory, WgRfcFactory
 from ietf.group.factories import GroupFactory, RoleFactory
 from ietf.person.factories import PersonFactory, EmailFactory, AliasFactory
 
@@ -89,6 +94,84 @@ def test_rule_matching(self):
         # rule -> docs
         self.assertTrue(draft in list(docs_matching_community_list_rule(rule_group_exp)))
 
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_search_rule_index(self):
+        draft = WgDraftFactory(name="draft-ietf-mars-index-test")
+        clist = CommunityList.objects.create(person=PersonFactory())
+        active = State.objects.get(type="draft", slug="active")
+        index = search_rule_index()
+        self.assertIs(search_rule_index(), index)  # reused while the rules are unchanged
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = SearchRule.objects.create(rule_type="name_contains", state=active, text="-mars-", community_list=clist)
+            SearchRule.objects.create(rule_type="name_contains", state=active, text=r"(x)\1", community_list=clist)
+        index = search_rule_index()
+        self.assertEqual(index.name_contains_rules_matching(draft.name), [rule.pk])
+        self.assertEqual(index.rules_matching_doc(draft), ({rule.pk}, {clist.pk}))
+
+        update_name_contains_indexes_with_new_doc(draft)
+        update_name_contains_indexes_with_new_doc(draft)
+        self.assertEqual(list(rule.name_contains_index.all()), [draft])
+        self.assertEqual(list(community_lists_tracking_doc(draft)), [clist])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rule.delete()
+        self.assertIsNot(search_rule_index(), index)
+        self.assertEqual(search_rule_index().rules_matching_doc(draft), (set(), set()))
+
+    def test_tracked_documents(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            draft = WgDraftFactory()
+        clist = CommunityList.objects.create(person=PersonFactory())
+        self.assertEqual(list(docs_tracked_by_community_list(clist)), [])
+
+        # rule and document state changes
+        with self.captureOnCommitCallbacks(execute=True):
+            SearchRule.objects.create(rule_type="group", group=draft.group, state=State.objects.get(type="draft", slug="active"), community_list=clist)
+        self.assertEqual(list(docs_tracked_by_community_list(clist)), [draft])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            draft.set_state(State.objects.get(type="draft", slug="expired"))
+        self.assertEqual(len([c for c in callbacks if isinstance(c, TrackedDocUpdate)]), 1)
+        self.assertEqual(list(docs_tracked_by_community_list(clist)), [])
+
+        # saves that don't change anything the rules look at are skipped
+        with self.captureOnCommitCallbacks() as callbacks:
+            draft.title = "A new title"
+            draft.save()
+        self.assertEqual([c for c in callbacks if isinstance(c, TrackedDocUpdate)], [])
+
+        # an update rolled back with its savepoint doesn't hold up later ones
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                draft.set_state(State.objects.get(type="draft", slug="active"))
+                raise RuntimeError
+            draft.set_state(State.objects.get(type="draft", slug="expired"))
+        self.assertEqual(len([c for c in callbacks if isinstance(c, TrackedDocUpdate)]), 1)
+        self.assertEqual(list(docs_tracked_by_community_list(clist)), [])
+
+        # added documents and the RFCs they became
+        with self.captureOnCommitCallbacks(execute=True):
+            clist.added_docs.add(draft)
+        self.assertEqual(list(docs_tracked_by_community_list(clist)), [draft])
+        with self.captureOnCommitCallbacks(execute=True):
+            rfc = WgRfcFactory(group=draft.group)
+            draft.relateddocument_set.create(relationship_id="became_rfc", target=rfc)
+        self.assertCountEqual(docs_tracked_by_community_list(clist), [draft, rfc])
+        with self.captureOnCommitCallbacks(execute=True):
+            clist.added_docs.remove(draft)
+        self.assertEqual(list(docs_tracked_by_community_list(clist)), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            clist.added_docs.add(draft)
+
+        # rebuilding and verifying
+        call_command("update_community_list_tracked_docs", "--verify", verbosity=0)
+        TrackedDocument.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command("update_community_list_tracked_docs", "--verify", verbosity=0)
+        call_command("update_community_list_tracked_docs", verbosity=0)
+        call_command("update_community_list_tracked_docs", "--verify", verbosity=0)
+        self.assertCountEqual(docs_tracked_by_community_list(clist), [draft, rfc])
+
     def test_view_list_duplicates(self):
         person = PersonFactory(name="John Q. Public", user__username="bazquux@example.com")
         PersonFactory(name="John Q. Public", user__username="foobar@example.com")
@@ -3,18 +3,22 @@
 
 
 import re
+import uuid
+
+from collections import defaultdict
 
 from django.db.models import Q
 from django.conf import settings
+from django.core.cache import caches
 
 import debug                            # pyflakes:ignore
 
-from ietf.community.models import CommunityList, EmailSubscription, SearchRule
-from ietf.doc.models import Document, State
+from ietf.community.models import CommunityList, EmailSubscription, SearchRule, TrackedDocument
+from ietf.doc.models import Document, RelatedDocument, State
 from ietf.group.models import Role
-from ietf.person.models import Person
 from ietf.ietfauth.utils import has_role
 
+from ietf.utils.log import log
 from ietf.utils.mail import send_mail
 
 def states_of_significant_change():
@@ -49,13 +53,141 @@ def reset_name_contains_index_for_rule(rule):
     rule.name_contains_index.set(Document.objects.filter(name__regex=rule.text))
 
 def update_name_contains_indexes_with_new_doc(doc):
-    for r in SearchRule.objects.filter(rule_type="name_contains"):
-        # in theory we could use the database to do this query, but
-        # Django doesn't support a reversed regex operator, and regexp
-        # support needs backend-specific code so custom SQL is a bit
-        # cumbersome too
-        if re.search(r.text, doc.name) and not doc in r.name_contains_index.all():
-            r.name_contains_index.add(doc)
+    # in theory we could use the database to do this query, but Django
+    # doesn't support a reversed regex operator, and regexp support needs
+    # backend-specific code so custom SQL is a bit cumbersome too
+    rule_ids = search_rule_index().name_contains_rules_matching(doc.name)
+    if rule_ids:
+        through = SearchRule.name_contains_index.through
+        through.objects.bulk_create(
+            [through(searchrule_id=rule_id, document_id=doc.pk) for rule_id in rule_ids],
+            ignore_conflicts=True,
+        )
+
+
+class SearchRuleIndex:
+    """In-memory index of all community list search rules
+
+    Finds the rules matching a document without querying the rules. Rules are
+    indexed by rule type and the group, state or person they refer to, and the
+    name_contains regexps are compiled once. Use search_rule_index() to get an
+    instance that is up to date with the database.
+    """
+    GROUP_RULE_TYPES = ["group", "area", "group_exp", "group_rfc", "area_rfc"]
+    STATE_RULE_TYPES = ["state_iab", "state_iana", "state_iesg", "state_irtf", "state_ise", "state_rfceditor", "state_ietf"]
+    PERSON_RULE_TYPES = ["author", "author_rfc", "ad", "shepherd"]
+
+    # Patterns that refer to their own groups by number can't be merged into
+    # the combined name_contains pattern, as merging renumbers the groups
+    GROUP_REFERENCE_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+    def __init__(self, version=None):
+        self.version = version
+        self.rules = {}  # rule pk -> (state pk, community list pk)
+        self.rules_by_key = defaultdict(list)  # (rule type, group/state/person pk) -> [rule pk, ...]
+        self.name_contains_rules = []  # [(rule pk, compiled regexp), ...]
+        self.name_contains_any = None
+
+        combinable = []
+        for pk, rule_type, state_id, group_id, person_id, text, clist_id in SearchRule.objects.values_list(
+            "pk", "rule_type", "state_id", "group_id", "person_id", "text", "community_list_id"
+        ):
+            self.rules[pk] = (state_id, clist_id)
+            if rule_type in self.GROUP_RULE_TYPES:
+                self.rules_by_key[(rule_type, group_id)].append(pk)
+            elif rule_type in self.STATE_RULE_TYPES:
+                self.rules_by_key[(rule_type, state_id)].append(pk)
+            elif rule_type in self.PERSON_RULE_TYPES:
+                self.rules_by_key[(rule_type, person_id)].append(pk)
+            elif rule_type == "name_contains":
+                try:
+                    self.name_contains_rules.append((pk, re.compile(text)))
+                except re.error as e:
+                    log(f"Ignoring community list rule {pk} with invalid regexp {text!r}: {e}")
+                    continue
+                if combinable is not None:
+                    if self.GROUP_REFERENCE_RE.search(text):
+                        combinable = None
+                    else:
+                        combinable.append(f"(?:{text})")
+
+        if combinable:
+            try:
+                self.name_contains_any = re.compile("|".join(combinable))
+            except re.error:
+                pass  # e.g., a pattern with inline flags, which are only allowed at the start
+
+    def name_contains_rules_matching(self, name):
+        """Return the pks of the name_contains rules matching a document name"""
+        if self.name_contains_any is not None and not self.name_contains_any.search(name):
+            return []
+        return [pk for pk, regexp in self.name_contains_rules if regexp.search(name)]
+
+    def rules_matching_doc(self, doc):
+        """Return the pks of the rules matching doc, and of their community lists"""
+        if doc.type_id not in ["draft", "rfc"]:
+            return set(), set()
+        is_rfc = doc.type_id == "rfc"
+        states = set(doc.states.values_list("pk", flat=True))
+
+        keys = []
+        if doc.group_id:
+            groups = [doc.group_id]
+            if doc.group.parent_id:
+                groups.append(doc.group.parent_id)
+            rule_types = ["group_rfc", "area_rfc"] if is_rfc else ["group", "area"]
+            keys.extend((rule_type, group_id) for rule_type in rule_types for group_id in groups)
+            if not is_rfc:
+                keys.append(("group_exp", doc.group_id))  # as in docs_matching_community_list_rule()
+
+        authors = doc.documentauthor_set.values_list("person_id", flat=True)
+        keys.extend(("author_rfc" if is_rfc else "author", person_id) for person_id in authors)
+
+        if not is_rfc:
+            keys.extend((rule_type, state_id) for rule_type in self.STATE_RULE_TYPES for state_id in states)
+            if doc.ad_id:
+                keys.append(("ad", doc.ad_id))
+            if doc.shepherd_id:
+                keys.append(("shepherd", doc.shepherd.person_id))
+
+        rule_ids = set()
+        for key in keys:
+            rule_ids.update(self.rules_by_key.get(key, []))
+        if not is_rfc:
+            rule_ids.update(self.name_contains_rules_matching(doc.name))
+            # rule.state is ignored for RFCs
+            rule_ids = {pk for pk in rule_ids if self.rules[pk][0] in states}
+
+        return rule_ids, {self.rules[pk][1] for pk in rule_ids}
+
+
+SEARCH_RULE_INDEX_VERSION_CACHE_KEY = "community_search_rule_index_version"
+
+_search_rule_index = None
+
+def search_rule_index():
+    """Return a SearchRuleIndex that is up to date with the database
+
+    Each process keeps its own index, and rebuilds it when the version in the
+    cache, renewed by invalidate_search_rule_index(), changes.
+    """
+    global _search_rule_index
+    cache = caches["default"]
+    version = cache.get(SEARCH_RULE_INDEX_VERSION_CACHE_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(SEARCH_RULE_INDEX_VERSION_CACHE_KEY, version, None):
+            version = cache.get(SEARCH_RULE_INDEX_VERSION_CACHE_KEY, version)
+    index = _search_rule_index
+    if index is None or index.version != version:
+        index = _search_rule_index = SearchRuleIndex(version)
+    return index
+
+def invalidate_search_rule_index():
+    """Make all processes rebuild their SearchRuleIndex, called when rules change"""
+    global _search_rule_index
+    _search_rule_index = None
+    caches["default"].delete(SEARCH_RULE_INDEX_VERSION_CACHE_KEY)
 
 
 def docs_matching_community_list_rule(rule):
@@ -64,7 +196,7 @@ def docs_matching_community_list_rule(rule):
     if rule.rule_type.endswith("_rfc"):
         docs = docs.filter(type_id="rfc")  # rule.state is ignored for RFCs
     else:
-        docs = docs.filter(type_id="draft", states=rule.state)
+        docs = docs.filter(type_id="draft", states=rule.state_id)
     
     if rule.rule_type in ['group', 'area', 'group_rfc', 'area_rfc']:
         return docs.filter(Q(group=rule.group_id) | Q(group__parent=rule.group_id))
@@ -73,110 +205,87 @@ def docs_matching_community_list_rule(rule):
     elif rule.rule_type.startswith("state_"):
         return docs
     elif rule.rule_type in ["author", "author_rfc"]:
-        return docs.filter(documentauthor__person=rule.person)
+        return docs.filter(documentauthor__person=rule.person_id)
     elif rule.rule_type == "ad":
-        return docs.filter(ad=rule.person)
+        return docs.filter(ad=rule.person_id)
     elif rule.rule_type == "shepherd":
-        return docs.filter(shepherd__person=rule.person)
+        return docs.filter(shepherd__person=rule.person_id)
     elif rule.rule_type == "name_contains":
-        return docs.filter(searchrule=rule)
+        return docs.filter(searchrule=rule.pk)
 
     raise NotImplementedError
 
 
 def community_list_rules_matching_doc(doc):
-    rules = SearchRule.objects.none()
-    if doc.type_id not in ["draft", "rfc"]:
-        return rules  # none
-    states = list(doc.states.values_list("pk", flat=True))
-
-    # group and area rules
-    if doc.group_id:
-        groups = [doc.group_id]
-        if doc.group.parent_id:
-            groups.append(doc.group.parent_id)
-        rules_to_add = SearchRule.objects.filter(group__in=groups)
-        if doc.type_id == "rfc":
-            rules_to_add = rules_to_add.filter(rule_type__in=["group_rfc", "area_rfc"])
-        else:
-            rules_to_add = rules_to_add.filter(
-                rule_type__in=["group", "area", "group_exp"],
-                state__in=states,
-            )
-        rules |= rules_to_add
-
-    # state rules (only relevant for I-Ds)
-    if doc.type_id == "draft":
-        rules |= SearchRule.objects.filter(
-            rule_type__in=[
-                "state_iab",
-                "state_iana",
-                "state_iesg",
-                "state_irtf",
-                "state_ise",
-                "state_rfceditor",
-                "state_ietf",
-            ],
-            state__in=states,
-        )
-
-    # author rules
-    if doc.type_id == "rfc":
-        rules |= SearchRule.objects.filter(
-            rule_type="author_rfc",
-            person__in=list(Person.objects.filter(documentauthor__document=doc)),
-        )
-    else:
-        rules |= SearchRule.objects.filter(
-            rule_type="author",
-            state__in=states,
-            person__in=list(Person.objects.filter(documentauthor__document=doc)),
-        )
-
-    # Other draft-only rules rules
-    if doc.type_id == "draft":
-        if doc.ad_id:
-            rules |= SearchRule.objects.filter(
-                rule_type="ad",
-                state__in=states,
-                person=doc.ad_id,
-            )
-
-        if doc.shepherd_id:
-            rules |= SearchRule.objects.filter(
-                rule_type="shepherd",
-                state__in=states,
-                person__email=doc.shepherd_id,
-            )
+    rule_ids, _ = search_rule_index().rules_matching_doc(doc)
+    return SearchRule.objects.filter(pk__in=rule_ids)
 
-        rules |= SearchRule.objects.filter(
-            rule_type="name_contains",
-            state__in=states,
-            name_contains_index=doc,  # search our materialized index to avoid full scan
-        )
-
-    return rules
 
-
-def docs_tracked_by_community_list(clist):
+def compute_docs_tracked_by_community_list(clist):
+    """Return the pks of the documents a community list tracks, computed from its added documents and rules"""
     if clist.pk is None:
-        return Document.objects.none()
+        return set()
 
     # in theory, we could use an OR query, but databases seem to have
     # trouble with OR queries and complicated joins so do the OR'ing
     # manually
-    doc_ids = set()
-    for doc in clist.added_docs.all():
-        doc_ids.add(doc.pk)
-        doc_ids.update(rfc.pk for rfc in doc.related_that_doc("became_rfc"))
+    doc_ids = set(clist.added_docs.values_list("pk", flat=True))
+    doc_ids.update(
+        RelatedDocument.objects.filter(source__in=doc_ids, relationship="became_rfc").values_list("target", flat=True)
+    )
 
     for rule in clist.searchrule_set.all():
         doc_ids = doc_ids | set(docs_matching_community_list_rule(rule).values_list("pk", flat=True))
 
-    return Document.objects.filter(pk__in=doc_ids)
+    return doc_ids
+
+def docs_tracked_by_community_list(clist):
+    if clist.pk is None:
+        return Document.objects.none()
+
+    return Document.objects.filter(trackeddocument__community_list=clist)
+
+def update_tracked_docs_for_community_list(clist, dry_run=False):
+    """Bring the TrackedDocuments of a community list up to date
+
+    Returns the number of documents that were (or, with dry_run, would have been)
+    added to and removed from the list.
+    """
+    wanted = compute_docs_tracked_by_community_list(clist)
+    tracked = set(TrackedDocument.objects.filter(community_list=clist).values_list("document_id", flat=True))
+    added = wanted - tracked
+    removed = tracked - wanted
+    if not dry_run:
+        if removed:
+            TrackedDocument.objects.filter(community_list=clist, document_id__in=removed).delete()
+        if added:
+            TrackedDocument.objects.bulk_create(
+                [TrackedDocument(community_list=clist, document_id=doc_id) for doc_id in added],
+                ignore_conflicts=True,
+            )
+    return len(added), len(removed)
+
+def update_tracked_docs_for_doc(doc):
+    """Bring the TrackedDocuments of a document up to date after it changed"""
+    _, wanted = search_rule_index().rules_matching_doc(doc)
+    wanted.update(
+        CommunityList.objects.filter(
+            Q(added_docs=doc)
+            | Q(added_docs__relateddocument__relationship="became_rfc", added_docs__relateddocument__target=doc)
+        ).values_list("pk", flat=True)
+    )
+    tracked = set(TrackedDocument.objects.filter(document=doc).values_list("community_list_id", flat=True))
+    if tracked - wanted:
+        TrackedDocument.objects.filter(document=doc, community_list_id__in=tracked - wanted).delete()
+    if wanted - tracked:
+        TrackedDocument.objects.bulk_create(
+            [TrackedDocument(community_list_id=clist_id, document=doc) for clist_id in wanted - tracked],
+            ignore_conflicts=True,
+        )
 
 def community_lists_tracking_doc(doc):
-    return CommunityList.objects.filter(Q(added_docs=doc) | Q(searchrule__in=community_list_rules_matching_doc(doc)))
+    _, clist_ids = search_rule_index().rules_matching_doc(doc)
+    return CommunityList.objects.filter(Q(added_docs=doc) | Q(pk__in=clist_ids))
 
 
 def notify_event_to_subscribers(event):
@@ -0,0 +1,37 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ietf.doc.utils import DraftAliasGenerator
+
+
+class Command(BaseCommand):
+    help = "Time a full run of the DraftAliasGenerator"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-r", "--repeat", type=int, default=5,
+            help="Number of times to run the generator (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("Need at least one repetition")
+
+        timings = []
+        for _ in range(options["repeat"]):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                aliases = list(DraftAliasGenerator())
+                timings.append(time.perf_counter() - start)
+        drafts = len(set(alias.split(".")[0] for alias, _ in aliases))
+        self.stdout.write(f"{'drafts':>8} {'aliases':>8} {'queries':>8} {'median ms':>10} {'max ms':>8}")
+        self.stdout.write(
+            f"{drafts:>8} {len(aliases):>8} {len(queries):>8} "
+            f"{statistics.median(timings) * 1000:>10.1f} {max(timings) * 1000:>8.1f}"
+        )
@@ -0,0 +1,69 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+import multiprocessing
+import os
+
+from tqdm import tqdm
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ietf.doc.models import Document, StoredObject
+from ietf.doc.utils import prerender_document_artifacts
+
+
+def _prerender(name):
+    """Prerender a document in a worker process, returning its name and any error"""
+    try:
+        prerender_document_artifacts(Document.objects.get(name=name))
+    except Exception as err:
+        return name, repr(err)
+    return name, None
+
+
+class Command(BaseCommand):
+    help = "Render the htmlized and pdfized forms of drafts and RFCs into the blob store"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--type", dest="types", action="append", choices=["draft", "rfc"],
+            help="Document type to render, may be repeated (default: draft and rfc)",
+        )
+        parser.add_argument(
+            "-p", "--processes", type=int, default=os.cpu_count() or 1,
+            help="Number of worker processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--all", action="store_true", default=False,
+            help="Also render documents whose current PDF is already in the blob store",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.ENABLE_BLOBSTORAGE:
+            raise CommandError("Blob storage is not enabled")
+        if options["processes"] < 1:
+            raise CommandError("Need at least one process")
+        verbosity = int(options["verbosity"])
+
+        docs = Document.objects.filter(type_id__in=options["types"] or ["draft", "rfc"]).only(
+            "name", "rev", "type", "uploaded_filename"
+        )
+        stored = set()
+        if not options["all"]:
+            stored = set(
+                StoredObject.objects.filter(store="pdfized", deleted__isnull=True).values_list("name", flat=True)
+            )
+        names = [doc.name for doc in docs if doc.stored_artifact_name("pdfized") not in stored]
+
+        # each worker opens its own database connection
+        connections.close_all()
+        failed = 0
+        with multiprocessing.get_context("fork").Pool(options["processes"]) as pool:
+            results = pool.imap_unordered(_prerender, names, chunksize=10)
+            for name, error in tqdm(results, total=len(names), disable=(verbosity != 1)):
+                if error is not None:
+                    failed += 1
+                    self.stderr.write(f"{name}: {error}")
+        if verbosity > 0:
+            self.stdout.write(f"Prerendered {len(names) - failed} documents, {failed} failed")
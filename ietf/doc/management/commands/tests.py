@@ -70,3 +70,10 @@ def test_reset_rfc_authors(self):
             draft.documentauthor_set.values(*docauthor_fields),
             rfc.documentauthor_set.values(*docauthor_fields),
         )
+
+    def test_benchmark_draft_aliases(self):
+        DocumentAuthorFactory(document=WgDraftFactory())
+        out, _ = self._call_command("benchmark_draft_aliases", "--repeat", "2")
+        self.assertIn("median ms", out)
+        with self.assertRaises(CommandError):
+            self._call_command("benchmark_draft_aliases", "--repeat", "0")
@@ -0,0 +1,33 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# The document search uses name__icontains / title__icontains lookups, which
+# Django renders as UPPER(...) LIKE UPPER(...). Trigram indexes over the same
+# expressions let PostgreSQL answer those without a sequential scan. They are
+# kept out of the model Meta so that test databases created without migrations
+# do not need the pg_trgm extension. The indexes are built CONCURRENTLY so
+# doc_document stays writable meanwhile, which PostgreSQL only allows outside a
+# transaction.
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("doc", "0025_storedobject_storedobject_unique_name_per_store"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(
+            sql="CREATE INDEX CONCURRENTLY doc_document_name_upper_trgm ON doc_document USING gin (UPPER(name) gin_trgm_ops);",
+            reverse_sql="DROP INDEX CONCURRENTLY doc_document_name_upper_trgm;",
+        ),
+        migrations.RunSQL(
+            sql="CREATE INDEX CONCURRENTLY doc_document_title_upper_trgm ON doc_document USING gin (UPPER(title) gin_trgm_ops);",
+            reverse_sql="DROP INDEX CONCURRENTLY doc_document_title_upper_trgm;",
+        ),
+    ]
@@ -9,6 +9,7 @@
 import django.db
 import rfc2html
 
+from importlib.metadata import version as metadata_version
 from io import BufferedReader
 from pathlib import Path
 from lxml import etree
@@ -33,6 +34,7 @@
 
 from ietf.group.models import Group
 from ietf.doc.storage_utils import (
+    retrieve_bytes as utils_retrieve_bytes,
     store_str as utils_store_str,
     store_bytes as utils_store_bytes,
     store_file as utils_store_file
@@ -47,6 +49,7 @@
 from ietf.utils.validators import validate_no_control_chars
 from ietf.utils.mail import formataddr
 from ietf.utils.models import ForeignKey
+from ietf.utils.request_cache import invalidate_request_cache, request_memoize
 from ietf.utils.timezone import date_today, RPC_TZINFO, DEADLINE_TZINFO
 if TYPE_CHECKING:
     # importing other than for type checking causes errors due to cyclic imports
@@ -102,6 +105,14 @@ class Meta:
 IESG_STATCHG_CONFLREV_ACTIVE_STATES = ("iesgeval", "defer")
 IESG_SUBSTATE_TAGS = ('ad-f-up', 'need-rev', 'extpty')
 
+# Renderer versions of prerendered artifacts, which are part of their blob names.
+# Bump the leading number when render_htmlized() or render_pdfized() changes its output.
+PRERENDERED_ARTIFACT_VERSIONS = {
+    "htmlized": f"1-{metadata_version('rfc2html')}",
+    "pdfized": f"1-{metadata_version('weasyprint')}",
+}
+PRERENDERED_ARTIFACT_EXTENSIONS = {"htmlized": "html", "pdfized": "pdf"}
+
 class DocumentInfo(models.Model):
     """Any kind of document.  Draft, RFC, Charter, IPR Statement, Liaison Statement"""
     time = models.DateTimeField(default=timezone.now) # should probably have auto_now=True
@@ -318,6 +329,7 @@ def set_state(self, state):
             log.assertion('iesg_state', note="A document's 'draft-iesg' state should never be unset'.  Failed for %s"%self.name)
         self.state_cache = None # invalidate cache
         self._cached_state_slug = {}
+        invalidate_request_cache(type(self), self.pk, "states")
 
     def unset_state(self, state_type):
         """Unset state of type so no state of that type is any longer set."""
@@ -325,6 +337,7 @@ def unset_state(self, state_type):
         self.states.remove(*self.states.filter(type=state_type))
         self.state_cache = None # invalidate cache
         self._cached_state_slug = {}
+        invalidate_request_cache(type(self), self.pk, "states")
 
     def get_state(self, state_type=None):
         """Get state of type, or default state for document type if
@@ -337,13 +350,14 @@ def get_state(self, state_type=None):
             state_type = self.type_id
 
         if not hasattr(self, "state_cache") or self.state_cache == None:
-            state_cache = {}
-            for s in self.states.all():
-                state_cache[s.type_id] = s
-            self.state_cache = state_cache
+            self.state_cache = dict(self._states_by_type())
 
         return self.state_cache.get(state_type, None)
 
+    @request_memoize("states")
+    def _states_by_type(self):
+        return { s.type_id: s for s in self.states.all() }
+
     def get_state_slug(self, state_type=None):
         """Get state of type, or default if not specified, returning
         the slug of the state or None. This frees the caller of having
@@ -518,13 +532,25 @@ def all_relations_that_doc(self, relationship, related=None):
                 related = r.target.all_relations_that_doc(relationship, related)
         return related
 
+    def _attached_relation_graph(self, relationship):
+        """RelationGraph attached by ietf.doc.utils_relations, if it covers relationship"""
+        graph = getattr(self, "_relation_graph", None)
+        return graph if graph is not None and graph.covers(relationship) else None
+
     def related_that(self, relationship):
+        graph = self._attached_relation_graph(relationship)
+        if graph is not None:
+            return graph.related_that(self, relationship)
         return list(set([x.source for x in self.relations_that(relationship)]))
 
     def all_related_that(self, relationship, related=None):
         return list(set([x.source for x in self.all_relations_that(relationship)]))
 
+    @request_memoize("relations")
     def related_that_doc(self, relationship):
+        graph = self._attached_relation_graph(relationship)
+        if graph is not None:
+            return graph.related_that_doc(self, relationship)
         return list(set([x.target for x in self.relations_that_doc(relationship)]))
 
     def all_related_that_doc(self, relationship, related=None):
@@ -634,24 +660,20 @@ def htmlized(self):
             except EOFError:
                 html = None
             if not html:
-                # The path here has to match the urlpattern for htmlized
-                # documents in order to produce correct intra-document links
-                html = rfc2html.markup(text, path=settings.HTMLIZER_URL_PREFIX)
-                html = f'<div class="rfcmarkup">{html}</div>'
+                stored = self.stored_artifact("htmlized")
+                html = stored.decode("utf-8") if stored else self.render_htmlized(text)
                 if html:
                     cache.set(cache_key, html, settings.HTMLIZER_CACHE_TIME)
         return html
 
+    def render_htmlized(self, text):
+        # The path here has to match the urlpattern for htmlized
+        # documents in order to produce correct intra-document links
+        html = rfc2html.markup(text, path=settings.HTMLIZER_URL_PREFIX)
+        return f'<div class="rfcmarkup">{html}</div>'
+
     def pdfized(self):
         name = self.get_base_name()
-        text = self.html_body(classes="rfchtml")
-        stylesheets = [finders.find("ietf/css/document_html_referenced.css")]
-        if text:
-            stylesheets.append(finders.find("ietf/css/document_html_txt.css"))
-        else:
-            text = self.htmlized()
-        stylesheets.append(f'{settings.STATIC_IETF_ORG_INTERNAL}/fonts/noto-sans-mono/import.css')
-
         cache = caches["pdfized"]
         cache_key = name.split(".")[0]
         try:
@@ -659,25 +681,72 @@ def pdfized(self):
         except EOFError:
             pdf = None
         if not pdf:
-            try:
-                font_config = FontConfiguration()
-                pdf = wpHTML(
-                    string=text, base_url=settings.IDTRACKER_BASE_URL
-                ).write_pdf(
-                    stylesheets=stylesheets,
-                    font_config=font_config,
-                    presentational_hints=True,
-                    optimize_images=True,
-                )
-            except AssertionError:
-                pdf = None
-            except Exception as e:
-                log.log('weasyprint failed:'+str(e))
-                raise
+            pdf = self.stored_artifact("pdfized") or self.render_pdfized()
             if pdf:
                 cache.set(cache_key, pdf, settings.PDFIZER_CACHE_TIME)
         return pdf
 
+    def render_pdfized(self):
+        text = self.html_body(classes="rfchtml")
+        stylesheets = [finders.find("ietf/css/document_html_referenced.css")]
+        if text:
+            stylesheets.append(finders.find("ietf/css/document_html_txt.css"))
+        else:
+            text = self.htmlized()
+        stylesheets.append(f'{settings.STATIC_IETF_ORG_INTERNAL}/fonts/noto-sans-mono/import.css')
+
+        try:
+            font_config = FontConfiguration()
+            return wpHTML(
+                string=text, base_url=settings.IDTRACKER_BASE_URL
+            ).write_pdf(
+                stylesheets=stylesheets,
+                font_config=font_config,
+                presentational_hints=True,
+                optimize_images=True,
+            )
+        except AssertionError:
+            return None
+        except Exception as e:
+            log.log('weasyprint failed:'+str(e))
+            raise
+
+    def stored_artifact_name(self, kind):
+        """Blob name of the prerendered artifact of this revision, including its renderer version"""
+        key = self.get_base_name().split(".")[0]
+        return f"{key}.{PRERENDERED_ARTIFACT_VERSIONS[kind]}.{PRERENDERED_ARTIFACT_EXTENSIONS[kind]}"
+
+    def stored_artifacts(self, kind):
+        """Blob names of the prerendered artifacts of this revision, of any renderer version"""
+        key = self.get_base_name().split(".")[0]
+        return set(
+            StoredObject.objects.filter(
+                store=kind, name__startswith=f"{key}.", deleted__isnull=True
+            ).values_list("name", flat=True)
+        )
+
+    def stored_artifact(self, kind):
+        """Return an artifact pre-rendered into the blob store, or None if there isn't one
+
+        The htmlized and pdfized forms of drafts and RFCs are rendered into the blob
+        store when they are published; see ietf.doc.utils.prerender_document_artifacts().
+        Artifacts rendered by another version of the renderer are not served. Instead,
+        the document is queued to be rendered again.
+        """
+        if not settings.ENABLE_BLOBSTORAGE:
+            return None
+        name = self.stored_artifact_name(kind)
+        stored = self.stored_artifacts(kind)
+        if name in stored:
+            return utils_retrieve_bytes(kind, name) or None
+        if stored and settings.SERVER_MODE != "test":
+            # Queue one re-render at a time, whatever the number of requests for it
+            if caches["default"].add(f"prerender_pending_{name}", True, 3600):
+                from ietf.doc.tasks import prerender_document_artifacts_task  # tasks imports models
+                doc = self if isinstance(self, Document) else self.doc
+                prerender_document_artifacts_task.delay(doc.name, self.rev)
+        return None
+
     def references(self):
         return self.relations_that_doc(('refnorm','refinfo','refunk','refold'))
 
@@ -965,11 +1034,12 @@ def file_tag(self):
     def filename_with_rev(self):
         return "%s-%s.txt" % (self.name, self.rev)
     
+    @request_memoize("events")
     def latest_event(self, *args, **filter_args):
         """Get latest event of optional Python type and with filter
         arguments, e.g. d.latest_event(type="xyz") returns a DocEvent
         while d.latest_event(WriteupDocEvent, type="xyz") returns a
-        WriteupDocEvent event."""
+        WriteupDocEvent event. Memoized for the current request."""
         model = args[0] if args else DocEvent
         e = model.objects.filter(doc=self).filter(**filter_args).order_by('-time', '-id').first()
         return e
@@ -991,6 +1061,7 @@ def save_with_history(self, events):
         self._has_an_event_so_saving_is_allowed = True
         self.save()
         del self._has_an_event_so_saving_is_allowed
+        invalidate_request_cache(Document, self.pk)
 
         from ietf.doc.utils import save_document_in_history
         save_document_in_history(self)
@@ -1042,10 +1113,11 @@ def group_acronym(self):
         else:
             return "none"
 
-    @memoize
     def returning_item(self):
-        e = self.latest_event(TelechatDocEvent, type="scheduled_for_telechat")
-        return e.returning_item if e else None
+        if not hasattr(self, "_cached_returning_item"):
+            e = self.latest_event(TelechatDocEvent, type="scheduled_for_telechat")
+            self._cached_returning_item = e.returning_item if e else None
+        return self._cached_returning_item
 
     # This is brittle. Resist the temptation to make it more brittle by combining the search against those description
     # strings to one command. It is coincidence that those states have the same description - one might change.
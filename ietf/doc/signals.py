@@ -0,0 +1,68 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from ietf.utils.request_cache import invalidate_request_cache
+
+from .models import DocEvent, Document, RelatedDocument
+from .tasks import prerender_document_artifacts_task
+
+def prerender_artifacts_for_event(event: DocEvent):
+    """Queue a task to render the htmlized and pdfized forms of a newly published document
+
+    The task waits for the document's files to be in place, so it is queued right away.
+    """
+    doc = event.doc
+    if not settings.ENABLE_BLOBSTORAGE or doc.type_id not in ["draft", "rfc"]:
+        return
+
+    # kludge alert: queuing a celery task in response to a signal can cause unexpected attempts to
+    # start a Celery task during tests. To prevent this, don't queue a celery task if we're running
+    # tests.
+    if settings.SERVER_MODE != "test":
+        transaction.on_commit(
+            lambda: prerender_document_artifacts_task.delay(
+                name=doc.name, rev=doc.rev if doc.type_id == "draft" else None
+            )
+        )
+
+
+# dispatch_uid ensures only a single signal receiver binding is made
+@receiver(post_save, dispatch_uid="prerender_artifacts_receiver_uid")
+def prerender_artifacts_receiver(sender, instance, created=False, raw=False, **kwargs):
+    """Call prerender_artifacts_for_event after saving a new revision or RFC publication event"""
+    if not isinstance(instance, DocEvent) or not created or raw:
+        return
+    if instance.type in ["new_revision", "published_rfc"]:
+        prerender_artifacts_for_event(instance)
+
+
+# The receivers below keep the request-scoped memoization of Document accessors
+# (see ietf.utils.request_cache) in step with changes made during a request.
+
+@receiver([post_save, post_delete], dispatch_uid="invalidate_doc_events_receiver_uid")
+def invalidate_doc_events_receiver(sender, instance, **kwargs):
+    """Forget memoized latest_event() results for the document of a saved or deleted event"""
+    if isinstance(instance, DocEvent) and instance.doc_id is not None:
+        invalidate_request_cache(Document, instance.doc_id, "events")
+
+
+@receiver([post_save, post_delete], sender=RelatedDocument, dispatch_uid="invalidate_doc_relations_receiver_uid")
+def invalidate_doc_relations_receiver(sender, instance, **kwargs):
+    """Forget memoized related_that_doc() results for the source of a changed relation"""
+    invalidate_request_cache(Document, instance.source_id, "relations")
+
+
+@receiver(m2m_changed, sender=Document.states.through, dispatch_uid="invalidate_doc_states_receiver_uid")
+def invalidate_doc_states_receiver(sender, instance, action, reverse, pk_set, **kwargs):
+    """Forget memoized states of documents whose states are changed directly"""
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        invalidate_request_cache(Document, instance.pk, "states")
+    elif pk_set:
+        for pk in pk_set:
+            invalidate_request_cache(Document, pk, "states")
@@ -97,14 +97,14 @@ def store_file(
             # raise Exception("Not ignoring overwrite attempts while testing")
         else:
             try:
-                new_name = self.save(name, file)
+                new_name, metadata = self.save_with_metadata(name, file)
                 now = timezone.now()
                 record, created = StoredObject.objects.get_or_create(
                     store=kind,
                     name=name,
                     defaults=dict(
-                        sha384=self.in_flight_custom_metadata[name]["sha384"],
-                        len=int(self.in_flight_custom_metadata[name]["len"]),
+                        sha384=metadata["sha384"],
+                        len=metadata["len"],
                         store_created=now,
                         created=now,
                         modified=now,
@@ -113,8 +113,8 @@ def store_file(
                     ),
                 )
                 if not created:
-                    record.sha384 = self.in_flight_custom_metadata[name]["sha384"]
-                    record.len = int(self.in_flight_custom_metadata[name]["len"])
+                    record.sha384 = metadata["sha384"]
+                    record.len = metadata["len"]
                     record.modified = now
                     record.deleted = None
                     record.save()
@@ -129,10 +129,17 @@ def store_file(
                 complaint = f"Failed to save {kind}:{name}"
                 log(complaint, e)
                 debug.show('f"{complaint}: {e}"')
-            finally:
-                del self.in_flight_custom_metadata[name]
         return None
 
+    def save_with_metadata(self, name: str, file: Union[File, BufferedReader]):
+        """Save file, returning the saved name and the sha384 and len for its StoredObject"""
+        try:
+            new_name = self.save(name, file)
+            metadata = self.in_flight_custom_metadata[name]
+        finally:
+            self.in_flight_custom_metadata.pop(name, None)
+        return new_name, {"sha384": metadata["sha384"], "len": int(metadata["len"])}
+
     def exists_in_storage(self, kind: str, name: str) -> bool:
         try:
             # open is realized with a HEAD
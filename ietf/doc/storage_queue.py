@@ -0,0 +1,312 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+"""Write-behind queue for blob store writes
+
+When settings.BLOBSTORAGE_WRITE_BEHIND is set, store_file() and friends in
+ietf.doc.storage_utils queue blobs on local disk instead of uploading them inline.
+Callers can also ask store_file() to queue a particular write. Reads and removals
+always consult the queue. flush_write_behind_queue() uploads queued blobs in
+batches, normally from a Celery task.
+
+Each queued blob is a data file plus a JSON entry that refers to it. The entry is
+named after the blob's kind and name, so a later write of the same blob replaces
+the queued one. Data files have unique names so replacing an entry never changes
+the data a flush is in the middle of uploading. Dropping an entry leaves a removal
+marker, so a flush that is uploading it undoes the upload instead of recording it.
+"""
+import datetime
+import json
+import os
+import shutil
+import time
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha384
+from io import BufferedReader
+from pathlib import Path
+from typing import Optional, Union
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import File
+from django.utils import timezone
+
+from ietf.utils.log import log
+
+
+# Removal markers that no flush has picked up are deleted once they are this old,
+# which is far longer than an upload can take.
+REMOVAL_MARKER_MAX_AGE = datetime.timedelta(hours=1)
+
+
+def _queue_dir() -> Path:
+    return Path(settings.BLOBSTORAGE_WRITE_BEHIND_DIR)
+
+
+def _entry_path(kind: str, name: str) -> Path:
+    return _queue_dir() / kind / f"{sha384(name.encode('utf8')).hexdigest()}.json"
+
+
+def _removal_marker_path(path: Path, entry: dict) -> Path:
+    return path.with_name(f"{path.stem}.{entry['id']}.removed")
+
+
+def _read_entry(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_entry(path: Path, entry: dict):
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(json.dumps(entry))
+    tmp_path.replace(path)  # atomic
+
+
+def _remove_data(entry: dict):
+    (_queue_dir() / entry["data"]).unlink(missing_ok=True)
+
+
+def queue_file(
+    kind: str,
+    name: str,
+    file: Union[File, BufferedReader, Path],
+    allow_overwrite: bool = False,
+    doc_name: Optional[str] = None,
+    doc_rev: Optional[str] = None,
+) -> None:
+    """Queue a blob to be written to the blob store
+
+    file may be a Path to a file on local disk, which is hard-linked into the queue
+    when possible instead of being copied.
+    """
+    path = _entry_path(kind, name)
+    replaced = _read_entry(path)
+    if replaced is not None and not allow_overwrite:
+        log(f"Failed to save {kind}:{name} - name already exists in store")
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.data")
+    if isinstance(file, Path):
+        try:
+            os.link(file, data_path)
+        except OSError:
+            shutil.copyfile(file, data_path)
+    else:
+        file.seek(0)
+        with data_path.open("wb") as f:
+            shutil.copyfileobj(file, f)
+    _write_entry(
+        path,
+        dict(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            name=name,
+            data=str(data_path.relative_to(_queue_dir())),
+            allow_overwrite=allow_overwrite,
+            doc_name=doc_name,
+            doc_rev=doc_rev,
+            queued=timezone.now().isoformat(),
+            attempts=0,
+        ),
+    )
+    if replaced is not None:
+        _remove_data(replaced)
+    _schedule_flush()
+
+
+def _schedule_flush():
+    """Queue a flush task, unless one is already queued
+
+    The task is delayed so writes that arrive close together are uploaded in one batch.
+    """
+    # kludge alert: queuing a celery task during tests can cause unexpected attempts
+    # to start a Celery task. Flushes are done explicitly in tests.
+    if settings.SERVER_MODE == "test":
+        return
+    delay = settings.BLOBSTORAGE_WRITE_BEHIND_DELAY
+    if caches["default"].add("blobstore_write_behind_flush_pending", True, delay):
+        from ietf.doc.tasks import flush_blob_write_behind_queue_task  # tasks imports models
+        flush_blob_write_behind_queue_task.apply_async(countdown=delay)
+
+
+def queued_path(kind: str, name: str) -> Optional[Path]:
+    """Path of the queued data for a blob, or None if it is not queued"""
+    entry = _read_entry(_entry_path(kind, name))
+    if entry is None:
+        return None
+    data_path = _queue_dir() / entry["data"]
+    return data_path if data_path.exists() else None
+
+
+def dequeue(kind: str, name: str) -> bool:
+    """Drop a queued write of a blob. Returns True if there was one."""
+    path = _entry_path(kind, name)
+    entry = _read_entry(path)
+    if entry is None:
+        return False
+    _removal_marker_path(path, entry).touch()
+    path.unlink(missing_ok=True)
+    _remove_data(entry)
+    return True
+
+
+def _queued_entries() -> list[tuple[Path, dict]]:
+    entries = []
+    for path in _queue_dir().glob("*/*.json"):
+        entry = _read_entry(path)
+        if entry is not None:
+            entries.append((path, entry))
+    entries.sort(key=lambda e: e[1]["queued"])
+    return entries
+
+
+def write_behind_queue_stats() -> dict:
+    """Depth of the write-behind queue and age in seconds of its oldest entry"""
+    entries = _queued_entries()
+    lag = 0.0
+    if entries:
+        oldest = datetime.datetime.fromisoformat(entries[0][1]["queued"])
+        lag = (timezone.now() - oldest).total_seconds()
+    return dict(depth=len(entries), lag=lag)
+
+
+def _upload(entry: dict) -> Optional[dict]:
+    """Upload a queued blob, returning the StoredObject fields for it
+
+    Returns None if the blob was not uploaded because it already exists. Runs in a
+    worker thread, so must not use the database.
+    """
+    from ietf.doc.storage_utils import _get_storage
+    kind, name = entry["kind"], entry["name"]
+    store = _get_storage(kind)
+    if not entry["allow_overwrite"] and store.exists_in_storage(kind, name):
+        log(f"Failed to save {kind}:{name} - name already exists in store")
+        return None
+    with (_queue_dir() / entry["data"]).open("rb") as f:
+        new_name, metadata = store.save_with_metadata(name, File(f))
+    if new_name != name:
+        log(f"Error encountered saving '{name}' - results stored in '{new_name}' instead.")
+    return metadata
+
+
+def _complete(path: Path, entry: dict):
+    """Remove a queue entry unless it was replaced by a newer write"""
+    current = _read_entry(path)
+    if current is not None and current["id"] == entry["id"]:
+        path.unlink(missing_ok=True)
+    _remove_data(entry)
+
+
+def _was_removed(path: Path, entry: dict) -> bool:
+    return _removal_marker_path(path, entry).exists()
+
+
+def _undo_upload(entry: dict):
+    """Remove a blob whose queued write was dropped while it was being uploaded"""
+    from ietf.doc.storage_utils import _get_storage
+    kind, name = entry["kind"], entry["name"]
+    try:
+        _get_storage(kind).remove_from_storage(kind, name, warn_if_missing=False)
+    except Exception as err:
+        log(f"Blobstore Error: Failed to remove {kind}:{name} after it was dropped from the queue: {repr(err)}")
+
+
+def _remove_stale_removal_markers():
+    cutoff = time.time() - REMOVAL_MARKER_MAX_AGE.total_seconds()
+    for marker in _queue_dir().glob("*/*.removed"):
+        try:
+            if marker.stat().st_mtime < cutoff:
+                marker.unlink(missing_ok=True)
+        except FileNotFoundError:
+            pass
+
+
+def _retry_or_drop(path: Path, entry: dict, err: Exception):
+    current = _read_entry(path)
+    if current is None or current["id"] != entry["id"]:
+        _remove_data(entry)  # replaced by a newer write, which will be retried instead
+    elif entry["attempts"] + 1 >= settings.BLOBSTORAGE_WRITE_BEHIND_MAX_ATTEMPTS:
+        log(f"Blobstore Error: Giving up on queued write of {entry['kind']}:{entry['name']}: {repr(err)}")
+        _complete(path, entry)
+    else:
+        log(f"Blobstore Error: Failed queued write of {entry['kind']}:{entry['name']}, will retry: {repr(err)}")
+        _write_entry(path, entry | dict(attempts=entry["attempts"] + 1))
+
+
+def flush_write_behind_queue() -> dict:
+    """Upload queued blobs to the blob store
+
+    Uploads run in batches of BLOBSTORAGE_WRITE_BEHIND_BATCH_SIZE, each spread over
+    BLOBSTORAGE_WRITE_BEHIND_CONCURRENCY threads, and the StoredObject records of a
+    batch are upserted with a single query. Failed uploads stay queued for the next
+    flush until they have been tried BLOBSTORAGE_WRITE_BEHIND_MAX_ATTEMPTS times.
+    Blobs that were removed while they were being uploaded are not recorded, and
+    are removed from the blob store again.
+
+    Returns the queue stats from before the flush plus the number of uploaded,
+    failed and removed blobs, which are also logged.
+    """
+    from ietf.doc.models import StoredObject
+
+    stats = write_behind_queue_stats() | dict(uploaded=0, failed=0, removed=0)
+    _remove_stale_removal_markers()
+    entries = _queued_entries()
+    batch_size = settings.BLOBSTORAGE_WRITE_BEHIND_BATCH_SIZE
+
+    def upload(path_and_entry):
+        path, entry = path_and_entry
+        try:
+            return path, entry, _upload(entry), None
+        except Exception as err:
+            return path, entry, None, err
+
+    with ThreadPoolExecutor(max_workers=settings.BLOBSTORAGE_WRITE_BEHIND_CONCURRENCY) as pool:
+        for start in range(0, len(entries), batch_size):
+            uploaded = []
+            for path, entry, metadata, err in pool.map(upload, entries[start:start + batch_size]):
+                if err is not None:
+                    stats["failed"] += 1
+                    _retry_or_drop(path, entry, err)
+                    continue
+                record = None
+                if metadata is not None:
+                    now = timezone.now()
+                    record = StoredObject(
+                        store=entry["kind"],
+                        name=entry["name"],
+                        sha384=metadata["sha384"],
+                        len=metadata["len"],
+                        store_created=now,
+                        created=now,
+                        modified=now,
+                        doc_name=entry["doc_name"],  # Note that these are assumed to be invariant
+                        doc_rev=entry["doc_rev"],  # for a given name
+                        deleted=None,
+                    )
+                uploaded.append((path, entry, record))
+            # Recording a blob that was removed during its upload would undo the
+            # removal. Check again after the upsert for removals that raced with it.
+            removed = {entry["id"] for path, entry, _ in uploaded if _was_removed(path, entry)}
+            StoredObject.objects.bulk_create(
+                [record for _, entry, record in uploaded if record is not None and entry["id"] not in removed],
+                update_conflicts=True,
+                unique_fields=["store", "name"],
+                update_fields=["sha384", "len", "modified", "deleted"],
+            )
+            removed.update(entry["id"] for path, entry, _ in uploaded if _was_removed(path, entry))
+            for path, entry, record in uploaded:
+                if entry["id"] not in removed:
+                    _complete(path, entry)
+                    if record is not None:
+                        stats["uploaded"] += 1
+                    continue
+                if record is not None:
+                    _undo_upload(entry)
+                    stats["removed"] += 1
+                _removal_marker_path(path, entry).unlink(missing_ok=True)
+                _remove_data(entry)
+
+    log(json.dumps({"log": "blobstore_write_behind", **stats}))
+    return stats
@@ -1,6 +1,7 @@
 # Copyright The IETF Trust 2025, All Rights Reserved
 
 from io import BufferedReader
+from pathlib import Path
 from typing import Optional, Union
 import debug  # pyflakes ignore
 
@@ -10,6 +11,8 @@
 
 from ietf.utils.log import log
 
+from .storage_queue import dequeue, queue_file, queued_path
+
 
 # TODO-BLOBSTORE (Future, maybe after leaving 3.9) : add a return type
 def _get_storage(kind: str):
@@ -25,6 +28,8 @@ def _get_storage(kind: str):
 def exists_in_storage(kind: str, name: str) -> bool:
     if settings.ENABLE_BLOBSTORAGE:
         try:
+            if queued_path(kind, name) is not None:
+                return True
             store = _get_storage(kind)
             return store.exists_in_storage(kind, name)
         except Exception as err:
@@ -35,6 +40,7 @@ def exists_in_storage(kind: str, name: str) -> bool:
 def remove_from_storage(kind: str, name: str, warn_if_missing: bool = True) -> None:
     if settings.ENABLE_BLOBSTORAGE:
         try:
+            dequeue(kind, name)
             store = _get_storage(kind)
             store.remove_from_storage(kind, name, warn_if_missing)
         except Exception as err:
@@ -46,14 +52,29 @@ def remove_from_storage(kind: str, name: str, warn_if_missing: bool = True) -> N
 def store_file(
     kind: str,
     name: str,
-    file: Union[File, BufferedReader],
+    file: Union[File, BufferedReader, Path],
     allow_overwrite: bool = False,
     doc_name: Optional[str] = None,
     doc_rev: Optional[str] = None,
+    write_behind: Optional[bool] = None,
 ) -> None:
+    """Store a file in the blob store
+
+    With write_behind, the file is queued on local disk and uploaded later by a Celery
+    task. It defaults to settings.BLOBSTORAGE_WRITE_BEHIND. file may be a Path to a
+    file on local disk.
+    """
     # debug.show('f"asked to store {name} into {kind}"')
     if settings.ENABLE_BLOBSTORAGE:
         try:
+            if write_behind is None:
+                write_behind = settings.BLOBSTORAGE_WRITE_BEHIND
+            if write_behind:
+                queue_file(kind, name, file, allow_overwrite, doc_name, doc_rev)
+                return None
+            if isinstance(file, Path):
+                with file.open("rb") as f:
+                    return store_file(kind, name, f, allow_overwrite, doc_name, doc_rev)
             store = _get_storage(kind)
             store.store_file(kind, name, file, allow_overwrite, doc_name, doc_rev)
         except Exception as err:
@@ -101,6 +122,9 @@ def retrieve_bytes(kind: str, name: str) -> bytes:
     content = b""
     if settings.ENABLE_BLOBSTORAGE:
         try:
+            path = queued_path(kind, name)
+            if path is not None:
+                return path.read_bytes()
             store = _get_storage(kind)
             with store.open(name) as f:
                 with maybe_log_timing(
@@ -26,12 +26,14 @@
 )
 from .lastcall import get_expired_last_calls, expire_last_call
 from .models import Document, NewRevisionDocEvent
+from .storage_queue import flush_write_behind_queue
 from .utils import (
     generate_idnits2_rfc_status,
     generate_idnits2_rfcs_obsoleted,
     update_or_create_draft_bibxml_file,
     ensure_draft_bibxml_path_exists,
     investigate_fragment,
+    prerender_document_artifacts,
 )
 
 
@@ -128,3 +130,38 @@ def investigate_fragment_task(name_fragment: str):
         "name_fragment": name_fragment,
         "results": investigate_fragment(name_fragment),
     }
+
+
+@shared_task
+def flush_blob_write_behind_queue_task():
+    # Flush even without BLOBSTORAGE_WRITE_BEHIND, callers can ask to queue writes
+    flush_write_behind_queue()
+
+
+# A newly published document's files may not be in place yet when its prerender
+# task runs; it retries every PRERENDER_RETRY_DELAY seconds until they are.
+PRERENDER_RETRY_DELAY = 60
+PRERENDER_MAX_RETRIES = 30
+
+
+@shared_task(bind=True, max_retries=PRERENDER_MAX_RETRIES)
+def prerender_document_artifacts_task(self, name, rev=None):
+    """Render the htmlized and pdfized forms of a document into the blob store
+
+    Retries later if the document's text file is not in place yet.
+    """
+    doc = Document.objects.filter(name=name).first()
+    if doc is None:
+        log.log(f"Not prerendering {name}: no such document")
+        return
+    if rev is not None and doc.rev != rev:
+        return  # superseded, the newer revision gets its own task
+    if not doc.text_exists():
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=PRERENDER_RETRY_DELAY)
+        log.log(f"Not prerendering {name}-{doc.rev}: its text file is not in place")
+        return
+    try:
+        prerender_document_artifacts(doc)
+    except Exception as err:
+        log.log(f"Error prerendering {name}-{doc.rev}: {err}")
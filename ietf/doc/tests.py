@@ -26,7 +26,9 @@
 from django.conf import settings
 from django.forms import Form
 from django.utils.html import escape
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.utils.text import slugify
 
@@ -56,6 +58,7 @@
     get_doc_email_aliases,
 )
 from ietf.doc.views_doc import get_diff_revisions
+from ietf.doc.views_search import SearchForm, retrieve_search_results
 from ietf.group.models import Group, Role
 from ietf.group.factories import GroupFactory, RoleFactory
 from ietf.ipr.factories import HolderIprDisclosureFactory
@@ -67,6 +70,7 @@
 from ietf.person.models import Person
 from ietf.person.factories import PersonFactory, EmailFactory
 from ietf.utils.mail import outbox, empty_outbox
+from ietf.utils.request_cache import request_cache
 from ietf.utils.test_utils import login_testing_unauthorized, unicontent
 from ietf.utils.test_utils import TestCase
 from ietf.utils.text import normalize_text
@@ -185,6 +189,26 @@ def test_search_became_rfc(self):
         self.assertEqual(r.status_code, 200)
         self.assertContains(r, rfc.title)
 
+    def test_retrieve_search_results_no_duplicates(self):
+        author = PersonFactory()
+        EmailFactory(person=author, address="first-address@example.com")
+        EmailFactory(person=author, address="second-address@example.com")
+        draft = WgDraftFactory(name="draft-ietf-mars-nodups", authors=[author])
+        draft.set_state(State.objects.get(used=True, type="draft-iesg", slug="pub-req"))
+        rfc = WgRfcFactory()
+        draft.relateddocument_set.create(relationship_id="became_rfc", target=rfc)
+        bcp = BcpFactory(contains=[rfc])
+
+        for params in (
+            dict(name="nodups", activedrafts="on", rfcs="on"),
+            dict(name=bcp.name, rfcs="on"),
+            dict(by="author", author="example.com", activedrafts="on"),
+        ):
+            form = SearchForm(params)
+            names = list(retrieve_search_results(form).values_list("name", flat=True))
+            self.assertEqual(len(names), len(set(names)))
+            self.assertIn(rfc.name if "rfcs" in params else draft.name, names)
+
     def test_search_for_name(self):
         draft = WgDraftFactory(name='draft-ietf-mars-test',group=GroupFactory(acronym='mars',parent=Group.objects.get(acronym='farfut')),authors=[PersonFactory()],ad=PersonFactory())
         draft.set_state(State.objects.get(used=True, type="draft-iesg", slug="pub-req"))
@@ -2369,6 +2393,57 @@ def test_get_draft_notify_emails(self):
             ["somebody@example.com", "nobody@example.com", ad.email_address()]
         )
 
+    @override_settings(TOOLS_SERVER="tools.example.org", DRAFT_ALIAS_DOMAIN="draft.example.org")
+    def test_generator_bulk_lookups(self):
+        """Iterating the generator should match per-draft expansion, with a bounded number of queries"""
+        ad_role = RoleFactory(name_id="ad", group__type_id="area", group__state_id="active")
+        ad = ad_role.person
+        areas = [ad_role.group, Group.objects.get(acronym="farfut")]
+        RoleFactory(group=areas[1], name_id="ad")
+
+        drafts = []
+
+        def make_drafts(count):
+            # each in a group of its own, with a draft that became an RFC
+            for n in range(count):
+                group = GroupFactory(type_id="wg", parent=areas[n % 2])
+                RoleFactory(group=group, name_id="chair")
+                RoleFactory(group=group, name_id="ad")
+                draft = WgDraftFactory(group=group, authors=PersonFactory.create_batch(2), ad=ad,
+                                       shepherd=PersonFactory().email())
+                draft.notify = f"{draft.name}.all@draft.example.org, somebody@example.com"
+                draft.save()
+                published = WgDraftFactory(group=group, authors=[PersonFactory()], ad=ad,
+                                           states=[("draft", "rfc"), ("draft-iesg", "pub")])
+                rfc = WgRfcFactory(group=group)
+                DocEventFactory(doc=rfc, type="published_rfc")
+                published.relateddocument_set.create(relationship_id="became_rfc", target=rfc)
+                drafts.extend([draft, published])
+
+        def run_generator():
+            with CaptureQueriesContext(connection) as queries:
+                output = dict(DraftAliasGenerator())
+            return output, len(queries)
+
+        make_drafts(2)
+        few_output, few_queries = run_generator()
+        make_drafts(6)
+        many_output, many_queries = run_generator()
+        self.assertEqual(few_queries, many_queries)
+
+        # drafts without authors don't need queries of their own either
+        WgDraftFactory.create_batch(2, group=drafts[0].group, ad=ad)
+        self.assertEqual(run_generator()[1], few_queries)
+
+        expected = {}
+        for draft in drafts:
+            expected.update(DraftAliasGenerator()._yield_aliases_for_draft(draft))
+        self.assertTrue(all(f"{draft.name}.chairs" in expected for draft in drafts))
+        self.assertEqual(
+            {k: sorted(v) for k, v in many_output.items() if k.split(".")[0] in expected},
+            {k: sorted(v) for k, v in expected.items()},
+        )
+
 
 class EmailAliasesTests(TestCase):
 
@@ -3173,6 +3248,72 @@ def test_referenced_by_rfcs_as_rfc_or_draft(self):
             draft.targets_related.filter(source__type="rfc") | rfc.targets_related.filter(source__type="rfc"),
         )
 
+class RequestCacheTests(TestCase):
+
+    def test_memoized_accessors(self):
+        draft = WgDraftFactory()
+        rfc = WgRfcFactory()
+        draft.relateddocument_set.create(relationship_id="became_rfc", target=rfc)
+        with request_cache():
+            # separately loaded instances of a document share the memoized results
+            first = Document.objects.get(pk=draft.pk)
+            second = Document.objects.get(pk=draft.pk)
+            with CaptureQueriesContext(connection) as queries:
+                event = first.latest_event(type="new_revision")
+                self.assertEqual(second.latest_event(type="new_revision"), event)
+                self.assertEqual(first.related_that_doc("became_rfc"), [rfc])
+                self.assertEqual(second.related_that_doc("became_rfc"), [rfc])
+                self.assertEqual(first.get_state_slug(), "active")
+                self.assertEqual(second.get_state_slug(), "active")
+            self.assertEqual(len(queries), 3)
+
+            # new events, relations and states are seen by later calls
+            new_event = NewRevisionDocEventFactory(doc=draft, rev="01")
+            self.assertEqual(second.latest_event(type="new_revision"), new_event)
+            draft.relateddocument_set.all().delete()
+            self.assertEqual(second.related_that_doc("became_rfc"), [])
+            draft.set_state(State.objects.get(type="draft", slug="repl"))
+            self.assertEqual(Document.objects.get(pk=draft.pk).get_state_slug(), "repl")
+
+        # nothing is memoized outside a request_cache block
+        with CaptureQueriesContext(connection) as queries:
+            draft.latest_event(type="new_revision")
+            draft.latest_event(type="new_revision")
+        self.assertEqual(len(queries), 2)
+
+    def test_document_view_queries(self):
+        without_request_cache = override_settings(
+            MIDDLEWARE=[m for m in settings.MIDDLEWARE if m != "ietf.middleware.request_cache_middleware"]
+        )
+        ad = Person.objects.get(user__username="ad")
+        draft = WgDraftFactory(ad=ad, states=[("draft", "active"), ("draft-iesg", "iesg-eva")])
+        ballot = create_ballot_if_not_open(None, draft, ad, "approve")
+        BallotPositionDocEventFactory(doc=draft, ballot=ballot, balloter=ad, pos_id="yes")
+        self.client.login(username="ad", password="ad+password")
+        # Whether each view reads the same memoized accessor more than once: the
+        # status page looks up the consensus event twice, the ballot page the ballot
+        # creation event (can_defer and can_clear_ballot). The others must not get
+        # any more expensive.
+        urls = [
+            (urlreverse("ietf.doc.views_doc.document_main", kwargs=dict(name=draft.name)), True),
+            (urlreverse("ietf.doc.views_doc.document_ballot", kwargs=dict(name=draft.name)), True),
+            (urlreverse("ietf.doc.views_doc.document_history", kwargs=dict(name=draft.name)), False),
+            (urlreverse("ietf.doc.views_doc.ballot_popup", kwargs=dict(name=draft.name, ballot_id=ballot.pk)), False),
+        ]
+        for url, saves_queries in urls:
+            r = self.client.get(url)  # warm up caches that outlive the request
+            self.assertEqual(r.status_code, 200)
+            with without_request_cache, CaptureQueriesContext(connection) as uncached:
+                r = self.client.get(url)
+            self.assertEqual(r.status_code, 200)
+            with CaptureQueriesContext(connection) as cached:
+                r = self.client.get(url)
+            self.assertEqual(r.status_code, 200)
+            if saves_queries:
+                self.assertLess(len(cached), len(uncached), url)
+            else:
+                self.assertEqual(len(cached), len(uncached), url)
+
 class StateIndexTests(TestCase):
 
     def test_state_index(self):
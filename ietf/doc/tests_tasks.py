@@ -4,6 +4,7 @@
 import datetime
 import mock
 
+from celery.exceptions import Retry
 from pathlib import Path
 
 from django.conf import settings
@@ -12,7 +13,7 @@
 from ietf.utils.test_utils import TestCase
 from ietf.utils.timezone import datetime_today
 
-from .factories import DocumentFactory, NewRevisionDocEventFactory
+from .factories import DocumentFactory, NewRevisionDocEventFactory, WgDraftFactory
 from .models import Document, NewRevisionDocEvent
 from .tasks import (
     expire_ids_task,
@@ -22,9 +23,34 @@
     generate_idnits2_rfc_status_task,
     investigate_fragment_task,
     notify_expirations_task,
+    prerender_document_artifacts_task,
+    PRERENDER_RETRY_DELAY,
 )
 
 class TaskTests(TestCase):
+    @mock.patch("ietf.doc.tasks.prerender_document_artifacts")
+    def test_prerender_document_artifacts_task(self, mock_prerender):
+        draft = WgDraftFactory()
+        with mock.patch.object(prerender_document_artifacts_task, "retry", side_effect=Retry()) as mock_retry:
+            # retries until the text file is in place
+            with self.assertRaises(Retry):
+                prerender_document_artifacts_task(draft.name, draft.rev)
+            self.assertEqual(mock_retry.call_args, mock.call(countdown=PRERENDER_RETRY_DELAY))
+            self.assertFalse(mock_prerender.called)
+            with mock.patch.object(prerender_document_artifacts_task, "max_retries", 0):
+                prerender_document_artifacts_task(draft.name, draft.rev)  # gives up
+            self.assertFalse(mock_prerender.called)
+
+            (Path(settings.INTERNET_DRAFT_PATH) / f"{draft.name}-{draft.rev}.txt").write_text("text")
+            prerender_document_artifacts_task(draft.name, draft.rev)
+            self.assertEqual(mock_prerender.call_args, mock.call(draft))
+            mock_prerender.reset_mock()
+
+            # a superseded revision is not rendered
+            prerender_document_artifacts_task(draft.name, "99")
+            self.assertFalse(mock_prerender.called)
+            self.assertEqual(mock_retry.call_count, 1)
+
     @mock.patch("ietf.doc.tasks.in_draft_expire_freeze")
     @mock.patch("ietf.doc.tasks.get_expired_drafts")
     @mock.patch("ietf.doc.tasks.expirable_drafts")
@@ -1,25 +1,36 @@
 # Copyright The IETF Trust 2020, All Rights Reserved
 import datetime
 import debug  # pyflakes:ignore
+import os
 
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest.mock import call, patch
 
 from django.conf import settings
-from django.db import IntegrityError
-from django.test.utils import override_settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import IntegrityError, connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils import timezone
 
-from ietf.group.factories import GroupFactory, RoleFactory
+from ietf.group.factories import DatedGroupMilestoneFactory, GroupFactory, RoleFactory
 from ietf.name.models import DocTagName
 from ietf.person.factories import PersonFactory
 from ietf.utils.test_utils import TestCase, name_of_file_containing, reload_db_objects
 from ietf.person.models import Person
-from ietf.doc.factories import DocumentFactory, WgRfcFactory, WgDraftFactory
-from ietf.doc.models import State, DocumentActionHolder, DocumentAuthor
+from ietf.doc.factories import ConflictReviewFactory, DocEventFactory, DocumentFactory, WgRfcFactory, WgDraftFactory
+from ietf.doc.models import Document, State, DocumentActionHolder, DocumentAuthor, StoredObject
+from ietf.doc import storage_queue
+from ietf.doc.storage_queue import dequeue, flush_write_behind_queue, write_behind_queue_stats
+from ietf.doc.storage_utils import exists_in_storage, retrieve_str, store_bytes, store_str
 from ietf.doc.utils import (update_action_holders, add_state_change_event, update_documentauthors,
                             fuzzy_find_documents, rebuild_reference_relations, build_file_urls,
-                            ensure_draft_bibxml_path_exists, update_or_create_draft_bibxml_file)
+                            ensure_draft_bibxml_path_exists, update_or_create_draft_bibxml_file,
+                            prerender_document_artifacts, make_rev_history)
+from ietf.doc.utils_relations import RelationGraph
+from ietf.doc.utils_search import prepare_document_table
+from ietf.review.factories import ReviewAssignmentFactory
 from ietf.utils.draft import Draft, PlaintextDraft
 from ietf.utils.xmldraft import XMLDraft
 
@@ -533,3 +544,181 @@ def test_update_draft_bibxml_file(self, mock):
         self.assertEqual(mock.call_count, 1)
         self.assertEqual(mock.call_args, call(doc, "26"))
         self.assertEqual(ref_path.read_text(), "This\nis\nmy\nbibxml")
+
+
+class PrepareDocumentTableTests(TestCase):
+    def make_rows(self, count):
+        docs = []
+        for _ in range(count):
+            draft = WgDraftFactory()
+            draft.relateddocument_set.create(relationship_id="replaces", target=WgDraftFactory())
+            DatedGroupMilestoneFactory(group=draft.group).docs.add(draft)
+            ReviewAssignmentFactory(review_request__doc=draft, state_id="completed", result_id="ready")
+            docs.extend([draft, WgRfcFactory(), ConflictReviewFactory()])
+        return docs
+
+    def count_queries(self, docs):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        with CaptureQueriesContext(connection) as queries:
+            found, meta = prepare_document_table(
+                request, Document.objects.filter(pk__in=[d.pk for d in docs]), max_results=1000
+            )
+        self.assertEqual(len(found), len(docs))
+        with CaptureQueriesContext(connection) as list_queries:
+            prepare_document_table(request, list(Document.objects.filter(pk__in=[d.pk for d in docs])))
+        return len(queries), len(list_queries)
+
+    def test_query_count_is_constant(self):
+        docs = self.make_rows(1)
+        self.count_queries(docs)  # warm up module-level caches
+        few = self.count_queries(docs)
+        docs.extend(self.make_rows(5))
+        many = self.count_queries(docs)
+        self.assertEqual(few, many)
+
+
+class RelationGraphTests(TestCase):
+    def test_load(self):
+        drafts = WgDraftFactory.create_batch(3)
+        rfcs = WgRfcFactory.create_batch(3)
+        for draft, rfc in zip(drafts, rfcs):
+            draft.relateddocument_set.create(relationship_id="became_rfc", target=rfc)
+        rfcs[2].relateddocument_set.create(relationship_id="obs", target=rfcs[0])
+        old_draft = WgDraftFactory()
+        drafts[0].relateddocument_set.create(relationship_id="replaces", target=old_draft)
+
+        rfcs = list(Document.objects.filter(pk__in=[r.pk for r in rfcs]).order_by("pk"))
+        with self.assertNumQueries(2):
+            graph = RelationGraph.load(rfcs, ["became_rfc", "obs"])
+            graph.attach()
+            for draft, rfc in zip(drafts, rfcs):
+                self.assertEqual(rfc.came_from_draft(), draft)
+                self.assertEqual(rfc.related_that_doc("became_rfc"), [])
+            self.assertEqual(rfcs[0].related_that("obs"), [rfcs[2]])
+            self.assertEqual(rfcs[2].related_that_doc("obs"), [rfcs[0]])
+            self.assertEqual(len(list(graph.pairs("became_rfc"))), 3)
+        # relationships that weren't loaded still come from the database
+        self.assertEqual(graph.docs[drafts[0].pk].related_that_doc("replaces"), [old_draft])
+
+        graph = RelationGraph.load(Document.objects.filter(type_id="draft"), "replaces", fields=["name"])
+        self.assertEqual(graph.related_that(old_draft, "replaces"), [drafts[0]])
+
+    def test_load_connected(self):
+        oldest, old, draft = WgDraftFactory.create_batch(3)
+        rfc = WgRfcFactory()
+        old.relateddocument_set.create(relationship_id="replaces", target=oldest)
+        draft.relateddocument_set.create(relationship_id="replaces", target=old)
+        draft.relateddocument_set.create(relationship_id="became_rfc", target=rfc)
+        WgRfcFactory().relateddocument_set.create(relationship_id="obs", target=rfc)
+
+        graph = RelationGraph.load_connected([rfc], ["replaces", "became_rfc"])
+        self.assertEqual(set(graph.docs), {oldest.pk, old.pk, draft.pk, rfc.pk})
+        graph.attach()
+        with self.assertNumQueries(0):
+            self.assertEqual(rfc.came_from_draft(), draft)
+            self.assertEqual(graph.docs[draft.pk].replaces(), [old])
+            self.assertEqual(graph.docs[old.pk].replaces(), [oldest])
+
+    def test_make_rev_history(self):
+        old = WgDraftFactory(rev="01", create_revisions=range(0, 2))
+        draft = WgDraftFactory(rev="00", create_revisions=range(0, 1))
+        rfc = WgRfcFactory()
+        DocEventFactory(doc=rfc, type="published_rfc")
+        draft.relateddocument_set.create(relationship_id="replaces", target=old)
+        draft.relateddocument_set.create(relationship_id="became_rfc", target=rfc)
+
+        history = make_rev_history(Document.objects.get(pk=rfc.pk))
+        self.assertCountEqual(
+            [(h["name"], h["rev"]) for h in history],
+            [(old.name, "00"), (old.name, "01"), (draft.name, "00"), (rfc.name, rfc.name)],
+        )
+        self.assertCountEqual(make_rev_history(Document.objects.get(pk=old.pk)), history)
+
+
+class WriteBehindQueueTests(TestCase):
+    def test_write_behind(self):
+        name = "write-behind-test.txt"
+        with TemporaryDirectory() as queue_dir, override_settings(
+            BLOBSTORAGE_WRITE_BEHIND=True, BLOBSTORAGE_WRITE_BEHIND_DIR=queue_dir
+        ):
+            store_str("staging", name, "first")
+            store_str("staging", name, "second", allow_overwrite=True)
+            store_str("staging", name, "third")  # not allowed to overwrite
+            self.assertEqual(write_behind_queue_stats()["depth"], 1)
+            # queued blobs can be read before they are uploaded
+            self.assertTrue(exists_in_storage("staging", name))
+            self.assertEqual(retrieve_str("staging", name), "second")
+            self.assertFalse(StoredObject.objects.filter(store="staging", name=name).exists())
+
+            stats = flush_write_behind_queue()
+            self.assertEqual(stats["depth"], 1)
+            self.assertEqual(stats["uploaded"], 1)
+            self.assertEqual(stats["failed"], 0)
+            self.assertEqual(write_behind_queue_stats(), {"depth": 0, "lag": 0.0})
+            self.assertEqual(list(Path(queue_dir).glob("*/*")), [])
+
+        self.assertEqual(retrieve_str("staging", name), "second")
+        record = StoredObject.objects.get(store="staging", name=name)
+        self.assertEqual(record.len, len("second"))
+        self.assertIsNone(record.deleted)
+
+    def test_removed_during_upload(self):
+        name = "write-behind-removed.txt"
+        upload = storage_queue._upload
+
+        def upload_then_dequeue(entry):
+            metadata = upload(entry)
+            dequeue(entry["kind"], entry["name"])  # as remove_from_storage() does
+            return metadata
+
+        with TemporaryDirectory() as queue_dir, override_settings(
+            BLOBSTORAGE_WRITE_BEHIND=True, BLOBSTORAGE_WRITE_BEHIND_DIR=queue_dir
+        ):
+            store_str("staging", name, "content")
+            with patch("ietf.doc.storage_queue._upload", side_effect=upload_then_dequeue):
+                stats = flush_write_behind_queue()
+            self.assertEqual(stats["uploaded"], 0)
+            self.assertEqual(stats["removed"], 1)
+            self.assertFalse(exists_in_storage("staging", name))
+            self.assertFalse(StoredObject.objects.filter(store="staging", name=name, deleted__isnull=True).exists())
+            self.assertEqual(list(Path(queue_dir).glob("*/*")), [])
+
+            # removal markers that no flush picked up are eventually dropped
+            store_str("staging", name, "content")
+            dequeue("staging", name)
+            marker, = Path(queue_dir).glob("*/*.removed")
+            flush_write_behind_queue()
+            self.assertTrue(marker.exists())
+            old = (timezone.now() - 2 * storage_queue.REMOVAL_MARKER_MAX_AGE).timestamp()
+            os.utime(marker, (old, old))
+            flush_write_behind_queue()
+            self.assertFalse(marker.exists())
+
+
+class PrerenderedArtifactsTests(TestCase):
+    def test_pdfized_serves_stored_artifact(self):
+        draft = WgDraftFactory()
+        with patch.object(Document, "render_pdfized", return_value=b"%PDF rendered") as mock_render:
+            self.assertEqual(draft.pdfized(), b"%PDF rendered")  # nothing stored yet
+            prerender_document_artifacts(draft)
+            self.assertEqual(mock_render.call_count, 2)
+            self.assertTrue(
+                StoredObject.objects.filter(store="pdfized", name=draft.stored_artifact_name("pdfized")).exists()
+            )
+            mock_render.return_value = b"%PDF changed"
+            self.assertEqual(draft.pdfized(), b"%PDF rendered")  # served from the blob store
+            self.assertEqual(mock_render.call_count, 2)
+
+    def test_stale_renderer_version(self):
+        draft = WgDraftFactory()
+        stale_name = f"{draft.name}-{draft.rev}.0-0.pdf"
+        self.assertNotEqual(stale_name, draft.stored_artifact_name("pdfized"))
+        store_bytes("pdfized", stale_name, b"%PDF stale")
+        self.assertEqual(draft.stored_artifacts("pdfized"), {stale_name})
+        self.assertIsNone(draft.stored_artifact("pdfized"))  # not served
+
+        with patch.object(Document, "render_pdfized", return_value=b"%PDF rendered"):
+            prerender_document_artifacts(draft)
+        self.assertEqual(draft.stored_artifacts("pdfized"), {draft.stored_artifact_name("pdfized")})
+        self.assertEqual(draft.stored_artifact("pdfized"), b"%PDF rendered")
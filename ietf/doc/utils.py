@@ -19,7 +19,7 @@
 from django.conf import settings
 from django.contrib import messages
 from django.core.cache import caches
-from django.db.models import OuterRef
+from django.db.models import OuterRef, Q
 from django.forms import ValidationError
 from django.http import Http404
 from django.template.loader import render_to_string
@@ -37,6 +37,8 @@
 from ietf.doc.models import RelatedDocument, RelatedDocHistory, BallotType, DocReminder
 from ietf.doc.models import DocEvent, ConsensusDocEvent, BallotDocEvent, IRSGBallotDocEvent, NewRevisionDocEvent, StateDocEvent
 from ietf.doc.models import TelechatDocEvent, DocumentActionHolder, EditedAuthorsDocEvent
+from ietf.doc.storage_utils import remove_from_storage, store_bytes, store_str
+from ietf.doc.utils_relations import RelationGraph
 from ietf.name.models import DocReminderTypeName, DocRelationshipName
 from ietf.group.models import Role, Group, GroupFeatures
 from ietf.ietfauth.utils import has_role, is_authorized_in_doc_stream, is_individual_draft_author, is_bofreq_editor
@@ -977,6 +979,11 @@ def extract_complete_replaces_ancestor_mapping_for_docs(names):
 def make_rev_history(doc):
     # return document history data for inclusion in doc.json (used by timeline)
 
+    # the replaces/became_rfc chains around doc, loaded with a query per link
+    # rather than a few per document
+    if isinstance(doc, Document):
+        RelationGraph.load_connected([doc], ["replaces", "became_rfc"]).attach()
+
     def get_predecessors(doc, predecessors=None):
         if predecessors is None:
             predecessors = set()
@@ -1013,10 +1020,23 @@ def get_replaces_tree(doc):
     docs = get_replaces_tree(doc)
     if docs is not None:
         docs.add(doc)
+
+        # events and page counts for all the documents at once
+        doc_pks = [d.pk for d in docs]
+        published = {}
+        for e in DocEvent.objects.filter(doc__in=doc_pks, type="published_rfc").order_by("time", "id"):
+            published[e.doc_id] = e
+        revisions = defaultdict(list)
+        for e in NewRevisionDocEvent.objects.filter(doc__in=doc_pks, type="new_revision").order_by("id"):
+            revisions[e.doc_id].append(e)
+        pages = {}
+        for doc_id, rev, p in DocHistory.objects.filter(doc__in=doc_pks).order_by("-id").values_list("doc_id", "rev", "pages"):
+            pages[(doc_id, rev)] = p    # ends up with the first one, as history_set.first() would
+
         for d in docs:
             if d.type_id == "rfc":
                 url = urlreverse("ietf.doc.views_doc.document_main", kwargs=dict(name=d))
-                e = d.docevent_set.filter(type="published_rfc").order_by("-time").first()
+                e = published.get(d.pk)
                 history[url] = {
                     "name": d.name,
                     "rev": d.name,
@@ -1024,17 +1044,16 @@ def get_replaces_tree(doc):
                     "url": url,
                 }
             else:
-                for e in d.docevent_set.filter(type='new_revision').distinct():
-                    if hasattr(e, 'newrevisiondocevent'):
-                        url = urlreverse("ietf.doc.views_doc.document_main", kwargs=dict(name=d)) + e.newrevisiondocevent.rev + "/"
-                        history[url] = {
-                            'name': d.name,
-                            'rev': e.newrevisiondocevent.rev,
-                            'published': e.time.isoformat(),
-                            'url': url,
-                        }
-                        if d.history_set.filter(rev=e.newrevisiondocevent.rev).exists():
-                            history[url]['pages'] = d.history_set.filter(rev=e.newrevisiondocevent.rev).first().pages
+                for e in revisions[d.pk]:
+                    url = urlreverse("ietf.doc.views_doc.document_main", kwargs=dict(name=d)) + e.rev + "/"
+                    history[url] = {
+                        'name': d.name,
+                        'rev': e.rev,
+                        'published': e.time.isoformat(),
+                        'url': url,
+                    }
+                    if (d.pk, e.rev) in pages:
+                        history[url]['pages'] = pages[(d.pk, e.rev)]
 
     if doc.type_id == "draft":
         # Do nothing - all draft revisions are captured above already.
@@ -1296,6 +1315,79 @@ def __init__(self, draft_queryset=None):
             self.draft_queryset = draft_queryset.filter(type_id="draft")  # only drafts allowed
         else:
             self.draft_queryset = Document.objects.filter(type_id="draft")
+        # Lookups shared between drafts are memoized for the lifetime of the
+        # generator, and author and group role emails are loaded in bulk by __iter__()
+        self._group_ad_emails = {}
+        self._group_chair_emails = {}
+        self._person_email_address = {}
+        self._author_emails = None
+        self._alias_address_regex = re.compile(
+            r"^(?P<name>.+?)(?P<suffix>\.ad|\.all|\.notify|\.shepherd)?@(%s|%s)$" % (
+                settings.DRAFT_ALIAS_DOMAIN, settings.TOOLS_SERVER
+            )
+        )
+
+    def _get_person_email_address(self, person):
+        if person.pk not in self._person_email_address:
+            self._person_email_address[person.pk] = person.email_address()
+        return self._person_email_address[person.pk]
+
+    def _load_author_emails(self, draft_pks):
+        """Look up the author email addresses for a queryset of draft pks in one query
+
+        Every draft gets an entry, so drafts without author email addresses are not
+        looked up again one by one.
+        """
+        self._author_emails = {pk: set() for pk in draft_pks}
+        for author in DocumentAuthor.objects.filter(
+            document__in=draft_pks, email__isnull=False
+        ).select_related("email__person"):
+            emails = self._author_emails.setdefault(author.document_id, set())
+            if author.email.active:
+                emails.add(author.email.address)
+            elif author.email.person:
+                person_email = self._get_person_email_address(author.email.person)
+                if person_email:
+                    emails.add(person_email)
+
+    def _email_address(self, email):
+        """Like Email.email_address(), with the person's address memoized"""
+        if email.active:
+            return email.address
+        return self._get_person_email_address(email.person) if email.person else None
+
+    def _load_group_emails(self, group_pks):
+        """Work out the AD and chair email addresses for a queryset of group pks
+
+        Does what get_group_ad_emails() and get_group_role_emails() do for each
+        group, with one query for the groups and one for the roles of the groups
+        and their parents.
+        """
+        groups = list(Group.objects.filter(pk__in=group_pks).select_related("parent"))
+        role_emails = defaultdict(list)  # (group pk, role name) -> [Email, ...]
+        for role in Role.objects.filter(
+            Q(group__in=groups) | Q(group__in=[g.parent_id for g in groups if g.parent_id]),
+            name__in=["pre-ad", "ad", "chair", "secr"],
+        ).select_related("email__person").order_by("pk"):
+            role_emails[(role.group_id, role.name_id)].append(role.email)
+
+        def role_addresses(group, roles):
+            if not group or not group.acronym or group.acronym == "none":
+                return set()
+            addresses = (self._email_address(e) for r in roles for e in role_emails[(group.pk, r)])
+            return set(a for a in addresses if a)
+
+        for group in groups:
+            self._group_chair_emails[group.pk] = role_addresses(group, ["chair", "secr"])
+            if not group.acronym or group.acronym == "none":
+                self._group_ad_emails[group.pk] = set()
+                continue
+            area = group if group.type_id == "area" else group.parent
+            emails = role_addresses(area, ["pre-ad", "ad", "chair"])
+            # Make sure the assigned AD is included (in case that is not one of the area ADs)
+            if group.state_id == "active" and role_emails[(group.pk, "ad")]:
+                emails.add(role_emails[(group.pk, "ad")][0].address)
+            self._group_ad_emails[group.pk] = emails
 
     def get_draft_ad_emails(self, doc):
         """Get AD email addresses for the given draft, if any."""
@@ -1303,10 +1395,12 @@ def get_draft_ad_emails(self, doc):
         ad_emails = set()
         # If working group document, return current WG ADs
         if doc.group and doc.group.acronym != "none":
-            ad_emails.update(get_group_ad_emails(doc.group))
+            if doc.group_id not in self._group_ad_emails:
+                self._group_ad_emails[doc.group_id] = get_group_ad_emails(doc.group)
+            ad_emails.update(self._group_ad_emails[doc.group_id])
         # Document may have an explicit AD set
         if doc.ad:
-            ad_emails.add(doc.ad.email_address())
+            ad_emails.add(self._get_person_email_address(doc.ad))
         return ad_emails
 
     def get_draft_chair_emails(self, doc):
@@ -1314,7 +1408,9 @@ def get_draft_chair_emails(self, doc):
         from ietf.group.utils import get_group_role_emails  # avoid circular import
         chair_emails = set()
         if doc.group:
-            chair_emails.update(get_group_role_emails(doc.group, ["chair", "secr"]))
+            if doc.group_id not in self._group_chair_emails:
+                self._group_chair_emails[doc.group_id] = get_group_role_emails(doc.group, ["chair", "secr"])
+            chair_emails.update(self._group_chair_emails[doc.group_id])
         return chair_emails
 
     def get_draft_shepherd_email(self, doc):
@@ -1326,6 +1422,8 @@ def get_draft_shepherd_email(self, doc):
 
     def get_draft_authors_emails(self, doc):
         """Get list of authors for the given draft."""
+        if self._author_emails is not None and doc.pk in self._author_emails:
+            return set(self._author_emails[doc.pk])
         author_emails = set()
         for email in Email.objects.filter(documentauthor__document=doc):
             if email.active:
@@ -1338,29 +1436,20 @@ def get_draft_authors_emails(self, doc):
 
     def get_draft_notify_emails(self, doc):
         """Get list of email addresses to notify for the given draft."""
-        ad_email_alias_regex = r"^%s.ad@(%s|%s)$" % (doc.name, settings.DRAFT_ALIAS_DOMAIN, settings.TOOLS_SERVER)
-        all_email_alias_regex = r"^%s.all@(%s|%s)$" % (doc.name, settings.DRAFT_ALIAS_DOMAIN, settings.TOOLS_SERVER)
-        author_email_alias_regex = r"^%s@(%s|%s)$" % (doc.name, settings.DRAFT_ALIAS_DOMAIN, settings.TOOLS_SERVER)
-        notify_email_alias_regex = r"^%s.notify@(%s|%s)$" % (
-        doc.name, settings.DRAFT_ALIAS_DOMAIN, settings.TOOLS_SERVER)
-        shepherd_email_alias_regex = r"^%s.shepherd@(%s|%s)$" % (
-        doc.name, settings.DRAFT_ALIAS_DOMAIN, settings.TOOLS_SERVER)
         notify_emails = set()
         if doc.notify:
             for e in doc.notify.split(','):
                 e = e.strip()
-                if re.search(ad_email_alias_regex, e):
-                    notify_emails.update(self.get_draft_ad_emails(doc))
-                elif re.search(author_email_alias_regex, e):
-                    notify_emails.update(self.get_draft_authors_emails(doc))
-                elif re.search(shepherd_email_alias_regex, e):
-                    notify_emails.update(self.get_draft_shepherd_email(doc))
-                elif re.search(all_email_alias_regex, e):
-                    notify_emails.update(self.get_draft_ad_emails(doc))
-                    notify_emails.update(self.get_draft_authors_emails(doc))
-                    notify_emails.update(self.get_draft_shepherd_email(doc))
-                elif re.search(notify_email_alias_regex, e):
-                    pass
+                match = self._alias_address_regex.search(e)
+                if match and match["name"] == doc.name:
+                    # one of this draft's own aliases; .notify expands to nothing
+                    suffix = match["suffix"]
+                    if suffix in (".ad", ".all"):
+                        notify_emails.update(self.get_draft_ad_emails(doc))
+                    if suffix in (None, ".all"):
+                        notify_emails.update(self.get_draft_authors_emails(doc))
+                    if suffix in (".shepherd", ".all"):
+                        notify_emails.update(self.get_draft_shepherd_email(doc))
                 else:
                     (name, email) = parseaddr(e)
                     notify_emails.add(email)
@@ -1414,6 +1503,10 @@ def __iter__(self) -> Iterator[tuple[str, list[str]]]:
         # states__type_id, states__slug directly in the `filter()`
         # works, but it does not work as expected in `exclude()`.
         active_state = State.objects.get(type_id="draft", slug="active")
+        drafts = drafts.select_related("group", "ad", "shepherd__person")
+        listed_drafts = drafts.filter(Q(states=active_state) | Q(expires__gte=show_since))
+        self._load_author_emails(listed_drafts.values_list("pk", flat=True))
+        self._load_group_emails(listed_drafts.values_list("group", flat=True))
         active_pks = []  # build a static list of the drafts we actually returned as "active"
         active_drafts = drafts.filter(states=active_state)
         for this_draft in active_drafts:
@@ -1421,8 +1514,8 @@ def __iter__(self) -> Iterator[tuple[str, list[str]]]:
             for alias, addresses in self._yield_aliases_for_draft(this_draft):
                 yield alias, addresses
 
-        # Annotate with the draft state slug so we can check for drafts that
-        # have become RFCs
+        # Annotate with the draft state slug and the publication time of the RFC
+        # they became, so we can check for drafts that have become RFCs
         inactive_recent_drafts = (
             drafts.exclude(pk__in=active_pks)  # don't re-filter by state, states may have changed during the run!
             .filter(expires__gte=show_since)
@@ -1433,14 +1526,18 @@ def __iter__(self) -> Iterator[tuple[str, list[str]]]:
                     document__pk=OuterRef("pk"),
                     state__type_id="draft"
                 ).values("state__slug"),
+                rfc_published_time=DocEvent.objects.filter(
+                    doc__targets_related__source=OuterRef("pk"),
+                    doc__targets_related__relationship_id="became_rfc",
+                    type="published_rfc",
+                ).order_by("-time", "-id").values("time")[:1],
             )
         )
         for this_draft in inactive_recent_drafts:
             # Omit drafts that became RFCs, unless they were published in the last DEFAULT_YEARS
             if this_draft.draft_state_slug == "rfc":
-                rfc = this_draft.became_rfc()
-                log.assertion("rfc is not None")
-                if rfc.latest_event(type='published_rfc').time < show_since:
+                log.assertion("this_draft.rfc_published_time is not None")
+                if this_draft.rfc_published_time is not None and this_draft.rfc_published_time < show_since:
                     continue
             for alias, addresses in self._yield_aliases_for_draft(this_draft):
                 yield alias, addresses
@@ -1515,3 +1612,23 @@ def update_or_create_draft_bibxml_file(doc, rev):
 
 def ensure_draft_bibxml_path_exists():
     (Path(settings.BIBXML_BASE_PATH) / "bibxml-ids").mkdir(exist_ok=True)
+
+
+def prerender_document_artifacts(doc):
+    """Render the htmlized and pdfized forms of a draft revision or RFC into the blob store
+
+    Document.htmlized() and Document.pdfized() serve the stored forms, and only render
+    on demand when they are missing. The blob names include the renderer version; forms
+    rendered by other versions are removed.
+    """
+    name = doc.get_base_name()
+    if name.endswith(".txt"):
+        text = doc.text()
+        if text:
+            store_str("htmlized", doc.stored_artifact_name("htmlized"), doc.render_htmlized(text), allow_overwrite=True)
+    pdf = doc.render_pdfized()
+    if pdf:
+        store_bytes("pdfized", doc.stored_artifact_name("pdfized"), pdf, allow_overwrite=True)
+    for kind in ["htmlized", "pdfized"]:
+        for stale in doc.stored_artifacts(kind) - {doc.stored_artifact_name(kind)}:
+            remove_from_storage(kind, stale)
@@ -0,0 +1,143 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+"""Bulk loading of the relations between documents
+
+DocumentInfo.related_that(), related_that_doc(), became_rfc() and friends each
+query the database, which adds up when they are called for many documents.
+RelationGraph loads the relations of a whole set of documents up front and
+answers the same questions from memory:
+
+    graph = RelationGraph.load(rfcs, ["became_rfc", "obs"])
+    graph.related_that(rfc, "became_rfc")    # the draft the RFC came from
+
+After graph.attach(), the documents' own methods answer from the graph too, for
+the relationships that were loaded.
+"""
+from collections import defaultdict
+from typing import Iterable, Optional, Union
+
+from django.db.models import Q, QuerySet
+
+from ietf.doc.models import Document, RelatedDocument
+
+
+def _relationship_tuple(relationship: Union[str, Iterable[str]]) -> tuple:
+    return (relationship, ) if isinstance(relationship, str) else tuple(relationship)
+
+
+class RelationGraph:
+    """Adjacency map of RelatedDocument relations, with the documents involved"""
+
+    def __init__(self, relationships: Iterable[str]):
+        self.relationships = frozenset(relationships)
+        self.docs = {}                  # pk -> Document
+        self.complete = set()           # pks of the documents all of whose relations are loaded
+        self._targets = defaultdict(list)   # (source pk, relationship) -> [target pk]
+        self._sources = defaultdict(list)   # (target pk, relationship) -> [source pk]
+
+    @classmethod
+    def load(
+        cls,
+        docs: Union[QuerySet, Iterable[Document]],
+        relationships: Union[str, Iterable[str]],
+        fields: Optional[Iterable[str]] = None,
+    ) -> "RelationGraph":
+        """Load the relations of the given kinds in which any of docs takes part
+
+        docs may be Document instances, which are reused, or a Document queryset,
+        which is used as a subquery. Takes one query for the relations and one
+        for the related documents not passed in. If fields is given, only those
+        Document fields are loaded for the related documents.
+        """
+        graph = cls(_relationship_tuple(relationships))
+        if isinstance(docs, QuerySet):
+            doc_filter = docs.values("pk")
+        else:
+            graph.docs.update((d.pk, d) for d in docs if d.pk is not None)
+            graph.complete = set(graph.docs)
+            doc_filter = list(graph.docs)
+        edges = RelatedDocument.objects.filter(
+            Q(source__in=doc_filter) | Q(target__in=doc_filter),
+            relationship__in=graph.relationships,
+        ).values_list("source_id", "relationship_id", "target_id")
+        graph._add_edges(edges, fields)
+        return graph
+
+    @classmethod
+    def load_connected(
+        cls,
+        docs: Iterable[Document],
+        relationships: Union[str, Iterable[str]],
+        fields: Optional[Iterable[str]] = None,
+    ) -> "RelationGraph":
+        """Load every document reachable from docs through relations of the given kinds
+
+        Relations are followed in both directions. Takes one query per step away
+        from docs, plus one for the documents, which suits the short chains formed
+        by relationships like replaces and became_rfc.
+        """
+        graph = cls(_relationship_tuple(relationships))
+        graph.docs.update((d.pk, d) for d in docs if d.pk is not None)
+        seen = set(graph.docs)
+        frontier = set(seen)
+        edges = set()
+        while frontier:
+            new_edges = set(RelatedDocument.objects.filter(
+                Q(source__in=frontier) | Q(target__in=frontier),
+                relationship__in=graph.relationships,
+            ).values_list("source_id", "relationship_id", "target_id")) - edges
+            edges |= new_edges
+            frontier = set(pk for source, _, target in new_edges for pk in (source, target)) - seen
+            seen |= frontier
+        graph.complete = seen
+        graph._add_edges(edges, fields)
+        return graph
+
+    def _add_edges(self, edges, fields):
+        missing = set()
+        for source, relationship, target in edges:
+            self._targets[(source, relationship)].append(target)
+            self._sources[(target, relationship)].append(source)
+            missing.update((source, target))
+        missing -= set(self.docs)
+        if missing:
+            qs = Document.objects.filter(pk__in=missing)
+            if fields is not None:
+                qs = qs.only(*fields)
+            self.docs.update((d.pk, d) for d in qs)
+
+    def covers(self, relationship: Union[str, Iterable[str]]) -> bool:
+        """Whether all the given relationships were loaded"""
+        return self.relationships.issuperset(_relationship_tuple(relationship))
+
+    def _related(self, index, doc, relationship):
+        pks = set()
+        for rel in _relationship_tuple(relationship):
+            pks.update(index.get((doc.pk, rel), []))
+        return [self.docs[pk] for pk in pks]
+
+    def related_that_doc(self, doc: Document, relationship) -> list:
+        """The documents doc has the given relationship(s) to, like doc.related_that_doc()"""
+        return self._related(self._targets, doc, relationship)
+
+    def related_that(self, doc: Document, relationship) -> list:
+        """The documents that have the given relationship(s) to doc, like doc.related_that()"""
+        return self._related(self._sources, doc, relationship)
+
+    def pairs(self, relationship: str):
+        """(source, target) documents of all the loaded relations of a kind"""
+        for (source, rel), targets in self._targets.items():
+            if rel == relationship:
+                for target in targets:
+                    yield self.docs[source], self.docs[target]
+
+    def attach(self):
+        """Make documents answer relation lookups for the loaded relationships from the graph
+
+        Only documents whose relations are all loaded get the graph: those passed
+        to load() as instances, or all of them after load_connected().
+        """
+        for doc in (self.docs[pk] for pk in self.complete):
+            doc._relation_graph = self
+            if "became_rfc" in self.relationships:
+                doc._cached_became_rfc = next(iter(self.related_that_doc(doc, "became_rfc")), None)
+                doc._cached_came_from_draft = next(iter(self.related_that(doc, "became_rfc")), None)
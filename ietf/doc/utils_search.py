@@ -1,17 +1,20 @@
 # Copyright The IETF Trust 2016-2020, All Rights Reserved
 # -*- coding: utf-8 -*-
 
-import re
 import datetime
 import debug                            # pyflakes:ignore
 
+from collections import defaultdict
 from zoneinfo import ZoneInfo
 
 from django.conf import settings
+from django.db.models import prefetch_related_objects
 
 from ietf.doc.models import Document, RelatedDocument, DocEvent, TelechatDocEvent, BallotDocEvent, DocTypeName
+from ietf.doc.utils_relations import RelationGraph
 from ietf.doc.expire import expirable_drafts
 from ietf.doc.utils import augment_docs_and_person_with_person_info
+from ietf.group.models import GroupMilestone
 from ietf.meeting.models import SessionPresentation, Meeting, Session
 from ietf.review.utils import review_assignments_to_list_for_docs
 from ietf.utils.timezone import date_today
@@ -88,6 +91,24 @@ def fill_in_document_table_attributes(docs, have_telechat_date=False):
     # get meetings
     fill_in_document_sessions(docs, doc_dict, doc_ids)
 
+    # states, milestones, reviews and replaces, fetched in bulk rather
+    # than per document. prefetch_related_objects() skips documents for
+    # which a lookup was already prefetched by the caller.
+    prefetch_related_objects(docs, "type", "states__type")
+
+    draft_ids = [d.pk for d in docs if d.type_id == "draft" and d.get_state_slug() != "rfc"]
+    milestones = defaultdict(list)
+    for rel in GroupMilestone.docs.through.objects.filter(
+        document__in=draft_ids, groupmilestone__state_id="active",
+    ).select_related("groupmilestone__group"):
+        milestones[rel.document_id].append(rel.groupmilestone)
+    review_assignments = review_assignments_to_list_for_docs([doc_dict[pk] for pk in draft_ids])
+
+    # relations for replaces and obsoleted/updated by, in one go
+    relations = RelationGraph.load(docs, ["replaces", "obs", "updates"])
+    for d in docs:
+        d.replaces = wrap_value(relations.related_that_doc(d, "replaces"))
+
     # misc
     expirable_pks = expirable_drafts(Document.objects.filter(pk__in=doc_ids)).values_list('pk', flat=True)
     for d in docs:
@@ -118,8 +139,8 @@ def fill_in_document_table_attributes(docs, have_telechat_date=False):
             d.expirable = False
 
         if d.type_id == "draft" and d.get_state_slug() != "rfc":
-            d.milestones = [ m for (t, s, v, m) in sorted(((m.time, m.state.slug, m.desc, m) for m in d.groupmilestone_set.all() if m.state_id == "active")) ]
-            d.review_assignments = review_assignments_to_list_for_docs([d]).get(d.name, [])
+            d.milestones = sorted(milestones[d.pk], key=lambda m: (m.time, m.desc))
+            d.review_assignments = review_assignments.get(d.name, [])
 
         e = d.latest_event_cache.get('started_iesg_process', None)
         d.balloting_started = e.time if e else datetime.datetime.min
@@ -133,52 +154,28 @@ def fill_in_document_table_attributes(docs, have_telechat_date=False):
         d.has_errata = d.name in erratas
         d.has_verified_errata = d.name in verified_erratas
 
-    # obsoleted/updated by
+    # obsoleted/updated by, in RFC number order
     for rfc in rfcs:
         d = doc_dict[rfc]
-        d.obsoleted_by_list = []
-        d.updated_by_list = []
-
-    # Revisit this block after RFCs become first-class Document objects
-    xed_by = list(
-        RelatedDocument.objects.filter(
-            target__name__in=list(rfcs.values()),
-            relationship__in=("obs", "updates"),
-        ).select_related("target")
-    )
-    # TODO - this likely reduces to something even simpler
-    rel_rfcs = {
-        d.id: re.sub(r"rfc(\d+)", r"RFC \1", d.name, flags=re.IGNORECASE)
-        for d in Document.objects.filter(
-            type_id="rfc", id__in=[rel.source_id for rel in xed_by]
-        )
-    }
-    xed_by.sort(
-        key=lambda rel: int(
-            re.sub(
-                r"rfc\s*(\d+)",
-                r"\1",
-                rel_rfcs[rel.source_id],
-                flags=re.IGNORECASE,
-            )
-        )
-    )
-    for rel in xed_by:
-        d = doc_dict[rel.target.id]
-        if rel.relationship_id == "obs":
-            d.obsoleted_by_list.append(rel.source)
-        elif rel.relationship_id == "updates":
-            d.updated_by_list.append(rel.source)
+        d.obsoleted_by_list = sorted(relations.related_that(d, "obs"), key=lambda s: s.rfc_number or 0)
+        d.updated_by_list = sorted(relations.related_that(d, "updates"), key=lambda s: s.rfc_number or 0)
 
 def augment_docs_with_related_docs_info(docs):
     """Augment all documents with related documents information.
     At first, it handles only conflict review document page count to mirror the original document page count."""
 
+    conflrev_targets = defaultdict(set)
+    for r in RelatedDocument.objects.filter(
+        source__in=[d.pk for d in docs if d.type_id == 'conflrev'],
+        relationship_id='conflrev',
+    ).select_related('target'):
+        conflrev_targets[r.source_id].add(r.target)
+
     for d in docs:
         if d.type_id == 'conflrev':
-            if len(d.related_that_doc('conflrev')) != 1:
+            if len(conflrev_targets[d.pk]) != 1:
                 continue
-            originalDoc = d.related_that_doc('conflrev')[0]
+            originalDoc = list(conflrev_targets[d.pk])[0]
             d.pages = originalDoc.pages
 
 def prepare_document_table(request, docs, query=None, max_results=200, show_ad_and_shepherd=True):
@@ -190,13 +187,15 @@ def prepare_document_table(request, docs, query=None, max_results=200, show_ad_a
     if not isinstance(docs, list):
         # evaluate and fill in attribute results immediately to decrease
         # the number of queries
-        docs = docs.select_related("ad", "std_level", "intended_std_level", "group", "stream", "shepherd", )
-        docs = docs.prefetch_related("states__type", "tags", "groupmilestone_set__group", "reviewrequest_set__team",
+        docs = docs.select_related("type", "ad", "std_level", "intended_std_level", "group", "stream", "shepherd", )
+        docs = docs.prefetch_related("states__type", "tags", "reviewrequest_set__team",
                                      "ad__email_set", "iprdocrel_set")
         docs = docs[:max_results] # <- that is still a queryset, but with a LIMIT now
         docs = list(docs)
     else:
         docs = docs[:max_results]
+        prefetch_related_objects(docs, "type", "ad", "std_level", "intended_std_level", "group", "stream", "shepherd",
+                                 "states__type", "tags", "reviewrequest_set__team", "ad__email_set", "iprdocrel_set")
 
     fill_in_document_table_attributes(docs)
     if request.user.is_authenticated and hasattr(request.user, "person"):
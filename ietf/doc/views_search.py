@@ -58,7 +58,7 @@
 
 import debug                            # pyflakes:ignore
 
-from ietf.doc.models import ( Document, DocHistory, State,
+from ietf.doc.models import ( Document, DocHistory, DocumentAuthor, RelatedDocument, State,
     LastCallDocEvent, NewRevisionDocEvent, IESG_SUBSTATE_TAGS,
     IESG_BALLOT_ACTIVE_STATES, IESG_STATCHG_CONFLREV_ACTIVE_STATES,
     IESG_CHARTER_ACTIVE_STATES )
@@ -73,6 +73,7 @@
 from ietf.utils.fields import ModelMultipleChoiceField
 from ietf.utils.log import log
 from ietf.doc.utils_search import prepare_document_table, doc_type, doc_state, doc_type_name, AD_WORKLOAD
+from ietf.doc.utils_relations import RelationGraph
 from ietf.ietfauth.utils import has_role
 
 
@@ -177,49 +178,37 @@ def retrieve_search_results(form, all_types=False):
     # name
     if query["name"]:
         look_for = query["name"]
-        queries = [
-            Q(name__icontains=look_for),
-            Q(title__icontains=look_for)
-        ]
-        # Check to see if this is just a search for an rfc look for a few variants
-        if look_for.lower()[:3] == "rfc" and look_for[3:].strip().isdigit():
-            spaceless = look_for.lower()[:3]+look_for[3:].strip()
-            if spaceless != look_for:
-                queries.extend([
-                    Q(name__icontains=spaceless),
-                    Q(title__icontains=spaceless)            
-                ])
-            singlespace = look_for.lower()[:3]+" "+look_for[3:].strip()
-            if singlespace != look_for:
-                queries.extend([
-                    Q(name__icontains=singlespace),
-                    Q(title__icontains=singlespace)            
-                ])        
-
-        # Do a similar thing if the search is just for a subseries doc, like a bcp.
-        if look_for.lower()[:3] in ["bcp", "fyi", "std"] and look_for[3:].strip().isdigit() and query["rfcs"]: # Also look for rfcs contained in the subseries.
-            queries.extend([
-                Q(targets_related__source__name__icontains=look_for, targets_related__relationship_id="contains"),
-                Q(targets_related__source__title__icontains=look_for, targets_related__relationship_id="contains"),
+        prefix = look_for.lower()[:3]
+        number = look_for[3:].strip()
+        variants = [look_for]
+        # Check to see if this is just a search for an rfc or a subseries doc
+        # like a bcp, and look for a few variants
+        if prefix in ["rfc", "bcp", "fyi", "std"] and number.isdigit():
+            for variant in (prefix + number, prefix + " " + number):
+                if variant not in variants:
+                    variants.append(variant)
+
+        def name_or_title_matches(variants, path=""):
+            return reduce(operator.or_, [
+                Q(**{path + "name__icontains": v}) | Q(**{path + "title__icontains": v})
+                for v in variants
             ])
-            spaceless = look_for.lower()[:3]+look_for[3:].strip()
-            if spaceless != look_for:
-                queries.extend([
-                    Q(targets_related__source__name__icontains=spaceless, targets_related__relationship_id="contains"),
-                    Q(targets_related__source__title__icontains=spaceless, targets_related__relationship_id="contains"),
-                ])
-            singlespace = look_for.lower()[:3]+" "+look_for[3:].strip()
-            if singlespace != look_for:
-                queries.extend([
-                    Q(targets_related__source__name__icontains=singlespace, targets_related__relationship_id="contains"),
-                    Q(targets_related__source__title__icontains=singlespace, targets_related__relationship_id="contains"),
-                ])
 
+        # Matches through relationships are resolved as subqueries on
+        # RelatedDocument rather than as joins from Document, so that the
+        # outer query neither fans out nor needs a DISTINCT.
+        combined_query = name_or_title_matches(variants if prefix == "rfc" else [look_for])
+        if prefix in ["bcp", "fyi", "std"] and number.isdigit() and query["rfcs"]:
+            # Also look for rfcs contained in the subseries.
+            combined_query |= Q(pk__in=RelatedDocument.objects.filter(
+                name_or_title_matches(variants, "source__"), relationship_id="contains",
+            ).values("target"))
         if query["rfcs"]:
-            queries.extend([Q(targets_related__source__name__icontains=look_for, targets_related__relationship_id="became_rfc")])
+            combined_query |= Q(pk__in=RelatedDocument.objects.filter(
+                source__name__icontains=look_for, relationship_id="became_rfc",
+            ).values("target"))
 
-        combined_query = reduce(operator.or_, queries)
-        docs = docs.filter(combined_query).distinct()
+        docs = docs.filter(combined_query)
 
     # rfc/active/old check buttons
     allowed_draft_states = []
@@ -228,21 +217,21 @@ def retrieve_search_results(form, all_types=False):
     if query["olddrafts"]:
         allowed_draft_states.extend(['repl', 'expired', 'auth-rm', 'ietf-rm'])
 
-    docs = docs.filter(Q(states__slug__in=allowed_draft_states) |
-                       ~Q(type__slug='draft')).distinct()
+    docs = docs.filter(Q(pk__in=Document.objects.filter(type_id="draft", states__slug__in=allowed_draft_states).values("pk")) |
+                       ~Q(type__slug='draft'))
 
     # radio choices
     by = query["by"]
     if by == "author":
-        docs = docs.filter(
-            Q(documentauthor__person__alias__name__icontains=query["author"]) |
-            Q(documentauthor__person__email__address__icontains=query["author"])
-        )
+        docs = docs.filter(pk__in=DocumentAuthor.objects.filter(
+            Q(person__alias__name__icontains=query["author"]) |
+            Q(person__email__address__icontains=query["author"])
+        ).values("document"))
     elif by == "group":
         docs = docs.filter(group__acronym__iexact=query["group"])
     elif by == "area":
         docs = docs.filter(Q(group__type="wg", group__parent=query["area"]) |
-                           Q(group=query["area"])).distinct()
+                           Q(group=query["area"]))
     elif by == "ad":
         docs = docs.filter(ad=query["ad"])
     elif by == "state":
@@ -516,7 +505,9 @@ def _state_to_doc_type(state):
             states__slug="idexists"
         ).distinct().count()
 
-        for doc in Document.objects.exclude(type_id="rfc").filter(ad=ad):
+        ad_docs = list(Document.objects.exclude(type_id="rfc").filter(ad=ad))
+        RelationGraph.load(ad_docs, "became_rfc").attach()
+        for doc in ad_docs:
             dt = doc_type(doc)
             state = doc_state(doc)
 
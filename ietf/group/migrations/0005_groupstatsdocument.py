@@ -0,0 +1,39 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.db import migrations, models
+import django.db.models.deletion
+import ietf.utils.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doc", "0026_document_name_title_trigram_indexes"),
+        ("group", "0004_modern_list_archive"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GroupStatsDocument",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("latest_activity", models.DateTimeField(db_index=True)),
+                (
+                    "document",
+                    ietf.utils.models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="group_stats",
+                        to="doc.document",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -453,6 +453,18 @@ def download_name(self):
     def __str__(self):
         return f"{self.date} {self.display_title()} : {self.appeal.name}"
 
+class GroupStatsDocument(models.Model):
+    """A draft counted by the group stats, with the time of its latest revision or publication
+
+    Kept up to date by signal receivers in ietf.group.signals, and rebuilt by
+    ietf.group.utils.update_group_stats_documents().
+    """
+    document = OneToOneField('doc.Document', related_name='group_stats')
+    latest_activity = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.document.name} active {self.latest_activity}"
+
 # --- Signal hooks for group models ---
 
 @receiver(models.signals.pre_save, sender=Group)
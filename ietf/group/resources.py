@@ -13,7 +13,8 @@
 
 from ietf.group.models import (Group, GroupStateTransitions, GroupMilestone, GroupHistory, # type: ignore
     GroupURL, Role, GroupEvent, RoleHistory, GroupMilestoneHistory, MilestoneGroupEvent,
-    ChangeStateGroupEvent, GroupFeatures, GroupExtResource, Appeal, AppealArtifact)
+    ChangeStateGroupEvent, GroupFeatures, GroupExtResource, Appeal, AppealArtifact,
+    GroupStatsDocument)
 
 
 from ietf.person.resources import PersonResource
@@ -372,3 +373,19 @@ class Meta:
             "artifact_type": ALL_WITH_RELATIONS,
         }
 api.group.register(AppealArtifactResource())
+
+
+class GroupStatsDocumentResource(ModelResource):
+    document         = ToOneField('ietf.doc.resources.DocumentResource', 'document')
+    class Meta:
+        queryset = GroupStatsDocument.objects.all()
+        serializer = api.Serializer()
+        cache = SimpleCache()
+        #resource_name = 'groupstatsdocument'
+        ordering = ['id', ]
+        filtering = { 
+            "id": ALL,
+            "latest_activity": ALL,
+            "document": ALL_WITH_RELATIONS,
+        }
+api.group.register(GroupStatsDocumentResource())
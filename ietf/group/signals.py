@@ -0,0 +1,67 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from ietf.doc.models import DocEvent, Document, RelatedDocument
+from .utils import invalidate_dependency_graphs, update_group_stats_document
+
+
+# The receivers below make the cached dependency graphs of the groups that may
+# show a changed document or relation stale. Only drafts and RFCs appear in the
+# graphs.
+
+def dependency_graphs_changed(doc_ids, group_ids=()):
+    # Wait for the commit so no request rebuilds a graph from the old data
+    transaction.on_commit(lambda: invalidate_dependency_graphs(doc_ids, group_ids))
+
+
+# dispatch_uid ensures only a single signal receiver binding is made
+@receiver([post_save, post_delete], sender=Document, dispatch_uid="dependency_graph_document_receiver_uid")
+def dependency_graph_document_receiver(sender, instance, raw=False, **kwargs):
+    if not raw and instance.type_id in ("draft", "rfc"):
+        # the group is passed along in case the document is being deleted
+        dependency_graphs_changed([instance.pk], [instance.group_id])
+
+
+@receiver([post_save, post_delete], sender=RelatedDocument, dispatch_uid="dependency_graph_relation_receiver_uid")
+def dependency_graph_relation_receiver(sender, instance, raw=False, **kwargs):
+    if not raw:
+        dependency_graphs_changed([instance.source_id, instance.target_id])
+
+
+@receiver(m2m_changed, sender=Document.states.through, dispatch_uid="dependency_graph_states_receiver_uid")
+def dependency_graph_states_receiver(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if reverse:
+        # instance is a State; pk_set is None when it is cleared, which is left to the cache timeout
+        if pk_set:
+            dependency_graphs_changed(list(pk_set))
+    elif instance.type_id in ("draft", "rfc"):
+        dependency_graphs_changed([instance.pk])
+
+
+# The receivers below keep the GroupStatsDocument rows of drafts up to date.
+# Whether a draft is counted depends on its stream and replaced state, and its
+# latest activity on its new revision and RFC publication events.
+
+GROUP_STATS_EVENT_TYPES = ("new_revision", "published_rfc", "changed_stream")
+
+
+def group_stats_document_changed(doc_id):
+    transaction.on_commit(lambda: update_group_stats_document(doc_id))
+
+
+@receiver(post_save, dispatch_uid="group_stats_event_receiver_uid")
+def group_stats_event_receiver(sender, instance, created=False, raw=False, **kwargs):
+    # NewRevisionDocEvent and other DocEvent subclasses are senders of their own
+    if isinstance(instance, DocEvent) and created and not raw and instance.type in GROUP_STATS_EVENT_TYPES:
+        group_stats_document_changed(instance.doc_id)
+
+
+@receiver(m2m_changed, sender=Document.states.through, dispatch_uid="group_stats_states_receiver_uid")
+def group_stats_states_receiver(sender, instance, action, reverse, **kwargs):
+    if action.startswith("post_") and not reverse and instance.type_id == "draft":
+        group_stats_document_changed(instance.pk)
@@ -14,7 +14,7 @@
 from ietf.utils import log
 
 from .models import Group
-from .utils import fill_in_charter_info, fill_in_wg_drafts, fill_in_wg_roles
+from .utils import fill_in_charter_info, fill_in_wg_drafts, fill_in_wg_roles, update_group_stats_documents
 from .views import extract_last_name, roles
 
 
@@ -113,3 +113,9 @@ def generate_wg_summary_files_task():
         store_file("indexes", "1wg-summary.txt", f, allow_overwrite=True)
     with summary_by_acronym_file.open("rb") as f:
         store_file("indexes", "1wg-summary-by-acronym.txt", f, allow_overwrite=True)
+
+
+@shared_task
+def update_group_stats_documents_task():
+    stored, removed = update_group_stats_documents()
+    log.log(f"Updated group stats summary: {stored} documents, {removed} removed")
@@ -6,22 +6,29 @@
 import mock
 
 from django.urls import reverse as urlreverse
+from django.core.cache import caches
+from django.db import connection
 from django.db.models import Q
 from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils import timezone
 
 import debug                             # pyflakes:ignore
 
-from ietf.doc.factories import DocumentFactory, WgDraftFactory, EditorialDraftFactory
-from ietf.doc.models import DocEvent, RelatedDocument, Document
-from ietf.group.models import Role, Group
+from ietf.doc.factories import DocumentFactory, WgDraftFactory, EditorialDraftFactory, RfcFactory
+from ietf.doc.models import DocEvent, RelatedDocument, Document, State
+from ietf.group.models import Role, Group, GroupStatsDocument
 from ietf.group.utils import (
     get_group_role_emails,
     get_child_group_role_emails,
     get_group_ad_emails,
     get_group_email_aliases,
     GroupAliasGenerator,
+    dependency_graph_cache_key,
+    group_dependency_graph,
+    group_stats_docs,
     role_holder_emails,
+    update_group_stats_documents,
 )
 from ietf.group.factories import GroupFactory, RoleFactory
 from ietf.person.factories import PersonFactory, EmailFactory
@@ -138,6 +145,56 @@ def test_group_stats(self):
             self.assertIn(doc.name, ids)
 
 
+    def test_group_stats_summary(self):
+        old = WgDraftFactory()
+        old.docevent_set.filter(type="new_revision").update(time=timezone.now() - datetime.timedelta(days=800))
+        replaced = WgDraftFactory(states=[("draft", "repl")])
+        since = timezone.now() - datetime.timedelta(days=365)
+        live = list(group_stats_docs(since))
+        self.assertNotIn(old.name, [row[0] for row in live])
+        self.assertNotIn(replaced.name, [row[0] for row in live])
+
+        self.assertEqual(update_group_stats_documents()[1], 0)
+        self.assertEqual(
+            GroupStatsDocument.objects.get(document=old).latest_activity,
+            old.latest_event(type="new_revision").time,
+        )
+        self.assertFalse(GroupStatsDocument.objects.filter(document=replaced).exists())
+        self.assertEqual(list(group_stats_docs(since)), live)
+        self.assertIn(old.name, [row[0] for row in group_stats_docs(since - datetime.timedelta(days=730))])
+
+        # the summary is used once filled in, and drops documents on the next update
+        replaced.set_state(old.get_state("draft"))
+        old.set_state(replaced.get_state("draft"))
+        self.assertEqual(update_group_stats_documents()[1], 1)
+        self.assertIn(replaced.name, [row[0] for row in group_stats_docs(since)])
+        self.assertFalse(GroupStatsDocument.objects.filter(document=old).exists())
+
+        r = Client(Accept="application/json").get(urlreverse("ietf.group.views.group_stats_data"))
+        self.assertEqual(r.status_code, 200)
+        self.assertIn(replaced.name, [d["id"] for d in r.json()])
+
+    def test_group_stats_summary_signals(self):
+        draft = WgDraftFactory()
+        update_group_stats_documents()
+        self.assertTrue(GroupStatsDocument.objects.filter(document=draft).exists())
+
+        # new revisions, replacement and stream changes update the row when committed
+        with self.captureOnCommitCallbacks(execute=True):
+            new_draft = WgDraftFactory()
+        self.assertEqual(
+            GroupStatsDocument.objects.get(document=new_draft).latest_activity,
+            new_draft.latest_event(type="new_revision").time,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.set_state(State.objects.get(type="draft", slug="repl"))
+        self.assertFalse(GroupStatsDocument.objects.filter(document=draft).exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            new_draft.stream_id = "irtf"
+            new_draft.save_with_history([DocEvent.objects.create(doc=new_draft, rev=new_draft.rev, type="changed_stream", by=Person.objects.get(name="(System)"), desc="Changed stream")])
+        self.assertFalse(GroupStatsDocument.objects.filter(document=new_draft).exists())
+
+
 class GroupDocDependencyTests(TestCase):
     def setUp(self):
         super().setUp()
@@ -175,6 +232,79 @@ def test_group_document_dependencies(self):
                 except Exception as e:
                     self.fail("JSON load failed: %s" % e)
 
+    def test_group_dependency_graph(self):
+        group = GroupFactory(type_id="wg")
+        source = WgDraftFactory(group=group, intended_std_level_id="ps")
+        info_rfc = RfcFactory(std_level_id="inf")
+        pre_rfc = WgDraftFactory(intended_std_level_id="inf", states=[("draft", "rfc")])
+        rfc = RfcFactory(std_level_id="inf")
+        RelatedDocument.objects.create(source=pre_rfc, target=rfc, relationship_id="became_rfc")
+        for target, relationship in [(info_rfc, "refnorm"), (pre_rfc, "refnorm")]:
+            RelatedDocument.objects.create(source=source, target=target, relationship_id=relationship)
+
+        with CaptureQueriesContext(connection) as queries:
+            graph = group_dependency_graph(group, set())
+        self.assertCountEqual(
+            [(link["source"], link["target"], link["rel"]) for link in graph["links"]],
+            [(source.name, info_rfc.name, "downref"), (source.name, rfc.name, "downref")],
+        )
+        nodes = {node["id"]: node for node in graph["nodes"]}
+        self.assertCountEqual(nodes, [source.name, info_rfc.name, rfc.name])
+        self.assertTrue(nodes[rfc.name]["rfc"])
+        self.assertEqual(nodes[source.name]["group"], group.acronym)
+        self.assertEqual(nodes[source.name]["level"], "Proposed Standard")
+
+        # the number of queries doesn't grow with the graph
+        for _ in range(5):
+            RelatedDocument.objects.create(source=source, target=WgDraftFactory(), relationship_id="refinfo")
+        with self.assertNumQueries(len(queries)):
+            graph = group_dependency_graph(group, set())
+        self.assertEqual(len(graph["links"]), 7)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_group_document_dependencies_cache(self):
+        source = Document.objects.get(relateddocument__relationship_id="refnorm")
+        group = source.group
+        url = urlreverse("ietf.group.views.dependencies", kwargs=dict(acronym=group.acronym))
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        key = dependency_graph_cache_key(group)
+        self.assertEqual(caches["default"].get(key), r.content.decode())
+
+        # changing a document makes the cached graph stale once the change is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            target = WgDraftFactory()
+            RelatedDocument.objects.create(source=source, target=target, relationship_id="refinfo")
+            self.assertEqual(dependency_graph_cache_key(group), key)
+        self.assertNotEqual(dependency_graph_cache_key(group), key)
+        self.assertIn(target.name, [node["id"] for node in self.client.get(url).json()["nodes"]])
+        key = dependency_graph_cache_key(group)
+        with self.captureOnCommitCallbacks(execute=True):
+            target.set_state(State.objects.get(type_id="draft", slug="expired"))
+        self.assertNotEqual(dependency_graph_cache_key(group), key)
+
+        # other documents, such as meeting materials, don't
+        key = dependency_graph_cache_key(group)
+        with self.captureOnCommitCallbacks(execute=True):
+            DocumentFactory(type_id="slides")
+        self.assertEqual(dependency_graph_cache_key(group), key)
+
+        # nor do drafts that can't appear in the group's graph
+        other = WgDraftFactory()
+        self.assertNotEqual(other.group, group)
+        other_key = dependency_graph_cache_key(other.group)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.set_state(State.objects.get(type_id="draft", slug="expired"))
+        self.assertEqual(dependency_graph_cache_key(group), key)
+        self.assertNotEqual(dependency_graph_cache_key(other.group), other_key)
+
+        # unless they are on the group's community list
+        clist = group.communitylist_set.first()
+        clist.added_docs.add(other)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.set_state(State.objects.get(type_id="draft", slug="active"))
+        self.assertNotEqual(dependency_graph_cache_key(group), key)
+
 
 class GenerateGroupAliasesTests(TestCase):
     def test_generator_class(self):
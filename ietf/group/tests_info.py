@@ -376,26 +376,28 @@ def test_bofs(self):
     def test_group_documents(self):
         group = GroupFactory()
         setup_default_community_list_for_group(group)
-        draft = WgDraftFactory(group=group)
-        draft.action_holders.set([PersonFactory()])
-        draft2 = WgDraftFactory(group=group)
-        draft3 = WgDraftFactory(group=group)
-        draft3.set_state(State.objects.get(type='draft-iesg', slug='pub-req'))
-        draft3.action_holders.set(PersonFactory.create_batch(2))
-        old_dah = draft3.documentactionholder_set.first()
-        old_dah.time_added -= datetime.timedelta(days=173)  # make an "old" action holder
-        old_dah.save()
-
-        draft4 = WgDraftFactory(group=group)
-        draft4.set_state(State.objects.get(type='draft', slug='expired'))   # Expired WG draft
-        draft5 = IndividualDraftFactory()
-        draft5.set_state(State.objects.get(type='draft', slug='expired'))   # Expired non-WG draft
-        draft6 = WgDraftFactory(group=group)
-        draft6.set_state(State.objects.get(type='draft', slug='expired'))
-        draft6.set_state(State.objects.get(type='draft-iesg', slug='dead')) # Expired WG draft, marked as dead
-        draft7 = WgDraftFactory(group=group)
-        draft7.set_state(State.objects.get(type='draft', slug='expired'))
-        draft7.set_state(State.objects.get(type='draft-stream-%s' % draft7.stream_id, slug='dead')) # Expired WG draft, marked as dead
+        # the documents tracked by the group's list are updated on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            draft = WgDraftFactory(group=group)
+            draft.action_holders.set([PersonFactory()])
+            draft2 = WgDraftFactory(group=group)
+            draft3 = WgDraftFactory(group=group)
+            draft3.set_state(State.objects.get(type='draft-iesg', slug='pub-req'))
+            draft3.action_holders.set(PersonFactory.create_batch(2))
+            old_dah = draft3.documentactionholder_set.first()
+            old_dah.time_added -= datetime.timedelta(days=173)  # make an "old" action holder
+            old_dah.save()
+
+            draft4 = WgDraftFactory(group=group)
+            draft4.set_state(State.objects.get(type='draft', slug='expired'))   # Expired WG draft
+            draft5 = IndividualDraftFactory()
+            draft5.set_state(State.objects.get(type='draft', slug='expired'))   # Expired non-WG draft
+            draft6 = WgDraftFactory(group=group)
+            draft6.set_state(State.objects.get(type='draft', slug='expired'))
+            draft6.set_state(State.objects.get(type='draft-iesg', slug='dead')) # Expired WG draft, marked as dead
+            draft7 = WgDraftFactory(group=group)
+            draft7.set_state(State.objects.get(type='draft', slug='expired'))
+            draft7.set_state(State.objects.get(type='draft-stream-%s' % draft7.stream_id, slug='dead')) # Expired WG draft, marked as dead
 
         clist = CommunityList.objects.get(group=group)
         related_docs_rule = clist.searchrule_set.get(rule_type='name_contains')
@@ -1,11 +1,15 @@
 # Copyright The IETF Trust 2012-2023, All Rights Reserved
 # -*- coding: utf-8 -*-
 import datetime
+import uuid
 
+from collections import defaultdict
 from itertools import chain
 from pathlib import Path
 
-from django.db.models import Q
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max, Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.html import format_html
@@ -16,8 +20,9 @@
 
 from ietf.community.models import CommunityList, SearchRule
 from ietf.community.utils import reset_name_contains_index_for_rule, can_manage_community_list
-from ietf.doc.models import Document, State, RelatedDocument
-from ietf.group.models import Group, RoleHistory, Role, GroupFeatures, GroupEvent
+from ietf.doc.models import Document, DocEvent, State, RelatedDocument
+from ietf.doc.utils_relations import RelationGraph
+from ietf.group.models import Group, RoleHistory, Role, GroupFeatures, GroupEvent, GroupStatsDocument
 from ietf.ietfauth.utils import has_role
 from ietf.name.models import GroupTypeName, RoleName
 from ietf.person.models import Email
@@ -546,3 +551,237 @@ def fill_in_wg_drafts(group):
         # TODO: remote_field?
         rfc.remote_field = RelatedDocument.objects.filter(source=rfc,relationship_id__in=['obs','updates']).distinct()
         rfc.invrel = RelatedDocument.objects.filter(target=rfc,relationship_id__in=['obs','updates']).distinct()
+
+
+def group_stats_candidate_docs():
+    """The drafts the group stats can count: IETF stream drafts that haven't been replaced"""
+    return (
+        Document.objects.filter(type="draft", stream="ietf")
+        .exclude(states__type="draft", states__slug="repl")
+    )
+
+
+def group_stats_latest_activity(docs):
+    """Latest new revision or RFC publication time of each of docs, as a queryset of
+    (doc id, time) tuples, computed with a single aggregate query"""
+    return (
+        DocEvent.objects.filter(doc__in=docs)
+        .filter(Q(newrevisiondocevent__isnull=False) | Q(type="published_rfc"))
+        .values("doc")
+        .annotate(latest=Max("time"))
+        .values_list("doc", "latest")
+    )
+
+
+def update_group_stats_documents():
+    """Bring the GroupStatsDocument summary table up to date
+
+    Returns the number of rows stored and removed.
+    """
+    latest = dict(group_stats_latest_activity(group_stats_candidate_docs().values("pk")))
+    with transaction.atomic():
+        removed, _ = GroupStatsDocument.objects.exclude(document__in=list(latest)).delete()
+        GroupStatsDocument.objects.bulk_create(
+            [GroupStatsDocument(document_id=pk, latest_activity=time) for pk, time in latest.items()],
+            update_conflicts=True,
+            unique_fields=["document"],
+            update_fields=["latest_activity"],
+            batch_size=1000,
+        )
+    return len(latest), removed
+
+
+def update_group_stats_document(doc_id):
+    """Bring the GroupStatsDocument row of one document up to date"""
+    latest = dict(group_stats_latest_activity(group_stats_candidate_docs().filter(pk=doc_id).values("pk")))
+    if doc_id in latest:
+        GroupStatsDocument.objects.update_or_create(
+            document_id=doc_id, defaults=dict(latest_activity=latest[doc_id])
+        )
+    else:
+        GroupStatsDocument.objects.filter(document_id=doc_id).delete()
+
+
+def group_stats_docs(since):
+    """(name, pages, group id, group parent id) of the drafts counted by the group stats
+    that have been revised or published since the given time
+
+    Uses the GroupStatsDocument summary table once it has been filled in, and falls
+    back to aggregating the DocEvents otherwise.
+    """
+    if GroupStatsDocument.objects.exists():
+        docs = Document.objects.filter(group_stats__latest_activity__gte=since)
+    else:
+        active = group_stats_latest_activity(group_stats_candidate_docs().values("pk"))
+        docs = Document.objects.filter(
+            pk__in=active.filter(latest__gte=since).values("doc")
+        )
+    return (
+        docs.exclude(group__acronym="none")
+        .filter(group__parent__type="area")
+        .order_by("name")
+        .values_list("name", "pages", "group_id", "group__parent_id")
+    )
+
+
+DEPENDENCY_GRAPH_CACHE_TIMEOUT = 60 * 60
+DEPENDENCY_GRAPH_VERSION_KEY = "group_dependency_graph_version:{}"
+
+# Document fields and related objects used by the dependency graph and is_downref()
+_DEPENDENCY_DOC_RELATED = [
+    f"{end}__{field}"
+    for end in ("source", "target")
+    for field in ("group", "std_level", "intended_std_level")
+]
+
+
+def dependency_graph_cache_key(group, querystring=""):
+    """Cache key for the dependency graph of a group
+
+    The key includes a per-group version token that invalidate_dependency_graphs()
+    replaces when a document that may appear in the group's graph changes.
+    """
+    cache = caches["default"]
+    version_key = DEPENDENCY_GRAPH_VERSION_KEY.format(group.pk)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, None)
+        version = cache.get(version_key, "")
+    return f"group_dependency_graph:{version}:{group.pk}:{querystring}"
+
+
+def invalidate_dependency_graphs(doc_ids, group_ids=()):
+    """Make the cached dependency graphs that may show any of the documents stale
+
+    These are the graphs of the documents' groups and of the groups whose community
+    lists include them, and likewise for the documents related to them. Graphs this
+    misses, e.g. of a group a document has just left or of a community list that
+    only matches a document through a search rule, are rebuilt once their
+    DEPENDENCY_GRAPH_CACHE_TIMEOUT runs out. group_ids adds groups to invalidate,
+    for documents that no longer exist.
+    """
+    doc_ids = set(doc_ids)
+    for source_id, target_id in RelatedDocument.objects.filter(
+        Q(source__in=doc_ids) | Q(target__in=doc_ids)
+    ).values_list("source_id", "target_id"):
+        doc_ids.update((source_id, target_id))
+    group_ids = set(group_ids)
+    group_ids.update(Document.objects.filter(pk__in=doc_ids).values_list("group_id", flat=True))
+    group_ids.update(
+        CommunityList.objects.filter(added_docs__in=doc_ids).values_list("group_id", flat=True)
+    )
+    group_ids.discard(None)
+    if group_ids:
+        caches["default"].set_many(
+            {DEPENDENCY_GRAPH_VERSION_KEY.format(pk): uuid.uuid4().hex for pk in group_ids},
+            None,
+        )
+
+
+def _load_states(docs):
+    """Fill in the state cache used by get_state() for docs, with one query"""
+    by_pk = defaultdict(list)
+    for doc in docs:
+        doc.state_cache = {}
+        by_pk[doc.pk].append(doc)
+    for row in Document.states.through.objects.filter(document__in=list(by_pk)).select_related("state"):
+        for doc in by_pk[row.document_id]:
+            doc.state_cache[row.state.type_id] = row.state
+
+
+def group_dependency_graph(group, cl_docs):
+    """Nodes and links of the document dependency graph of a group
+
+    cl_docs are the documents on the group's community list. Relations, states,
+    became_rfc relations and standards levels are loaded in bulk, and each document
+    is represented by a single instance, so the number of queries doesn't depend
+    on the size of the graph.
+    """
+    references = Q(
+        Q(source__group=group) | Q(source__in=cl_docs),
+        source__type="draft",
+        relationship__slug__startswith="ref",
+    )
+    rfc_or_subseries = {"rfc", "bcp", "fyi", "std"}
+    both_rfcs = Q(source__type_id="rfc", target__type_id__in=rfc_or_subseries)
+    pre_rfc_draft_to_rfc = Q(
+        source__states__type="draft",
+        source__states__slug="rfc",
+        target__type_id__in=rfc_or_subseries,
+    )
+    both_pre_rfcs = Q(
+        source__states__type="draft",
+        source__states__slug="rfc",
+        target__type_id="draft",
+        target__states__type="draft",
+        target__states__slug="rfc",
+    )
+    inactive = Q(
+        source__states__type="draft",
+        source__states__slug__in=["expired", "repl"],
+    )
+    attractor = Q(target__name__in=["rfc5000", "rfc5741"])
+    removed = Q(source__states__type="draft", source__states__slug__in=["auth-rm", "ietf-rm"])
+    relations = (
+        RelatedDocument.objects.filter(references)
+        .exclude(both_rfcs)
+        .exclude(pre_rfc_draft_to_rfc)
+        .exclude(both_pre_rfcs)
+        .exclude(inactive)
+        .exclude(attractor)
+        .exclude(removed)
+        .select_related("relationship", *_DEPENDENCY_DOC_RELATED)
+    )
+
+    docs = {}
+
+    def use_shared_docs(relations):
+        relations = list(relations)
+        known = set(docs)
+        for x in relations:
+            x.source = docs.setdefault(x.source_id, x.source)
+            x.target = docs.setdefault(x.target_id, x.target)
+        _load_states([docs[pk] for pk in set(docs) - known])
+        return relations
+
+    links = set()
+    for x in use_shared_docs(relations):
+        always_include = x.target.type_id not in rfc_or_subseries and x.target.get_state_slug("draft") != "rfc"
+        if always_include or x.is_downref():
+            links.add(x)
+
+    replacements = RelatedDocument.objects.filter(
+        relationship__slug="replaces",
+        target__in=set(x.target_id for x in links),
+    ).select_related("relationship", *_DEPENDENCY_DOC_RELATED)
+    links.update(use_shared_docs(replacements))
+
+    nodes = sorted(set(docs[pk] for x in links for pk in (x.source_id, x.target_id)), key=lambda d: d.name)
+    RelationGraph.load(nodes, "became_rfc", fields=["name"]).attach()
+    return {
+        "nodes": [
+            {
+                "id": x.became_rfc().name if x.became_rfc() else x.name,
+                "rfc": x.type_id == "rfc" or x.became_rfc() is not None,
+                "post-wg": x.get_state_slug("draft-iesg") not in ["idexists", "dead"],
+                "expired": x.get_state_slug("draft") == "expired",
+                "replaced": x.get_state_slug("draft") == "repl",
+                "group": x.group.acronym if x.group and x.group.acronym != "none" else "",
+                "url": x.get_absolute_url(),
+                "level": x.intended_std_level.name
+                if x.intended_std_level
+                else x.std_level.name
+                if x.std_level
+                else "",
+            }
+            for x in nodes
+        ],
+        "links": [
+            {
+                "source": x.source.became_rfc().name if x.source.became_rfc() else x.source.name,
+                "target": x.target.became_rfc().name if x.target.became_rfc() else x.target.name,
+                "rel": "downref" if x.is_downref() else x.relationship.slug,
+            }
+            for x in sorted(links, key=lambda x: x.pk)
+        ],
+    }
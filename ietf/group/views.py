@@ -49,6 +49,7 @@
 from django import forms
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.cache import caches
 from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery, TextField, Value
 from django.db.models.functions import Coalesce
 from django.http import HttpResponse, HttpResponseRedirect, Http404, JsonResponse
@@ -63,7 +64,7 @@
 
 from ietf.community.models import CommunityList, EmailSubscription
 from ietf.community.utils import docs_tracked_by_community_list
-from ietf.doc.models import DocTagName, State, RelatedDocument, Document, DocEvent
+from ietf.doc.models import DocTagName, State, Document, DocEvent
 from ietf.doc.templatetags.ietf_filters import clean_whitespace
 from ietf.doc.utils import get_chartering_type, get_tags_for_stream_id
 from ietf.doc.utils_charter import charter_name_for_group, replace_charter_of_replaced_group
@@ -81,7 +82,8 @@
                               construct_group_menu_context, get_group_materials,
                               save_group_in_history, can_manage_group, update_role_set,
                               get_group_or_404, setup_default_community_list_for_group, fill_in_charter_info,
-                              get_group_email_aliases)                              
+                              get_group_email_aliases, group_stats_docs, group_dependency_graph,
+                              dependency_graph_cache_key, DEPENDENCY_GRAPH_CACHE_TIMEOUT)                              
 #
 from ietf.ietfauth.utils import has_role, is_authorized_in_group
 from ietf.mailtrigger.utils import gather_relevant_expansions
@@ -704,100 +706,26 @@ def materials(request, acronym, group_type=None):
                   }))
 
 
-@cache_page(60 * 60)
 def dependencies(request, acronym, group_type=None):
     group = get_group_or_404(acronym, group_type)
     if not group.features.has_documents:
         raise Http404
 
-    if not group.communitylist_set.exists():
-        setup_default_community_list_for_group(group)
-    clist = group.communitylist_set.first()
+    cache = caches["default"]
+    cache_key = dependency_graph_cache_key(group, request.GET.urlencode())
+    graph = cache.get(cache_key)
+    if graph is None:
+        if not group.communitylist_set.exists():
+            setup_default_community_list_for_group(group)
+        clist = group.communitylist_set.first()
 
-    docs, meta, docs_related, meta_related = prepare_group_documents(
-        request, group, clist
-    )
-    cl_docs = set(docs).union(set(docs_related))
-
-    references = Q(
-        Q(source__group=group) | Q(source__in=cl_docs),
-        source__type="draft",
-        relationship__slug__startswith="ref",
-    )
-    rfc_or_subseries = {"rfc", "bcp", "fyi", "std"}
-    both_rfcs = Q(source__type_id="rfc", target__type_id__in=rfc_or_subseries)
-    pre_rfc_draft_to_rfc = Q(
-        source__states__type="draft",
-        source__states__slug="rfc",
-        target__type_id__in=rfc_or_subseries,
-    )
-    both_pre_rfcs = Q(
-        source__states__type="draft",
-        source__states__slug="rfc",
-        target__type_id="draft",
-        target__states__type="draft",
-        target__states__slug="rfc",
-    )
-    inactive = Q(
-        source__states__type="draft",
-        source__states__slug__in=["expired", "repl"],
-    )
-    attractor = Q(target__name__in=["rfc5000", "rfc5741"])
-    removed = Q(source__states__type="draft", source__states__slug__in=["auth-rm", "ietf-rm"])
-    relations = (
-        RelatedDocument.objects.filter(references)
-        .exclude(both_rfcs)
-        .exclude(pre_rfc_draft_to_rfc)
-        .exclude(both_pre_rfcs)
-        .exclude(inactive)
-        .exclude(attractor)
-        .exclude(removed)
-    )
-
-    links = set()
-    for x in relations:
-        always_include = x.target.type_id not in rfc_or_subseries and x.target.get_state_slug("draft") != "rfc" 
-        if always_include or x.is_downref():
-            links.add(x)
-
-    replacements = RelatedDocument.objects.filter(
-        relationship__slug="replaces",
-        target__in=[x.target for x in links],
-    )
-
-    for x in replacements:
-        links.add(x)
-
-    nodes = set([x.source for x in links]).union([x.target for x in links])
-    graph = {
-        "nodes": [
-            {
-                "id": x.became_rfc().name if x.became_rfc() else x.name,
-                "rfc": x.type_id == "rfc" or x.became_rfc() is not None,
-                "post-wg": x.get_state_slug("draft-iesg") not in ["idexists", "dead"],
-                "expired": x.get_state_slug("draft") == "expired",
-                "replaced": x.get_state_slug("draft") == "repl",
-                "group": x.group.acronym if x.group and x.group.acronym != "none" else "",
-                "url": x.get_absolute_url(),
-                "level": x.intended_std_level.name
-                if x.intended_std_level
-                else x.std_level.name
-                if x.std_level
-                else "",
-            }
-            for x in nodes
-        ],
-        "links": [
-            {
-                "source": x.source.became_rfc().name if x.source.became_rfc() else x.source.name,
-                "target": x.target.became_rfc().name if x.target.became_rfc() else x.target.name,
-                "rel": "downref" if x.is_downref() else x.relationship.slug,
-            }
-            for x in links
-        ],
-    }
+        docs, meta, docs_related, meta_related = prepare_group_documents(
+            request, group, clist
+        )
+        graph = json.dumps(group_dependency_graph(group, set(docs).union(set(docs_related))))
+        cache.set(cache_key, graph, DEPENDENCY_GRAPH_CACHE_TIMEOUT)
 
-    return HttpResponse(json.dumps(graph), content_type="application/json")
+    return HttpResponse(graph, content_type="application/json")
 
 
 def email_aliases(request, acronym=None, group_type=None):
@@ -1430,52 +1358,56 @@ def group_menu_data(request):
 @cache_page(30 * 60)
 def group_stats_data(request, years="3", only_active=True):
     when = timezone.now() - datetime.timedelta(days=int(years) * 365)
-    docs = (
-        Document.objects.filter(type="draft", stream="ietf")
-        .filter(
-            Q(docevent__newrevisiondocevent__time__gte=when)
-            | Q(docevent__type="published_rfc", docevent__time__gte=when)
-        )
-        .exclude(states__type="draft", states__slug="repl")
-        .distinct()
-    )
+
+    # the docs, grouped here rather than with a query per area and WG
+    docs_by_group = defaultdict(list)
+    areas_with_docs = set()
+    for name, pages, group_id, area_id in group_stats_docs(when):
+        docs_by_group[group_id].append((name, pages))
+        areas_with_docs.add(area_id)
+
+    areas = []
+    wgs_by_area = defaultdict(list)
+    for g in Group.objects.filter(Q(type="area") | Q(type="wg", parent__type="area")):
+        if g.type_id == "area":
+            areas.append(g)
+        else:
+            wgs_by_area[g.parent_id].append(g)
 
     data = []
-    for a in Group.objects.filter(type="area"):
+    for a in areas:
         if only_active and not a.is_active:
             continue
 
-        area_docs = docs.filter(group__parent=a).exclude(group__acronym="none")
-        if not area_docs:
+        if a.pk not in areas_with_docs:
             continue
 
         area_page_cnt = 0
         area_doc_cnt = 0
-        for wg in Group.objects.filter(type="wg", parent=a):
+        for wg in wgs_by_area[a.pk]:
             if only_active and not wg.is_active:
                 continue
 
-            wg_docs = area_docs.filter(group=wg)
+            wg_docs = docs_by_group[wg.pk]
             if not wg_docs:
                 continue
 
             wg_page_cnt = 0
-            for doc in wg_docs:
+            for name, pages in wg_docs:
                 # add doc data
                 data.append(
                     {
-                        "id": doc.name,
+                        "id": name,
                         "active": True,
                         "parent": wg.acronym,
                         "grandparent": a.acronym,
-                        "pages": doc.pages,
+                        "pages": pages,
                         "docs": 1,
                     }
                 )
-                wg_page_cnt += doc.pages
+                wg_page_cnt += pages
 
             area_doc_cnt += len(wg_docs)
-            area_docs = area_docs.exclude(group=wg)
 
             # add WG data
             data.append(
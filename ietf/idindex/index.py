@@ -9,6 +9,7 @@
 import os
 
 from django.conf import settings
+from django.db.models import Count, Max, Prefetch
 from django.template.loader import render_to_string
 from django.utils import timezone
 
@@ -19,8 +20,55 @@
 from ietf.doc.models import IESG_SUBSTATE_TAGS
 from ietf.doc.templatetags.ietf_filters import clean_whitespace
 from ietf.group.models import Group
+from ietf.name.models import DocTagName
 from ietf.person.models import Person, Email
 
+
+def rfc_names_by_draft_name():
+    """Return dict mapping names of drafts that became RFCs to the RFC names"""
+    return dict(
+        RelatedDocument.objects.filter(
+            relationship_id="became_rfc", source__type_id="draft", target__type_id="rfc"
+        ).values_list("source__name", "target__name")
+    )
+
+
+def iesg_substate_tags_prefetch():
+    """Prefetch for the IESG substate tags of drafts, as names in to_attr 'iesg_substate_tags'"""
+    return Prefetch(
+        "tags",
+        queryset=DocTagName.objects.filter(slug__in=IESG_SUBSTATE_TAGS),
+        to_attr="iesg_substate_tags",
+    )
+
+
+def index_source_marker():
+    """Return a value that changes when the input to the index files may have changed
+
+    This covers new events on drafts and RFCs, their saves and state changes, and
+    drafts appearing on or disappearing from disk. Other documents, such as slides
+    or charters, don't affect it. It does not notice changes to person names and
+    email addresses, so callers should still regenerate periodically.
+    """
+    doc_types = ["draft", "rfc"]
+    drafts_and_rfcs = Document.objects.filter(type_id__in=doc_types)
+    states = Document.states.through.objects.filter(document__type_id__in=doc_types).aggregate(
+        Max("id"), Count("id")
+    )
+    try:
+        draft_dir_mtime = os.stat(settings.INTERNET_DRAFT_PATH).st_mtime_ns
+    except FileNotFoundError:
+        draft_dir_mtime = None
+    return (
+        DocEvent.objects.filter(doc__type_id__in=doc_types).aggregate(Max("id"))["id__max"],
+        drafts_and_rfcs.aggregate(Max("time"))["time__max"],
+        drafts_and_rfcs.count(),
+        states["id__max"],
+        states["id__count"],
+        draft_dir_mtime,
+    )
+
+
 def all_id_txt():
     # this returns a lot of data so try to be efficient
 
@@ -31,11 +79,7 @@ def formatted_rev_date(name):
         t = revision_time.get(name)
         return t.strftime("%Y-%m-%d") if t else ""
 
-    rfcs = dict()
-    for rfc in Document.objects.filter(type_id="rfc"):
-        draft = rfc.came_from_draft()
-        if draft is not None:
-            rfcs[draft.name] = rfc.name
+    rfcs = rfc_names_by_draft_name()
 
     replacements = dict(RelatedDocument.objects.filter(target__states=State.objects.get(type="draft", slug="repl"),
                                                        relationship="replaces").values_list("target__name", "source__name"))
@@ -56,11 +100,12 @@ def add_line(f1, f2, f3, f4):
     excludes = list(State.objects.filter(type="draft", slug__in=["rfc","repl"]))
     includes = list(State.objects.filter(type="draft-iesg").exclude(slug__in=inactive_states))
     in_iesg_process = all_ids.exclude(states__in=excludes).filter(states__in=includes).only("name", "rev")
+    in_iesg_process = in_iesg_process.prefetch_related("states", iesg_substate_tags_prefetch())
 
     # handle those actively in the IESG process
     for d in in_iesg_process:
         state = d.get_state("draft-iesg").name
-        tags = d.tags.filter(slug__in=IESG_SUBSTATE_TAGS).values_list("name", flat=True)
+        tags = [t.name for t in d.iesg_substate_tags]
         if tags:
             state += "::" + "::".join(tags)
         add_line(d.name + "-" + d.rev,
@@ -113,13 +158,9 @@ def all_id2_txt():
 
     drafts = Document.objects.filter(type="draft").order_by('name')
     drafts = drafts.select_related('group', 'group__parent', 'ad', 'intended_std_level', 'shepherd', )
-    drafts = drafts.prefetch_related("states")
+    drafts = drafts.prefetch_related("states", iesg_substate_tags_prefetch())
 
-    rfcs = dict()
-    for rfc in Document.objects.filter(type_id="rfc"):
-        draft = rfc.came_from_draft()
-        if draft is not None:
-            rfcs[draft.name] = rfc.name
+    rfcs = rfc_names_by_draft_name()
 
     replacements = dict(RelatedDocument.objects.filter(target__states=State.objects.get(type="draft", slug="repl"),
                                                        relationship="replaces").values_list("target__name", "source__name"))
@@ -161,7 +202,7 @@ def all_id2_txt():
             s = "I-D Exists"
             if iesg_state:
                 s = iesg_state.name
-                tags = d.tags.filter(slug__in=IESG_SUBSTATE_TAGS).values_list("name", flat=True)
+                tags = [t.name for t in d.iesg_substate_tags]
                 if tags:
                     s += "::" + "::".join(tags)
             fields.append(s)
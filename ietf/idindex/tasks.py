@@ -14,10 +14,16 @@
 from typing import List
 
 from django.conf import settings
+from django.core.cache import caches
 
 from ietf.doc.storage_utils import store_file
+from ietf.utils.log import log
 
-from .index import all_id_txt, all_id2_txt, id_index_txt
+from .index import all_id_txt, all_id2_txt, id_index_txt, index_source_marker
+
+
+# Cache key for the index_source_marker() value of the last regeneration
+IDINDEX_SOURCE_MARKER_CACHE_KEY = "idindex:source_marker"
 
 
 class TempFileManager(AbstractContextManager):
@@ -53,8 +59,20 @@ def __exit__(self, exc_type, exc_val, exc_tb):
 
 
 @shared_task
-def idindex_update_task():
-    """Update I-D indexes"""
+def idindex_update_task(force=False):
+    """Update I-D indexes
+
+    Skips the update if nothing the indexes are built from has changed since
+    the last update, unless force is True. The recorded state expires after
+    settings.IDINDEX_MAX_UNCHANGED_SECONDS so that changes the marker cannot
+    see, such as edits to person names, are still picked up.
+    """
+    cache = caches["default"]
+    marker = index_source_marker()
+    if not force and cache.get(IDINDEX_SOURCE_MARKER_CACHE_KEY) == marker:
+        log("I-D index sources are unchanged, skipping update")
+        return
+
     id_path = Path(settings.INTERNET_DRAFT_PATH)
     derived_path = Path(settings.DERIVED_DIR)
     download_path = Path(settings.ALL_ID_DOWNLOAD_DIR)
@@ -97,3 +115,5 @@ def idindex_update_task():
 
         tmp_mgr.move_into_place(all_id2_tmpfile, id_path / "all_id2.txt", [ftp_path, all_archive_path])
         tmp_mgr.move_into_place(derived_all_id2_tmpfile, derived_path / "all_id2.txt")
+
+    cache.set(IDINDEX_SOURCE_MARKER_CACHE_KEY, marker, settings.IDINDEX_MAX_UNCHANGED_SECONDS)
@@ -9,16 +9,17 @@
 from tempfile import TemporaryDirectory
 
 from django.conf import settings
+from django.test import override_settings
 from django.utils import timezone
 
 import debug    # pyflakes:ignore
 
-from ietf.doc.factories import WgDraftFactory, RfcFactory
+from ietf.doc.factories import DocEventFactory, DocumentFactory, WgDraftFactory, RfcFactory
 from ietf.doc.models import Document, RelatedDocument, State, LastCallDocEvent, NewRevisionDocEvent
 from ietf.doc.storage_utils import retrieve_str
 from ietf.group.factories import GroupFactory
 from ietf.name.models import DocRelationshipName
-from ietf.idindex.index import all_id_txt, all_id2_txt, id_index_txt
+from ietf.idindex.index import all_id_txt, all_id2_txt, id_index_txt, index_source_marker
 from ietf.idindex.tasks import idindex_update_task, TempFileManager
 from ietf.person.factories import PersonFactory, EmailFactory
 from ietf.utils.test_utils import TestCase
@@ -158,6 +159,10 @@ def test_id_index_txt(self):
 
 
 class TaskTests(TestCase):
+    def write_draft_file(self, name, size):
+        with (Path(settings.INTERNET_DRAFT_PATH) / name).open('w') as f:
+            f.write("a" * size)
+
     @mock.patch("ietf.idindex.tasks.all_id_txt")
     @mock.patch("ietf.idindex.tasks.all_id2_txt")
     @mock.patch("ietf.idindex.tasks.id_index_txt")
@@ -187,6 +192,61 @@ def test_idindex_update_task(
         self.assertEqual(mgr_mock.make_temp_file.call_count, 11)
         self.assertEqual(mgr_mock.move_into_place.call_count, 11)
 
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    @mock.patch("ietf.idindex.tasks.all_id_txt")
+    @mock.patch("ietf.idindex.tasks.all_id2_txt")
+    @mock.patch("ietf.idindex.tasks.id_index_txt")
+    @mock.patch.object(TempFileManager, "__enter__")
+    def test_idindex_update_task_skips_unchanged(
+        self,
+        temp_file_mgr_enter_mock,
+        id_index_mock,
+        all_id2_mock,
+        all_id_mock,
+    ):
+        temp_file_mgr_enter_mock.return_value = mock.Mock(spec=TempFileManager)
+        draft = WgDraftFactory()
+
+        idindex_update_task()
+        self.assertEqual(all_id_mock.call_count, 1)
+
+        # nothing changed, so nothing is regenerated
+        idindex_update_task()
+        self.assertEqual(all_id_mock.call_count, 1)
+        self.assertEqual(all_id2_mock.call_count, 1)
+        self.assertEqual(id_index_mock.call_count, 2)
+
+        # unless forced
+        idindex_update_task(force=True)
+        self.assertEqual(all_id_mock.call_count, 2)
+
+        # a new event triggers regeneration
+        DocEventFactory(doc=draft)
+        idindex_update_task()
+        self.assertEqual(all_id_mock.call_count, 3)
+        self.assertEqual(all_id2_mock.call_count, 3)
+        self.assertEqual(id_index_mock.call_count, 6)
+
+    def test_index_source_marker(self):
+        draft = WgDraftFactory()
+        marker = index_source_marker()
+        self.assertEqual(index_source_marker(), marker)
+        DocEventFactory(doc=draft)
+        self.assertNotEqual(index_source_marker(), marker)
+        marker = index_source_marker()
+        self.write_draft_file(f"{draft.name}-{draft.rev}.txt", 1000)
+        self.assertNotEqual(index_source_marker(), marker)
+        marker = index_source_marker()
+        draft.set_state(State.objects.get(type="draft-iesg", slug="pub-req"))
+        self.assertNotEqual(index_source_marker(), marker)
+
+        # other documents don't matter
+        marker = index_source_marker()
+        slides = DocumentFactory(type_id="slides")
+        DocEventFactory(doc=slides)
+        slides.set_state(State.objects.get(type="slides", slug="active"))
+        self.assertEqual(index_source_marker(), marker)
+
     def test_temp_file_manager(self):
         with TemporaryDirectory() as temp_dir:
             with TemporaryDirectory() as other_dir:
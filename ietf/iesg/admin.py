@@ -4,6 +4,7 @@
 
 from ietf.doc.models import TelechatDocEvent
 from ietf.iesg.models import TelechatDate, TelechatAgendaItem, TelechatAgendaContent
+from ietf.review.models import ReviewCandidate
 
 class TelechatAgendaItemAdmin(admin.ModelAdmin):
     pass
@@ -19,6 +20,8 @@ def save_model(self, request, obj, form, change):
             old_date = form.data['initial-date']
             new_date = form.cleaned_data['date']
             TelechatDocEvent.objects.filter(telechat_date=old_date).update(telechat_date=new_date)
+            # update() sends no signals, so move the review candidates along too
+            ReviewCandidate.objects.filter(telechat_date=old_date).update(telechat_date=new_date)
 
 admin.site.register(TelechatDate, TelechatDateAdmin)
 
@@ -5,19 +5,26 @@
 # utilities for constructing agendas for IESG telechats
 
 import datetime
+import uuid
 from collections import OrderedDict
 
 from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Prefetch, prefetch_related_objects
 from django.http import Http404
 
 import debug                            # pyflakes:ignore
 
-from ietf.doc.models import Document, LastCallDocEvent, ConsensusDocEvent
-from ietf.doc.utils_search import fill_in_telechat_date
+from ietf.doc.models import (Document, DocEvent, LastCallDocEvent, ConsensusDocEvent, RelatedDocument,
+    TelechatDocEvent, STATUSCHANGE_RELATIONS)
 from ietf.iesg.models import TelechatDate, TelechatAgendaItem, TelechatAgendaContent
 from ietf.review.utils import review_assignments_to_list_for_docs
 from ietf.utils.timezone import date_today, make_aware
 
+# Changes renew the agenda_data_version(), the timeout only needs to pick up
+# changes to other things, such as group or person names.
+AGENDA_DATA_CACHE_TIMEOUT = 60 * 60
+
 def get_agenda_date(date=None):
     if not date:
         try:
@@ -65,7 +72,10 @@ def get_doc_section(doc):
 
     elif doc.type_id == 'statchg':
         protocol_action = False
-        for relation in doc.relateddocument_set.filter(relationship__slug__in=('tops','tois','tohist','toinf','tobcp','toexp')):
+        relations = getattr(doc, "agenda_relations", None)
+        if relations is None:
+            relations = doc.relateddocument_set.filter(relationship__slug__in=STATUSCHANGE_RELATIONS)
+        for relation in relations:
             if relation.relationship_id in ('tops','tois') or relation.target.std_level_id in ('std','ds','ps'):
                 protocol_action = True
         if protocol_action:
@@ -152,20 +162,46 @@ def fill_in_agenda_administrivia(date, sections):
             text = ""
         sections[s]["text"] = text
 
+def latest_events_by_doc(docs, model=DocEvent, **filter_args):
+    """Get the latest event of each of docs matching the filter arguments, like
+    doc.latest_event(model, **filter_args), with one query. Returns a dict from
+    document id to event."""
+    latest = {}
+    for e in model.objects.filter(doc__in=docs, **filter_args).order_by('-time', '-id'):
+        latest.setdefault(e.doc_id, e)
+    return latest
+
 def fill_in_agenda_docs(date, sections, docs=None):
     if not docs:
         docs = Document.objects.filter(docevent__telechatdocevent__telechat_date=date)
-        docs = docs.select_related("stream", "group").distinct()
-        fill_in_telechat_date(docs)
+        docs = docs.select_related("stream", "group", "intended_std_level").prefetch_related("states").distinct()
+    docs = list(docs)
+
+    # look up what the agenda needs for all the documents at once
+    telechat_events = latest_events_by_doc(docs, TelechatDocEvent, type="scheduled_for_telechat")
+    docs = [d for d in docs if d.pk in telechat_events and d.telechat_date(telechat_events[d.pk]) == date]
+    started_events = latest_events_by_doc(docs, type="started_iesg_process")
+    drafts = [d for d in docs if d.type_id == "draft"]
+    last_call_events = latest_events_by_doc(drafts, LastCallDocEvent, type="sent_last_call")
+    consensus_events = latest_events_by_doc(drafts, ConsensusDocEvent, type="changed_consensus")
+    prefetch_related_objects(
+        [d for d in docs if d.type_id in ("statchg", "conflrev")],
+        Prefetch(
+            "relateddocument_set",
+            queryset=RelatedDocument.objects.filter(
+                relationship__in=STATUSCHANGE_RELATIONS + ("conflrev",)
+            ).select_related("target", "target__stream", "target__intended_std_level"),
+            to_attr="agenda_relations",
+        ),
+    )
 
     review_assignments_for_docs = review_assignments_to_list_for_docs(docs)
 
     for doc in docs:
-        if doc.telechat_date() != date:
-            continue
+        doc._cached_returning_item = telechat_events[doc.pk].returning_item
 
         if not hasattr(doc, 'balloting_started'):
-            e = doc.latest_event(type="started_iesg_process")
+            e = started_events.get(doc.pk)
             doc.balloting_started = e.time if e else datetime.datetime.min
 
         if doc.type_id == "draft":
@@ -174,19 +210,20 @@ def fill_in_agenda_docs(date, sections, docs=None):
                 doc.iana_review_state = str(s)
 
             if doc.get_state_slug("draft-iesg") == "lc":
-                e = doc.latest_event(LastCallDocEvent, type="sent_last_call")
+                e = last_call_events.get(doc.pk)
                 if e:
                     doc.lastcall_expires = e.expires
 
+            doc.consensus_event = consensus_events.get(doc.pk)
             if doc.stream_id in ("ietf", "irtf", "iab"):
                 doc.consensus = "Unknown"
-                e = doc.latest_event(ConsensusDocEvent, type="changed_consensus")
+                e = doc.consensus_event
                 if e and (e.consensus != None):
                     doc.consensus = "Yes" if e.consensus else "No"
 
             doc.review_assignments = review_assignments_for_docs.get(doc.name, [])
         elif doc.type_id == "conflrev":
-            doc.conflictdoc = doc.relateddocument_set.get(relationship__slug='conflrev').target
+            doc.conflictdoc = next((r.target for r in doc.agenda_relations if r.relationship_id == "conflrev"), None)
         elif doc.type_id == "charter":
             pass
 
@@ -210,13 +247,40 @@ def fill_in_agenda_management_issues(date, sections):
     for i, item in enumerate(TelechatAgendaItem.objects.filter(type=3).order_by('id'), start=1):
         sections[s % i] = { "title": item.title, "text": item.text }
 
+def agenda_data_version(renew=False):
+    """Get the version token for the telechat agenda snapshots
+
+    The token is part of the agenda_data() cache key. It is renewed when documents,
+    ballots or agenda content that may show up on a telechat agenda change.
+
+    :renew: True to replace the token with a new one
+    """
+    cache = caches["default"]
+    cache_key = "iesg_agenda_data_version"
+    version = None if renew else cache.get(cache_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(cache_key, version, timeout=None)
+    return version
+
 def agenda_data(date=None):
-    """Return a dict with the different IESG telechat agenda components."""
+    """Return a dict with the different IESG telechat agenda components.
+
+    The result is a snapshot kept in the default cache for each telechat date, from
+    which all the agenda formats are rendered. Every call returns a fresh copy, so
+    callers may modify it.
+    """
     date = get_agenda_date(date)
-    sections = agenda_sections()
+    cache = caches["default"]
+    cache_key = f"iesg_agenda_data_{date.isoformat()}_{agenda_data_version()}"
+    data = cache.get(cache_key)
+    if data is None:
+        sections = agenda_sections()
 
-    fill_in_agenda_administrivia(date, sections)
-    fill_in_agenda_docs(date, sections)
-    fill_in_agenda_management_issues(date, sections)
+        fill_in_agenda_administrivia(date, sections)
+        fill_in_agenda_docs(date, sections)
+        fill_in_agenda_management_issues(date, sections)
 
-    return { 'date': date.isoformat(), 'sections': sections }
+        data = { 'date': date.isoformat(), 'sections': sections }
+        cache.set(cache_key, data, timeout=AGENDA_DATA_CACHE_TIMEOUT)
+    return data
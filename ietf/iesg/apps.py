@@ -0,0 +1,12 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.apps import AppConfig
+
+
+class IesgConfig(AppConfig):
+    name = "ietf.iesg"
+
+    def ready(self):
+        """Initialize the app after the registry is populated"""
+        # implicitly connects @receiver-decorated signals
+        from . import signals  # pyflakes: ignore
@@ -0,0 +1,53 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from ietf.doc.models import DocEvent, Document, RelatedDocument
+from ietf.review.models import ReviewAssignment
+from .agenda import agenda_data_version
+from .models import TelechatAgendaContent, TelechatAgendaItem, TelechatDate
+
+# Types of the documents that can be on a telechat agenda
+AGENDA_DOC_TYPES = ("draft", "charter", "statchg", "conflrev")
+
+
+def affects_agenda(instance):
+    """Whether a change to instance may change a telechat agenda"""
+    if isinstance(instance, (TelechatAgendaContent, TelechatAgendaItem, TelechatDate, ReviewAssignment)):
+        return True
+    elif isinstance(instance, DocEvent):  # includes telechat, ballot and last call events
+        return instance.doc.type_id in AGENDA_DOC_TYPES
+    elif isinstance(instance, Document):
+        return instance.type_id in AGENDA_DOC_TYPES
+    elif isinstance(instance, RelatedDocument):
+        return instance.source.type_id in AGENDA_DOC_TYPES
+    return False
+
+
+def agenda_changed():
+    """Renew the agenda data version once the change is visible to other requests"""
+    transaction.on_commit(lambda: agenda_data_version(renew=True))
+
+
+# dispatch_uid ensures only a single signal receiver binding is made
+@receiver([post_save, post_delete], dispatch_uid="iesg_agenda_changed_receiver_uid")
+def agenda_changed_receiver(sender, instance, raw=False, **kwargs):
+    """Call agenda_changed after a change that may affect a telechat agenda"""
+    if raw:
+        return
+    try:
+        changed = affects_agenda(instance)
+    except ObjectDoesNotExist:
+        changed = True  # related objects are already gone, e.g., when deleting a document
+    if changed:
+        agenda_changed()
+
+
+@receiver(m2m_changed, sender=Document.states.through, dispatch_uid="iesg_agenda_states_changed_receiver_uid")
+def agenda_states_changed_receiver(sender, instance, action, reverse, **kwargs):
+    """Call agenda_changed after the states of a document change"""
+    if action.startswith("post_") and (reverse or affects_agenda(instance)):
+        agenda_changed()
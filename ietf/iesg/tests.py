@@ -10,6 +10,8 @@
 from pyquery import PyQuery
 
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse as urlreverse
 from django.utils.encoding import force_bytes
 from django.utils.html import escape
@@ -26,6 +28,7 @@
 from ietf.iesg.models import TelechatDate, TelechatAgendaContent
 from ietf.name.models import StreamName, TelechatAgendaSectionName
 from ietf.person.models import Person
+from ietf.review.models import ReviewCandidate
 from ietf.utils.test_utils import TestCase, login_testing_unauthorized, unicontent
 from ietf.iesg.factories import IESGMgmtItemFactory, TelechatAgendaContentFactory
 from ietf.utils.timezone import date_today, DEADLINE_TZINFO
@@ -405,6 +408,51 @@ def test_fill_in_agenda_docs(self):
             s = "6." + str(i)
             self.assertEqual(mi.title, agenda_data(date_str)["sections"][s]['title'])
 
+    def test_agenda_data_queries(self):
+        date = get_agenda_date()
+        with CaptureQueriesContext(connection) as queries:
+            agenda_data()
+
+        # the number of queries doesn't grow with the number of documents
+        by = Person.objects.get(name="Areað Irector")
+        drafts = WgDraftFactory.create_batch(5, states=[("draft", "active"), ("draft-iesg", "iesg-eva")])
+        for draft in drafts:
+            TelechatDocEvent.objects.create(type="scheduled_for_telechat", doc=draft, rev=draft.rev, by=by,
+                                            telechat_date=date, returning_item=False)
+        with self.assertNumQueries(len(queries)):
+            data = agenda_data()
+        for draft in drafts:
+            self.assertIn(draft, data["sections"]["3.1.1"]["docs"])
+        conflrev = self.telechat_docs["conflrev"]
+        self.assertIn(conflrev, data["sections"]["3.4.2"]["docs"])
+        self.assertEqual(
+            next(d for d in data["sections"]["3.4.2"]["docs"] if d == conflrev).conflictdoc,
+            self.telechat_docs["ise_draft"],
+        )
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_agenda_data_snapshot(self):
+        draft = self.telechat_docs["ietf_draft"]
+        data = agenda_data()
+        self.assertIn(draft, data["sections"]["2.1.3"]["docs"])
+        data["sections"]["1.1"]["title"] = "Changed by a view"
+
+        # the snapshot is reused, and callers get their own copy of it
+        with self.assertNumQueries(1):  # for the agenda date
+            data = agenda_data()
+        self.assertIn(draft, data["sections"]["2.1.3"]["docs"])
+        self.assertEqual(data["sections"]["1.1"]["title"], "Roll call")
+        r = self.client.get(urlreverse("ietf.iesg.views.agenda_json"))
+        self.assertEqual(r.status_code, 200)
+        self.assertIn(draft.name, [d["docname"] for d in r.json()["sections"]["2.1.3"]["docs"]])
+
+        # changes to the telechat documents renew the snapshot
+        with self.captureOnCommitCallbacks(execute=True):
+            TelechatDocEvent.objects.create(type="scheduled_for_telechat", doc=draft, rev=draft.rev,
+                                            by=Person.objects.get(name="Areað Irector"), telechat_date=None)
+        sections = agenda_data()["sections"]
+        self.assertNotIn(draft, [d for s in sections.values() for d in s.get("docs", [])])
+
     def test_feed(self):
         r = self.client.get("/feed/iesg-agenda/")
         self.assertEqual(r.status_code, 200)
@@ -632,6 +680,7 @@ def test_admin_change(self):
         self.assertRedirects(r, urlreverse('admin:iesg_telechatdate_changelist'))
         draft = Document.objects.get(name="draft-ietf-mars-test")
         self.assertEqual(draft.telechat_date(),today)
+        self.assertEqual(ReviewCandidate.objects.get(doc=draft).telechat_date, today)
 
 class IESGAgendaTelechatPagesTests(TestCase):
     def setUp(self):
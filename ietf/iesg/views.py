@@ -56,7 +56,7 @@
 
 import debug               # pyflakes:ignore
 
-from ietf.doc.models import Document, State, LastCallDocEvent, ConsensusDocEvent, DocEvent, IESG_BALLOT_ACTIVE_STATES
+from ietf.doc.models import Document, State, DocEvent, IESG_BALLOT_ACTIVE_STATES
 from ietf.doc.utils import update_telechat, augment_events_with_revision
 from ietf.group.models import GroupMilestone, Role
 from ietf.iesg.agenda import agenda_data, agenda_sections, fill_in_agenda_docs, get_agenda_date
@@ -156,21 +156,18 @@ def agenda_json(request, date=None):
                     if iana_state and iana_state.slug in ("not-ok", "changed", "need-rev"):
                         docinfo['iana-review-state'] = str(iana_state)
 
-                    if doc.get_state_slug("draft-iesg") == "lc":
-                        e = doc.latest_event(LastCallDocEvent, type="sent_last_call")
-                        if e:
-                            docinfo['lastcall-expires'] = e.expires.strftime("%Y-%m-%d")
+                    if hasattr(doc, "lastcall_expires"):
+                        docinfo['lastcall-expires'] = doc.lastcall_expires.strftime("%Y-%m-%d")
 
                     docinfo['consensus'] = None
-                    e = doc.latest_event(ConsensusDocEvent, type="changed_consensus")
-                    if e:
-                        docinfo['consensus'] = e.consensus
+                    if doc.consensus_event:
+                        docinfo['consensus'] = doc.consensus_event.consensus
 
                     docinfo['rfc-ed-note'] = doc.has_rfc_editor_note()
 
                 elif doc.type_id == 'conflrev':
                     docinfo['rev'] = doc.rev
-                    td = doc.relateddocument_set.get(relationship__slug='conflrev').target
+                    td = doc.conflictdoc
                     docinfo['target-docname'] = td.name
                     docinfo['target-title'] = td.title
                     docinfo['target-rev'] = td.rev
@@ -6,7 +6,7 @@
 
 from django import forms
 
-from ietf.mailtrigger.models import MailTrigger
+from ietf.mailtrigger.models import MailTrigger, batched_expansion
 
 class CcSelectForm(forms.Form):
     expansions = dict()                 # type: Dict[str, List[str]]
@@ -20,8 +20,9 @@ def __init__(self, mailtrigger_slug, mailtrigger_context, *args, **kwargs):
         super(CcSelectForm,self).__init__(*args,**kwargs)
         mailtrigger = MailTrigger.objects.get(slug=mailtrigger_slug) 
         
-        for r in mailtrigger.cc.all():
-            self.expansions[r.slug] = r.gather(**mailtrigger_context)
+        with batched_expansion():
+            for r in mailtrigger.cc.all():
+                self.expansions[r.slug] = r.gather(**mailtrigger_context)
 
         non_empty_expansions = [x for x in self.expansions if self.expansions[x]]
         self.fields['cc_choices'].initial = non_empty_expansions
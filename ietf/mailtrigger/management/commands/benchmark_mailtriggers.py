@@ -0,0 +1,72 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from ietf.doc.models import Document
+from ietf.mailtrigger.models import MailTrigger
+from ietf.mailtrigger.utils import gather_address_lists
+
+
+class Command(BaseCommand):
+    help = "Time gather_address_lists() for the mailtriggers with the most recipients"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-r", "--repeat", type=int, default=5,
+            help="Number of times to gather the addresses for each mailtrigger (default: 5)",
+        )
+        parser.add_argument(
+            "-n", "--count", type=int, default=10,
+            help="Number of mailtriggers to benchmark, those with the most recipients first (default: 10)",
+        )
+        parser.add_argument(
+            "--trigger", dest="triggers", action="append",
+            help="Slug of a mailtrigger to benchmark, may be repeated (default: the busiest ones)",
+        )
+        parser.add_argument(
+            "--doc",
+            help="Name of the draft to gather addresses for (default: the most recently changed active WG draft)",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("Need at least one repetition")
+        if options["doc"]:
+            doc = Document.objects.filter(name=options["doc"]).first()
+        else:
+            doc = Document.objects.filter(
+                type_id="draft", states__type="draft", states__slug="active", group__type="wg"
+            ).order_by("-time").first()
+        if doc is None:
+            raise CommandError("No document to gather addresses for")
+
+        triggers = MailTrigger.objects.annotate(
+            recipients=Count("to", distinct=True) + Count("cc", distinct=True)
+        ).order_by("-recipients", "slug")
+        if options["triggers"]:
+            triggers = triggers.filter(slug__in=options["triggers"])
+        else:
+            triggers = triggers[:options["count"]]
+
+        self.stdout.write(f"Gathering addresses for {doc.name}")
+        self.stdout.write(f"{'mailtrigger':<40} {'recipients':>10} {'queries':>8} {'median ms':>10} {'max ms':>8}")
+        total = 0.0
+        for trigger in triggers:
+            timings = []
+            for _ in range(options["repeat"]):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    gather_address_lists(trigger.slug, doc=doc, group=doc.group)
+                    timings.append(time.perf_counter() - start)
+            total += sum(timings) / len(timings)
+            self.stdout.write(
+                f"{trigger.slug:<40} {trigger.recipients:>10} {len(queries):>8} "
+                f"{statistics.median(timings) * 1000:>10.1f} {max(timings) * 1000:>8.1f}"
+            )
+        self.stdout.write(f"Mean time for all {len(triggers)} mailtriggers together: {total * 1000:.1f} ms")
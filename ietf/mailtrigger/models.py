@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 
 
+from contextlib import contextmanager
+
 from django.db import models
 from django.template import Template, Context
 
@@ -12,6 +14,7 @@
 from ietf.group.models import Group, Role
 from ietf.person.models import Email, Alias
 from ietf.review.models import ReviewTeamSettings
+from ietf.utils.request_cache import request_cache, request_cache_entries
 
 import debug                            # pyflakes:ignore
 
@@ -57,11 +60,22 @@ def __str__(self):
         return self.slug
 
     def gather(self, **kwargs):
+        expansion = _batched_expansion_entries()
+        if expansion is None:
+            return self._gather(**kwargs)
+        key = (self.slug, tuple(sorted((k, _expansion_key(v)) for k, v in kwargs.items())))
+        if not key in expansion:
+            # keep kwargs alive, so the ids in the key can't be reused
+            expansion[key] = (kwargs, self._gather(**kwargs))
+        return list(expansion[key][1])
+
+    def _gather(self, **kwargs):
         retval = []
-        if hasattr(self,'gather_%s'%self.slug):
-            retval.extend(eval('self.gather_%s(**kwargs)'%self.slug))
+        gatherer = GATHERERS.get(self.slug)
+        if gatherer:
+            retval.extend(gatherer(self, **kwargs))
         if self.template:
-            rendering = Template('{%% autoescape off %%}%s{%% endautoescape %%}'%self.template).render(Context(kwargs))
+            rendering = compiled_template(self.template).render(Context(kwargs))
             if rendering:
                 retval.extend( get_email_addresses_from_text(rendering) )
 
@@ -96,28 +110,28 @@ def gather_doc_affecteddoc_authors(self, **kwargs):
         addrs = []
         if 'doc' in kwargs:
             for reldoc in kwargs['doc'].related_that_doc(('conflrev','tohist','tois','tops')):
-                addrs.extend(Recipient.objects.get(slug='doc_authors').gather(**{'doc':reldoc}))
+                addrs.extend(get_recipient('doc_authors').gather(**{'doc':reldoc}))
         return addrs
 
     def gather_doc_affecteddoc_group_chairs(self, **kwargs):
         addrs = []
         if 'doc' in kwargs:
             for reldoc in kwargs['doc'].related_that_doc(('conflrev','tohist','tois','tops')):
-                addrs.extend(Recipient.objects.get(slug='doc_group_chairs').gather(**{'doc':reldoc}))
+                addrs.extend(get_recipient('doc_group_chairs').gather(**{'doc':reldoc}))
         return addrs
 
     def gather_doc_affecteddoc_notify(self, **kwargs):
         addrs = []
         if 'doc' in kwargs:
             for reldoc in kwargs['doc'].related_that_doc(('conflrev','tohist','tois','tops')):
-                addrs.extend(Recipient.objects.get(slug='doc_notify').gather(**{'doc':reldoc}))
+                addrs.extend(get_recipient('doc_notify').gather(**{'doc':reldoc}))
         return addrs
 
     def gather_conflict_review_stream_manager(self, **kwargs):
         addrs = []
         if 'doc' in kwargs:
             for reldoc in kwargs['doc'].related_that_doc(('conflrev',)):
-                addrs.extend(Recipient.objects.get(slug='doc_stream_manager').gather(**{'doc':reldoc}))
+                addrs.extend(get_recipient('doc_stream_manager').gather(**{'doc':reldoc}))
         return addrs
 
     def gather_conflict_review_steering_group(self,**kwargs):
@@ -153,7 +167,7 @@ def gather_stream_managers(self, **kwargs):
     def gather_doc_stream_manager(self, **kwargs):
         addrs = []
         if 'doc' in kwargs:
-            addrs.extend(Recipient.objects.get(slug='stream_managers').gather(**{'streams':[kwargs['doc'].stream_id]}))
+            addrs.extend(get_recipient('stream_managers').gather(**{'streams':[kwargs['doc'].stream_id]}))
         return addrs
 
     def gather_doc_non_ietf_stream_manager(self, **kwargs):
@@ -161,7 +175,7 @@ def gather_doc_non_ietf_stream_manager(self, **kwargs):
         if 'doc' in kwargs:
             doc = kwargs['doc']
             if doc.stream_id and doc.stream_id != 'ietf':
-                addrs.extend(Recipient.objects.get(slug='stream_managers').gather(**{'streams':[doc.stream_id,]}))
+                addrs.extend(get_recipient('stream_managers').gather(**{'streams':[doc.stream_id,]}))
         return addrs
 
     def gather_group_responsible_directors(self, **kwargs):
@@ -171,9 +185,9 @@ def gather_group_responsible_directors(self, **kwargs):
             if not group.acronym=='none':
                 addrs.extend(group.role_set.filter(name='ad').values_list('email__address',flat=True))
             if group.type_id=='rg':
-                addrs.extend(Recipient.objects.get(slug='stream_managers').gather(**{'streams':['irtf']}))
+                addrs.extend(get_recipient('stream_managers').gather(**{'streams':['irtf']}))
             elif group.type_id=='program':
-                addrs.extend(Recipient.objects.get(slug='iab').gather(**{}))
+                addrs.extend(get_recipient('iab').gather(**{}))
         return addrs
 
     def gather_group_secretaries(self, **kwargs):
@@ -207,7 +221,7 @@ def gather_doc_group_responsible_directors(self, **kwargs):
         if 'doc' in kwargs:
             group = kwargs['doc'].group
             if group and not group.acronym=='none':
-                addrs.extend(Recipient.objects.get(slug='group_responsible_directors').gather(**{'group':group}))
+                addrs.extend(get_recipient('group_responsible_directors').gather(**{'group':group}))
         return addrs
 
     def gather_submission_authors(self, **kwargs):
@@ -244,7 +258,7 @@ def gather_submission_group_chairs(self, **kwargs):
         if 'submission' in kwargs: 
             submission = kwargs['submission']
             if submission.group: 
-                addrs.extend(Recipient.objects.get(slug='group_chairs').gather(**{'group':submission.group}))
+                addrs.extend(get_recipient('group_chairs').gather(**{'group':submission.group}))
         return addrs
 
     def gather_sub_group_parent_directors(self, **kwargs):
@@ -253,8 +267,7 @@ def gather_sub_group_parent_directors(self, **kwargs):
             submission = kwargs['submission']
             if submission.group and submission.group.parent:
                 addrs.extend(
-                    Recipient.objects.get(
-                        slug='group_responsible_directors').gather(group=submission.group.parent)
+                    get_recipient('group_responsible_directors').gather(group=submission.group.parent)
                 )
         return addrs
 
@@ -263,8 +276,7 @@ def gather_doc_group_parent_directors(self, **kwargs):
         doc = kwargs.get('doc')
         if doc and doc.group and doc.group.parent:
             addrs.extend(
-                Recipient.objects.get(
-                    slug='group_responsible_directors').gather(group=doc.group.parent)
+                get_recipient('group_responsible_directors').gather(group=doc.group.parent)
             )
         return addrs
 
@@ -288,13 +300,13 @@ def gather_submission_confirmers(self, **kwargs):
 
                 if doc.group and old_author_email_set != new_author_email_set:
                     if doc.group.features.acts_like_wg:
-                        addrs.extend(Recipient.objects.get(slug='group_chairs').gather(**{'group':doc.group}))
+                        addrs.extend(get_recipient('group_chairs').gather(**{'group':doc.group}))
                     elif doc.group.type_id in ['area']:
-                        addrs.extend(Recipient.objects.get(slug='group_responsible_directors').gather(**{'group':doc.group}))
+                        addrs.extend(get_recipient('group_responsible_directors').gather(**{'group':doc.group}))
                     else:
                         pass
                     if doc.stream_id and doc.stream_id not in ['ietf']:
-                        addrs.extend(Recipient.objects.get(slug='stream_managers').gather(**{'streams':[doc.stream_id]}))
+                        addrs.extend(get_recipient('stream_managers').gather(**{'streams':[doc.stream_id]}))
             else:
                 # This is a bit roundabout, but we do it to get consistent and unicode-compliant
                 # email names for known persons, without relying on the name parsed from the
@@ -311,7 +323,7 @@ def gather_submission_group_mail_list(self, **kwargs):
         if 'submission' in kwargs:
             submission = kwargs['submission']
             if submission.group:  
-                addrs.extend(Recipient.objects.get(slug='group_mail_list').gather(**{'group':submission.group}))
+                addrs.extend(get_recipient('group_mail_list').gather(**{'group':submission.group}))
         return addrs
 
     def gather_rfc_editor_if_doc_in_queue(self, **kwargs):
@@ -319,7 +331,7 @@ def gather_rfc_editor_if_doc_in_queue(self, **kwargs):
         if 'doc' in kwargs:
             doc = kwargs['doc']
             if doc.get_state_slug("draft-rfceditor") is not None:
-                addrs.extend(Recipient.objects.get(slug='rfc_editor').gather(**{}))
+                addrs.extend(get_recipient('rfc_editor').gather(**{}))
         return addrs
 
     def gather_doc_discussing_ads(self, **kwargs):
@@ -362,11 +374,11 @@ def gather_doc_ipr_group_or_ad(self, **kwargs):
             doc=kwargs['doc']
             if doc.group and doc.group.acronym == 'none':
                 if doc.ad and doc.get_state_slug('draft')=='active':
-                    addrs.extend(Recipient.objects.get(slug='doc_ad').gather(**kwargs))
+                    addrs.extend(get_recipient('doc_ad').gather(**kwargs))
                 else:
                     pass
             else:
-                addrs.extend(Recipient.objects.get(slug='doc_group_mail_list').gather(**kwargs)) 
+                addrs.extend(get_recipient('doc_group_mail_list').gather(**kwargs)) 
         return addrs
 
     def gather_liaison_manager(self, **kwargs):
@@ -415,8 +427,8 @@ def gather_bofreq_responsible(self, **kwargs):
                 if responsible:
                     addrs.extend([leader.email_address() for leader in responsible])
                 else:
-                    addrs.extend(Recipient.objects.get(slug='iab').gather(**{}))
-                    addrs.extend(Recipient.objects.get(slug='iesg').gather(**{}))
+                    addrs.extend(get_recipient('iab').gather(**{}))
+                    addrs.extend(get_recipient('iesg').gather(**{}))
         return addrs
 
     def gather_bofreq_previous_responsible(self, **kwargs):
@@ -427,7 +439,67 @@ def gather_bofreq_previous_responsible(self, **kwargs):
         if previous_responsible:
             addrs = [p.email_address() for p in previous_responsible]
         else:
-            addrs.extend(Recipient.objects.get(slug='iab').gather(**{}))
-            addrs.extend(Recipient.objects.get(slug='iesg').gather(**{}))
-        return addrs
-
+            addrs.extend(get_recipient('iab').gather(**{}))
+            addrs.extend(get_recipient('iesg').gather(**{}))
+        return addrs
+
+
+# Recipients with a gather_<slug> method, by slug
+GATHERERS = {
+    name[len('gather_'):]: method
+    for name, method in vars(Recipient).items()
+    if name.startswith('gather_') and callable(method)
+}
+
+_compiled_templates = {}
+
+def compiled_template(text):
+    """Return the Template for a Recipient's template text, parsing it only once"""
+    template = _compiled_templates.get(text)
+    if template is None:
+        template = Template('{%% autoescape off %%}%s{%% endautoescape %%}' % text)
+        _compiled_templates[text] = template
+    return template
+
+def _expansion_key(value):
+    if isinstance(value, models.Model) and value.pk is not None:
+        return (type(value), value.pk)
+    if isinstance(value, (list, tuple)):
+        return tuple(_expansion_key(v) for v in value)
+    if value is None or isinstance(value, (str, int)):
+        return value
+    return id(value)
+
+@contextmanager
+def batched_expansion():
+    """Share Recipient lookups and expansions between the gather() calls in a block
+
+    Inside the block, get_recipient() loads all the Recipients with a single query,
+    and each Recipient is expanded only once for the same arguments. Blocks may be
+    nested; the outermost one wins.
+
+    The expansions are kept in a request_cache() block of their own, so they are
+    not shared with expansions made before or after the block in the same request,
+    which may have other results if the request changes things in between.
+    """
+    if _batched_expansion_entries() is not None:
+        yield
+        return
+    with request_cache():
+        request_cache_entries("expansion", Recipient, None)
+        yield
+
+def _batched_expansion_entries():
+    """The expansions made in the current batched_expansion() block, if any"""
+    return request_cache_entries("expansion", Recipient, None, create=False)
+
+def get_recipient(slug):
+    expansion = _batched_expansion_entries()
+    if expansion is None:
+        return Recipient.objects.get(slug=slug)
+    if 'recipients' not in expansion:
+        expansion['recipients'] = { r.slug: r for r in Recipient.objects.all() }
+    try:
+        return expansion['recipients'][slug]
+    except KeyError:
+        raise Recipient.DoesNotExist("Recipient matching query does not exist.")
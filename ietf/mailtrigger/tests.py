@@ -2,8 +2,14 @@
 # -*- coding: utf-8 -*-
 
 
+from io import StringIO
+
+from django.core.management import call_command
 from django.urls import reverse as urlreverse
 
+from ietf.doc.factories import WgDraftFactory
+from ietf.mailtrigger.models import Recipient, batched_expansion, compiled_template, get_recipient
+from ietf.utils.request_cache import request_cache
 from ietf.utils.test_utils import TestCase
 
 class EventMailTests(TestCase):
@@ -32,3 +38,37 @@ def test_show_recipients(self):
         self.assertEqual(r.status_code, 200)
         self.assertContains(r, 'doc_group_mail_list')
 
+    def test_batched_expansion(self):
+        doc = WgDraftFactory()
+        recipients = list(Recipient.objects.filter(slug__in=['doc_authors', 'doc_ad', 'doc_group_chairs', 'doc_notify', 'doc_group_mail_list']))
+        expected = [r.gather(doc=doc) for r in recipients]
+
+        with batched_expansion():
+            with self.assertNumQueries(1):
+                self.assertEqual(get_recipient('iesg').slug, 'iesg')
+                self.assertEqual(get_recipient('iab').slug, 'iab')
+            with self.assertRaises(Recipient.DoesNotExist):
+                get_recipient('no-such-recipient')
+            self.assertEqual([r.gather(doc=doc) for r in recipients], expected)
+            with self.assertNumQueries(0):
+                self.assertEqual([r.gather(doc=doc) for r in recipients], expected)
+                with batched_expansion():  # nested blocks share the outermost one's expansions
+                    self.assertEqual(get_recipient('iesg').slug, 'iesg')
+                    self.assertEqual([r.gather(doc=doc) for r in recipients], expected)
+
+        # within a request, the expansions don't outlive the block
+        with request_cache():
+            with batched_expansion():
+                get_recipient('iesg')
+            with batched_expansion():
+                with self.assertNumQueries(1):
+                    get_recipient('iesg')
+
+        self.assertIs(compiled_template('{{doc.name}}'), compiled_template('{{doc.name}}'))
+
+    def test_benchmark_mailtriggers(self):
+        doc = WgDraftFactory()
+        out = StringIO()
+        call_command("benchmark_mailtriggers", "--repeat", "2", "--doc", doc.name, "--trigger", "iesg_ballot_saved", stdout=out)
+        self.assertIn(doc.name, out.getvalue())
+        self.assertIn("iesg_ballot_saved", out.getvalue())
@@ -4,7 +4,7 @@
 
 import debug  # pyflakes:ignore
 
-from ietf.mailtrigger.models import MailTrigger, Recipient
+from ietf.mailtrigger.models import MailTrigger, Recipient, batched_expansion
 from ietf.submit.models import Submission
 from ietf.utils.mail import excludeaddrs
 
@@ -32,7 +32,11 @@ def gather_address_lists(
     mailtrigger = get_mailtrigger(
         slug, create_from_slug_if_not_exists, desc_if_not_exists
     )
+    with batched_expansion():
+        return _gather_address_lists(mailtrigger, skipped_recipients, **kwargs)
 
+
+def _gather_address_lists(mailtrigger, skipped_recipients=None, **kwargs):
     to = set()
     for recipient in mailtrigger.to.all():
         to.update(recipient.gather(**kwargs))
@@ -142,10 +146,12 @@ def starts_with(prefix):
         relevant.update(starts_with("sub_"))
 
     rule_list = []
-    for mailtrigger in MailTrigger.objects.filter(slug__in=relevant):
-        addrs = gather_address_lists(mailtrigger.slug, **kwargs)
-        if addrs.to or addrs.cc:
-            rule_list.append((mailtrigger.slug, mailtrigger.desc, addrs.to, addrs.cc))
+    # expand the recipients shared by the triggers only once
+    with batched_expansion():
+        for mailtrigger in MailTrigger.objects.filter(slug__in=relevant).prefetch_related("to", "cc"):
+            addrs = _gather_address_lists(mailtrigger, **kwargs)
+            if addrs.to or addrs.cc:
+                rule_list.append((mailtrigger.slug, mailtrigger.desc, addrs.to, addrs.cc))
     return sorted(rule_list)
 
 
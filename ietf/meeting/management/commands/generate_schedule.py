@@ -6,12 +6,13 @@
 import calendar
 import datetime
 import math
+import multiprocessing
 import random
 import string
 import sys
 import time
 
-from collections import defaultdict
+from collections import ChainMap, defaultdict
 from functools import lru_cache
 from typing import NamedTuple, Optional
 from warnings import warn
@@ -66,6 +67,13 @@ def add_arguments(self, parser):
         parser.add_argument('-r', '--max-runs', type=int, dest='max_cycles',
                             default=OPTIMISER_MAX_CYCLES,
                             help='maximum optimiser runs')
+        parser.add_argument('-t', '--time-budget', type=float, default=None,
+                            help='maximum optimiser run time in seconds (default is no limit)')
+        parser.add_argument('-w', '--workers', type=int, default=1,
+                            help=(
+                                'number of independent optimisers to run in parallel processes, '
+                                'the schedule with the lowest cost is saved (default is 1)'
+                            ))
         parser.add_argument('-b', '--base-schedule',
                             type=ScheduleId.from_str,
                             dest='base_id',
@@ -86,18 +94,69 @@ def add_arguments(self, parser):
                                 'Limit scheduling to specified purpose '
                                 '(use option multiple times to specify more than one purpose; default is all purposes)'
                             ))
+        parser.add_argument('--benchmark-costs', type=int, dest='benchmark_samples', default=None,
+                            metavar='SAMPLES',
+                            help=(
+                                'instead of generating a schedule, time the incremental cost calculation '
+                                'for SAMPLES random switches in the initial schedule against a full '
+                                'recalculation, and check that they agree'
+                            ))
+
+    def handle(self, meeting, name, max_cycles, verbosity, base_id, purposes, time_budget, workers,
+               benchmark_samples, *args, **kwargs):
+        if workers < 1:
+            raise CommandError('Number of workers must be at least 1')
+        if benchmark_samples is not None and benchmark_samples < 1:
+            raise CommandError('Need at least one sample to benchmark')
+        handler = ScheduleHandler(self.stdout, meeting, name, max_cycles, verbosity, base_id, purposes,
+                                  time_budget, workers)
+        if benchmark_samples is not None:
+            handler.benchmark_costs(benchmark_samples)
+        else:
+            handler.run()
+
+
+class OptimiserResult(NamedTuple):
+    """Outcome of an optimiser run in a worker process"""
+    seed: int
+    runs: int
+    cost: float
+    cost_trajectory: list
+    assignments: list  # (timeslot index, session index) tuples
+
+
+# Schedule and lists of its timeslots and sessions, set by ScheduleHandler._run_workers()
+# before the worker processes are forked.
+_worker_schedule = None
+
 
-    def handle(self, meeting, name, max_cycles, verbosity, base_id, purposes, *args, **kwargs):
-        ScheduleHandler(self.stdout, meeting, name, max_cycles, verbosity, base_id, purposes).run()
+def _optimise_in_worker(seed):
+    """Create and optimise a schedule in a worker process, using a random seed"""
+    schedule, timeslots, sessions = _worker_schedule
+    random.seed(seed)
+    schedule.verbosity = 0
+    schedule.fill_initial_schedule()
+    runs = schedule.optimise_schedule()
+    timeslot_index = {t: n for n, t in enumerate(timeslots)}
+    session_index = {s: n for n, s in enumerate(sessions)}
+    return OptimiserResult(
+        seed=seed,
+        runs=runs,
+        cost=schedule.calculate_dynamic_cost()[1],
+        cost_trajectory=schedule.cost_trajectory,
+        assignments=[(timeslot_index[t], session_index[s]) for t, s in schedule.schedule.items()],
+    )
 
 
 class ScheduleHandler(object):
     def __init__(self, stdout, meeting_number, name=None, max_cycles=OPTIMISER_MAX_CYCLES,
-                 verbosity=1, base_id=None, session_purposes=None):
+                 verbosity=1, base_id=None, session_purposes=None, time_budget=None, workers=1):
         self.stdout = stdout
         self.verbosity = verbosity
         self.name = name
         self.max_cycles = max_cycles
+        self.time_budget = time_budget
+        self.workers = workers
         self.session_purposes = session_purposes
         if meeting_number:
             try:
@@ -136,6 +195,35 @@ def __init__(self, stdout, meeting_number, name=None, max_cycles=OPTIMISER_MAX_C
 
     def run(self):
         """Schedule all sessions"""
+        if self.workers > 1:
+            violations, cost = self._run_workers()
+        else:
+            violations, cost = self._run_optimiser()
+
+        if self.verbosity >= 1 and violations:
+            self.stdout.write('Remaining violations:')
+            for v in violations:
+                self.stdout.write(v)
+                
+        self.schedule.optimise_timeslot_capacity()
+
+        self._save_schedule(cost)
+        return violations, cost
+
+    def benchmark_costs(self, samples):
+        """Time the incremental cost calculation against a full one, without saving a schedule"""
+        if len(list(self.schedule.free_timeslots)) < 2:
+            raise CommandError('Need at least two free timeslots to benchmark')
+        self.schedule.fill_initial_schedule()
+        incremental, full, mismatches = self.schedule.benchmark_cost_for_changes(samples)
+        self.stdout.write('Scored {} random switches: {:.3f} ms each incrementally, {:.3f} ms each in full '
+                          '({:.1f}x), {} mismatches'.format(samples, incremental * 1000, full * 1000,
+                                                           full / incremental if incremental else math.inf,
+                                                           mismatches))
+        return incremental, full, mismatches
+
+    def _run_optimiser(self):
+        """Create and optimise the schedule in this process"""
         beg_time = time.time()
         self.schedule.fill_initial_schedule()
         violations, cost = self.schedule.total_schedule_cost()
@@ -154,14 +242,47 @@ def run(self):
             vc = len(violations)
             self.stdout.write('Optimisation completed with %s violation%s, cost %s, %s runs in %dm %.2fs'
                                % (vc, '' if vc==1 else 's', intcomma(cost), runs, tot_time//60, tot_time%60))
-        if self.verbosity >= 1 and violations:
-            self.stdout.write('Remaining violations:')
-            for v in violations:
-                self.stdout.write(v)
-                
-        self.schedule.optimise_timeslot_capacity()
+        return violations, cost
 
-        self._save_schedule(cost)
+    def _run_workers(self):
+        """
+        Create and optimise schedules in parallel worker processes, each with its own
+        random seed, and keep the schedule with the lowest cost in self.schedule.
+        """
+        global _worker_schedule
+        timeslots = list(self.schedule.timeslots)
+        sessions = list(self.schedule.sessions)
+        seeds = [random.randrange(2 ** 32) for _ in range(self.workers)]
+        if self.verbosity >= 1:
+            self.stdout.write('Running {} optimisers in parallel worker processes'.format(self.workers))
+
+        beg_time = time.time()
+        # Workers are forked so they inherit the loaded schedule. They only work on the
+        # in-memory schedule and must not use the database connection of this process.
+        _worker_schedule = (self.schedule, timeslots, sessions)
+        try:
+            with multiprocessing.get_context('fork').Pool(self.workers) as pool:
+                results = pool.map(_optimise_in_worker, seeds)
+        finally:
+            _worker_schedule = None
+        end_time = time.time()
+        tot_time = end_time - beg_time
+
+        for worker, result in enumerate(results, start=1):
+            if self.verbosity >= 1:
+                self.stdout.write('Worker {} (seed {}): dynamic cost {:,} after {} runs'
+                                  .format(worker, result.seed, result.cost, result.runs))
+            if self.verbosity >= 2:
+                self.stdout.write('Worker {} dynamic cost after each run: {}'
+                                  .format(worker, ', '.join('{:,}'.format(c) for c in result.cost_trajectory)))
+
+        best_worker, best_result = min(enumerate(results, start=1), key=lambda r: r[1].cost)
+        self.schedule.schedule = {timeslots[t]: sessions[s] for t, s in best_result.assignments}
+        violations, cost = self.schedule.total_schedule_cost()
+        if self.verbosity >= 1:
+            vc = len(violations)
+            self.stdout.write('Optimisation completed with %s violation%s, cost %s, using schedule from worker %s, in %dm %.2fs'
+                               % (vc, '' if vc==1 else 's', intcomma(cost), best_worker, tot_time//60, tot_time%60))
         return violations, cost
     
     def _save_schedule(self, cost):
@@ -259,10 +380,23 @@ def _load_meeting(self):
             self.max_cycles,
             self.verbosity,
             self.base_schedule,
+            self.time_budget,
         )
         self.schedule.adjust_for_timeslot_availability()  # calculates some fixed costs
 
 
+def _in_time_order(timeslot_session_pairs):
+    """Sort (GeneratorTimeSlot, Session) tuples by start time, unscheduled timeslots last"""
+    return tuple(sorted(
+        timeslot_session_pairs,
+        key=lambda item: (
+            not item[0].is_scheduled,
+            item[0].start if item[0].is_scheduled else 0,
+            item[1].session_pk,
+        ),
+    ))
+
+
 class Schedule(object):
     """
     The Schedule object represents the schedule, and contains code to generate/optimise it.
@@ -270,7 +404,7 @@ class Schedule(object):
     Note that "timeslot" means the combination of a timeframe and a location.
     """
     def __init__(self, stdout, timeslots, sessions, business_constraint_costs,
-                 max_cycles, verbosity, base_schedule=None):
+                 max_cycles, verbosity, base_schedule=None, time_budget=None):
         self.stdout = stdout
         self.timeslots = timeslots
         self.sessions = sessions or []
@@ -282,7 +416,11 @@ def __init__(self, stdout, timeslots, sessions, business_constraint_costs,
         self._fixed_costs = dict()  # key = type of cost
         self._fixed_violations = dict()  # key = type of cost
         self.max_cycles = max_cycles
+        self.time_budget = time_budget  # seconds, or None for no limit
+        self.cost_trajectory = []  # dynamic cost after each optimiser run
         self.base_schedule = self._load_base_schedule(base_schedule) if base_schedule else None
+        self._cost_cache = None  # see _refresh_cost_cache()
+        self._affected_timeslots = None  # see _timeslots_affected_by()
 
     def __str__(self):
         return 'Schedule ({} timeslots, {} sessions, {} scheduled, {} in base schedule)'.format(
@@ -449,23 +587,148 @@ def calculate_dynamic_cost(self, schedule=None, include_fixed=False):
             schedule.update(self.base_schedule)
 
         violations, cost = [], 0
-        
-        # For performance, a few values are pre-calculated in bulk
-        group_sessions = defaultdict(set)
-        overlapping_sessions = defaultdict(set)
-        for timeslot, session in schedule.items():
-            group_sessions[session.group].add((timeslot, session))  # (timeslot, session), not just session!
-            overlapping_sessions[timeslot].update({schedule[t] for t in timeslot.overlaps if t in schedule})
-            
-        for timeslot, session in schedule.items():
-            session_violations, session_cost = session.calculate_cost(
-                schedule, timeslot, overlapping_sessions[timeslot], group_sessions[session.group], include_fixed
-            )
+        session_costs = self._calculate_session_costs(
+            schedule, schedule.keys(), self._group_timeslots(schedule), include_fixed
+        )
+        for session_violations, session_cost in session_costs.values():
             violations += session_violations
             cost += session_cost
 
         return violations, cost
 
+    @staticmethod
+    def _group_timeslots(schedule):
+        """Map each group to the timeslots in which it has a session in schedule"""
+        group_timeslots = defaultdict(list)
+        for timeslot, session in schedule.items():
+            group_timeslots[session.group].append(timeslot)
+        return group_timeslots
+
+    def _calculate_session_costs(self, schedule, timeslots, group_timeslots, include_fixed=False):
+        """
+        Calculate the cost of the sessions in the given timeslots of schedule,
+        which must already include the base schedule. group_timeslots maps each
+        group to the timeslots in which it has a session in schedule.
+        Returns a dict mapping each timeslot to a tuple of violations and cost.
+        """
+        costs = {}
+        group_sessions = {}  # for performance, built once per group
+        for timeslot in timeslots:
+            session = schedule[timeslot]
+            if session.group not in group_sessions:
+                group_sessions[session.group] = _in_time_order(
+                    (t, schedule[t]) for t in group_timeslots[session.group]
+                )
+            overlapping_sessions = {schedule[t] for t in timeslot.overlaps if t in schedule}
+            costs[timeslot] = session.calculate_cost(
+                schedule, timeslot, overlapping_sessions, group_sessions[session.group], include_fixed
+            )
+        return costs
+
+    def _refresh_cost_cache(self):
+        """
+        Calculate and cache the cost of each session in self.schedule, which is
+        used by _cost_for_changes() to score proposed changes incrementally.
+        Returns the dynamic cost of self.schedule.
+        """
+        schedule = dict(self.schedule)
+        if self.base_schedule is not None:
+            schedule.update(self.base_schedule)
+        group_timeslots = self._group_timeslots(schedule)
+        session_costs = self._calculate_session_costs(schedule, schedule.keys(), group_timeslots)
+        self._cost_cache = {
+            'schedule': schedule,
+            'group_timeslots': group_timeslots,
+            'costs': {timeslot: cost for timeslot, (_, cost) in session_costs.items()},
+        }
+        self._cost_cache['total'] = sum(self._cost_cache['costs'].values())
+        return self._cost_cache['total']
+
+    def _timeslots_affected_by(self, timeslot):
+        """
+        Timeslots whose session cost may change when the session in timeslot changes,
+        i.e. timeslot itself and all timeslots that overlap or are adjacent to it.
+        """
+        if self._affected_timeslots is None:
+            self._affected_timeslots = defaultdict(set)
+            for t in self.timeslots:
+                self._affected_timeslots[t].add(t)
+                for other in t.overlaps | t.adjacent:
+                    self._affected_timeslots[t].add(other)
+                    self._affected_timeslots[other].add(t)
+        return self._affected_timeslots[timeslot]
+
+    def _cost_for_changes(self, changes):
+        """
+        Calculate the dynamic cost of self.schedule with changes applied, without
+        applying them. changes maps timeslots to the session to place in them, or to
+        None to leave them empty. Only sessions in timeslots affected by the changes,
+        or of groups affected by the changes, are recalculated.
+        """
+        if self._cost_cache is None:
+            self._refresh_cost_cache()
+        current_schedule = self._cost_cache['schedule']
+        current_group_timeslots = self._cost_cache['group_timeslots']
+
+        proposed_schedule = dict(current_schedule)
+        affected_timeslots = set()
+        affected_groups = set()
+        for timeslot, session in changes.items():
+            affected_timeslots.update(self._timeslots_affected_by(timeslot))
+            if timeslot in current_schedule:
+                affected_groups.add(current_schedule[timeslot].group)
+            if session is None:
+                proposed_schedule.pop(timeslot, None)
+            else:
+                proposed_schedule[timeslot] = session
+                affected_groups.add(session.group)
+        if math.isinf(self._cost_cache['total']):
+            # infinite costs can not be subtracted, fall back to a full calculation
+            return self.calculate_dynamic_cost(proposed_schedule)[1]
+
+        changed_group_timeslots = {}
+        for group in affected_groups:
+            affected_timeslots.update(current_group_timeslots.get(group, []))
+            changed_group_timeslots[group] = (
+                [t for t in current_group_timeslots.get(group, []) if t not in changes]
+                + [t for t, s in changes.items() if s is not None and s.group == group]
+            )
+
+        old_cost = sum(self._cost_cache['costs'].get(t, 0) for t in affected_timeslots)
+        new_costs = self._calculate_session_costs(
+            proposed_schedule,
+            [t for t in affected_timeslots if t in proposed_schedule],
+            ChainMap(changed_group_timeslots, current_group_timeslots),
+        )
+        return self._cost_cache['total'] - old_cost + sum(cost for _, cost in new_costs.values())
+
+    def benchmark_cost_for_changes(self, samples):
+        """
+        Time _cost_for_changes() against a full calculate_dynamic_cost() of the same
+        proposed schedule, for switches of the sessions in random pairs of free timeslots.
+        Returns the mean time per switch of each, in seconds, and the number of switches
+        for which they did not agree.
+        """
+        self._cost_cache = None
+        free_timeslots = list(self.free_timeslots)
+        incremental = full = 0.0
+        mismatches = 0
+        for _ in range(samples):
+            timeslot1, timeslot2 = random.sample(free_timeslots, 2)
+            changes = {timeslot1: self.schedule.get(timeslot2), timeslot2: self.schedule.get(timeslot1)}
+            proposed_schedule = {t: s for t, s in self.schedule.items() if t not in changes}
+            proposed_schedule.update((t, s) for t, s in changes.items() if s is not None)
+
+            start = time.perf_counter()
+            incremental_cost = self._cost_for_changes(changes)
+            incremental += time.perf_counter() - start
+            start = time.perf_counter()
+            full_cost = self.calculate_dynamic_cost(proposed_schedule)[1]
+            full += time.perf_counter() - start
+            if incremental_cost != full_cost:
+                mismatches += 1
+        return incremental / samples, full / samples, mismatches
+
     def fill_initial_schedule(self):
         """
         Create an initial schedule, which is stored in self.schedule.
@@ -497,10 +760,8 @@ def fill_initial_schedule(self):
             random.shuffle(possible_slots)
             
             def timeslot_preference(t):
-                proposed_schedule = self.schedule.copy()
-                proposed_schedule[t] = session
                 return (
-                    self.calculate_dynamic_cost(proposed_schedule)[1],
+                    self._cost_for_changes({t: session}),
                     t.duration if t.is_scheduled else datetime.timedelta(hours=1000),  # unscheduled slots sort to the end
                     t.capacity if t.is_scheduled else math.inf,  # unscheduled slots sort to the end
                 )
@@ -528,13 +789,15 @@ def optimise_schedule(self):
         _shuffle_conflicted_sessions() and the continues.
          
         If the total schedule cost reaches 0 at any time, the schedule is perfect and the
-        optimiser returns. 
+        optimiser returns. The optimiser also stops after a run that ends after
+        self.time_budget seconds, if set.
         """
         last_run_violations = []
         best_cost = math.inf
         shuffle_next_run = False
         last_run_cost = None
         run_count = 0
+        deadline = time.time() + self.time_budget if self.time_budget else None
 
         for _ in range(self.max_cycles):
             run_count += 1
@@ -554,8 +817,9 @@ def optimise_schedule(self):
             for original_timeslot, session in items:
                 if session.is_fixed:
                     continue
-                best_cost = self.calculate_dynamic_cost()[1]
+                best_cost = self._refresh_cost_cache()
                 if best_cost == 0:
+                    self.cost_trajectory.append(best_cost)
                     if self.verbosity >= 1 and self.stdout.isatty():
                         sys.stderr.write('\n')
                     if self.verbosity >= 2:
@@ -580,18 +844,26 @@ def optimise_schedule(self):
             if last_run_cost == best_cost:
                 shuffle_next_run = True
             last_run_violations, last_run_cost = self.calculate_dynamic_cost()
+            self.cost_trajectory.append(last_run_cost)
             self._save(last_run_cost)
 
             if self.verbosity >= 1 and self.stdout.isatty():
                 sys.stderr.write('*' if last_run_cost == self.best_cost else '.')
                 sys.stderr.flush()
 
+            if deadline is not None and time.time() >= deadline:
+                if self.verbosity >= 2:
+                    self.stdout.write('Optimiser time budget of {}s used up after run {}'
+                                      .format(self.time_budget, run_count))
+                break
+
         if self.verbosity >= 1 and self.stdout.isatty():
             sys.stderr.write('\n')
         if self.verbosity >= 2:
             self.stdout.write('Optimiser did not find perfect schedule, using best schedule at dynamic cost {:,}'
                               .format(self.best_cost))
         self.schedule = self.best_schedule
+        self._cost_cache = None
 
         return run_count
 
@@ -648,34 +920,29 @@ def optimise_timeslot_capacity(self):
                     del self.schedule[new_timeslot]
                 elif new_session:
                     self.schedule[new_timeslot] = new_session
+                self._cost_cache = None
                 
             optimised_timeslots.add(timeslot)
             optimised_timeslots.update(timeslot_overlaps)    
 
     def _schedule_session(self, session, timeslot):
         self.schedule[timeslot] = session
+        self._cost_cache = None
 
     def _cost_for_switch(self, timeslot1, timeslot2):
         """
         Calculate the total cost of self.schedule, if the sessions in timeslot1 and timeslot2 
         would be switched. Does not perform the switch, self.schedule remains unchanged.
         """
-        proposed_schedule = self.schedule.copy()
-        session1 = proposed_schedule.get(timeslot1)
-        session2 = proposed_schedule.get(timeslot2)
+        session1 = self.schedule.get(timeslot1)
+        session2 = self.schedule.get(timeslot2)
         if session1 and not session1.fits_in_timeslot(timeslot2):
             return math.inf
         if session2 and not session2.fits_in_timeslot(timeslot1):
             return math.inf
-        if session1:
-            proposed_schedule[timeslot2] = session1
-        elif session2:
-            del proposed_schedule[timeslot2]
-        if session2:
-            proposed_schedule[timeslot1] = session2
-        elif session1:
-            del proposed_schedule[timeslot1]
-        return self.calculate_dynamic_cost(proposed_schedule)[1]
+        if timeslot1 == timeslot2:
+            return self._cost_for_changes({})
+        return self._cost_for_changes({timeslot1: session2, timeslot2: session1})
 
     def _switch_sessions(self, timeslot1, timeslot2) -> Optional['Session']:
         """
@@ -698,6 +965,7 @@ def _switch_sessions(self, timeslot1, timeslot2) -> Optional['Session']:
             self.schedule[timeslot1] = session2
         elif session1:
             del self.schedule[timeslot1]
+        self._cost_cache = None
         return session2
     
     def _save(self, cost):
@@ -1018,7 +1286,7 @@ def _calculate_cost_business_logic(self, overlapping_sessions):
     def _calculate_cost_my_other_sessions(self, my_sessions):
         """Calculate cost due to other sessions for same group
 
-        my_sessions is a set of (GeneratorTimeSlot, Session) tuples.
+        my_sessions is a tuple of (GeneratorTimeSlot, Session) tuples, in time order.
         """
         def sort_sessions(timeslot_session_pairs):
             return sorted(timeslot_session_pairs, key=lambda item: item[1].session_pk)
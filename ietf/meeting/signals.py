@@ -0,0 +1,69 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (FloorPlan, Meeting, Room, SchedTimeSessAssignment, SchedulingEvent, Session,
+    SessionPresentation, TimeSlot)
+from .utils import agenda_data_version
+
+# Seconds to wait before rebuilding the agenda data, so a burst of changes
+# results in a single rebuild.
+AGENDA_DATA_REFRESH_DELAY = 30
+
+
+def agenda_meeting_for(instance):
+    """Get the meeting whose agenda depends on instance, if any"""
+    if isinstance(instance, Meeting):
+        meeting = instance
+    elif isinstance(instance, (FloorPlan, Room, Session, TimeSlot)):
+        meeting = instance.meeting
+    elif isinstance(instance, (SchedulingEvent, SessionPresentation)):
+        meeting = instance.session.meeting
+    elif isinstance(instance, SchedTimeSessAssignment):
+        meeting = instance.schedule.meeting
+        official_schedule = meeting.schedule
+        if official_schedule is None or instance.schedule_id not in (official_schedule.pk, official_schedule.base_id):
+            return None  # changes to unofficial schedules do not show on the agenda
+    else:
+        return None
+    return meeting
+
+
+def agenda_data_changed(meeting):
+    """Renew the agenda data version of a meeting and queue a rebuild of its agenda data
+
+    The agenda data is only built for IETF meetings, but the version is also used by
+    agenda_ical for other meetings.
+    """
+    num = meeting.number
+    rebuild = meeting.type_id == "ietf"
+
+    def renew():
+        agenda_data_version(num, renew=True)
+        # kludge alert: queuing a celery task in response to a signal can cause unexpected attempts to
+        # start a Celery task during tests. To prevent this, don't queue a celery task if we're running
+        # tests.
+        if rebuild and settings.SERVER_MODE != "test":
+            from .tasks import agenda_data_refresh  # imports views, so not at app initialization
+            if caches["default"].add(f"agenda_data_refresh_pending_{num}", True, AGENDA_DATA_REFRESH_DELAY):
+                agenda_data_refresh.apply_async(kwargs={"num": num}, countdown=AGENDA_DATA_REFRESH_DELAY)
+
+    # Wrap in on_commit so the agenda data is not rebuilt before the change is visible
+    transaction.on_commit(renew)
+
+
+# dispatch_uid ensures only a single signal receiver binding is made
+@receiver([post_save, post_delete], dispatch_uid="agenda_data_changed_receiver_uid")
+def agenda_data_changed_receiver(sender, instance, **kwargs):
+    """Call agenda_data_changed after a change that affects the agenda data of a meeting"""
+    try:
+        meeting = agenda_meeting_for(instance)
+    except ObjectDoesNotExist:
+        return  # related objects are already gone, e.g., when deleting a whole meeting
+    if meeting is not None:
+        agenda_data_changed(meeting)
@@ -12,8 +12,12 @@
 
 
 @shared_task
-def agenda_data_refresh():
-    generate_agenda_data(force_refresh=True)
+def agenda_data_refresh(num=None):
+    """Refresh agenda data cache
+
+    If `num` is `None`, refreshes the agenda data for the current meeting.
+    """
+    generate_agenda_data(num=num, force_refresh=True)
 
 
 @shared_task
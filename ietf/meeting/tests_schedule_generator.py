@@ -87,6 +87,36 @@ def test_normal_schedule(self):
         schedule = self.meeting.schedule_set.get(name__startswith='auto-')
         self.assertEqual(schedule.assignments.count(), 13)
 
+    def test_parallel_workers(self):
+        self._create_basic_sessions()
+        generator = generate_schedule.ScheduleHandler(self.stdout, self.meeting.number, verbosity=2, workers=2)
+        violations, cost = generator.run()
+        self.assertEqual(violations, self.fixed_violations)
+        self.assertEqual(cost, self.fixed_cost)
+
+        self.stdout.seek(0)
+        output = self.stdout.read()
+        self.assertIn('Running 2 optimisers in parallel worker processes', output)
+        self.assertIn('Worker 1 dynamic cost after each run:', output)
+        self.assertIn('Worker 2 dynamic cost after each run:', output)
+        self.assertIn('using schedule from worker', output)
+
+        # only the winning schedule is saved
+        schedule = self.meeting.schedule_set.get(name__startswith='auto-')
+        self.assertEqual(schedule.assignments.count(), 13)
+
+    def test_time_budget(self):
+        self._create_basic_sessions()
+        for group in self.all_groups:  # make a perfect schedule impossible
+            Constraint.objects.create(meeting=self.meeting, source=group,
+                                      name_id='bethere', person=self.person1)
+        generator = generate_schedule.ScheduleHandler(self.stdout, self.meeting.number, verbosity=2,
+                                                      time_budget=0.001)
+        generator.run()
+        self.assertEqual(len(generator.schedule.cost_trajectory), 1)
+        self.stdout.seek(0)
+        self.assertIn('Optimiser time budget of 0.001s used up after run 1', self.stdout.read())
+
     def test_unresolvable_schedule(self):
         self._create_basic_sessions()
         for group in self.all_groups:
@@ -265,6 +295,43 @@ def test_base_schedule_dynamic_cost(self):
         )
 
 
+    def test_cost_for_switch_matches_full_calculation(self):
+        """Incremental switch costs should equal a full recalculation of the proposed schedule"""
+        self._create_basic_sessions()
+        handler = generate_schedule.ScheduleHandler(self.stdout, self.meeting.number, verbosity=0)
+        schedule = handler.schedule
+        schedule.fill_initial_schedule()
+
+        free_timeslots = list(schedule.free_timeslots)
+        for timeslot1 in free_timeslots:
+            for timeslot2 in free_timeslots:
+                session1 = schedule.schedule.get(timeslot1)
+                session2 = schedule.schedule.get(timeslot2)
+                if session1 and not session1.fits_in_timeslot(timeslot2):
+                    continue
+                if session2 and not session2.fits_in_timeslot(timeslot1):
+                    continue
+                proposed_schedule = {t: s for t, s in schedule.schedule.items() if t not in (timeslot1, timeslot2)}
+                if session1:
+                    proposed_schedule[timeslot2] = session1
+                if session2:
+                    proposed_schedule[timeslot1] = session2
+                self.assertEqual(
+                    schedule._cost_for_switch(timeslot1, timeslot2),
+                    schedule.calculate_dynamic_cost(proposed_schedule)[1],
+                )
+            # costs must stay correct after the schedule changes
+            schedule._switch_sessions(timeslot1, free_timeslots[0])
+
+    def test_benchmark_costs(self):
+        self._create_basic_sessions()
+        handler = generate_schedule.ScheduleHandler(self.stdout, self.meeting.number, verbosity=0)
+        incremental, full, mismatches = handler.benchmark_costs(20)
+        self.assertEqual(mismatches, 0)
+        self.assertGreater(full, 0)
+        self.assertIn('Scored 20 random switches', self.stdout.getvalue())
+        self.assertFalse(Schedule.objects.filter(meeting=self.meeting, name__startswith='auto-').exists())
+
     def _create_basic_sessions(self):
         for group in self.all_groups:
             SessionFactory(meeting=self.meeting, group=group, add_to_schedule=False, attendees=5,
@@ -12,7 +12,9 @@ class TaskTests(TestCase):
     def test_agenda_data_refresh(self, mock_generate):
         agenda_data_refresh()
         self.assertTrue(mock_generate.called)
-        self.assertEqual(mock_generate.call_args, call(force_refresh=True))
+        self.assertEqual(mock_generate.call_args, call(num=None, force_refresh=True))
+        agenda_data_refresh(num="120")
+        self.assertEqual(mock_generate.call_args, call(num="120", force_refresh=True))
 
     @patch("ietf.meeting.tasks.generate_proceedings_content")
     def test_proceedings_content_refresh_task(self, mock_generate):
@@ -26,6 +26,7 @@
 from django.urls import reverse as urlreverse
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import caches
 from django.core.serializers.json import DjangoJSONEncoder
 from django.test import Client, override_settings
 from django.db.models import F, Max
@@ -48,7 +49,7 @@
 from ietf.meeting.helpers import send_interim_minutes_reminder, populate_important_dates, update_important_dates
 from ietf.meeting.models import Session, TimeSlot, Meeting, SchedTimeSessAssignment, Schedule, SessionPresentation, SlideSubmission, SchedulingEvent, Room, Constraint, ConstraintName
 from ietf.meeting.test_data import make_meeting_test_data, make_interim_meeting, make_interim_test_data
-from ietf.meeting.utils import condition_slide_order, generate_proceedings_content
+from ietf.meeting.utils import agenda_data_version, condition_slide_order, generate_proceedings_content
 from ietf.meeting.utils import add_event_info_to_session_qs, participants_for_meeting
 from ietf.meeting.utils import create_recording, delete_recording, get_next_sequence, bluesheet_data
 from ietf.meeting.views import session_draft_list, parse_agenda_filter_params, sessions_post_save, agenda_extract_schedule
@@ -423,6 +424,51 @@ def test_meeting_agenda(self):
         r = self.client.get(urlreverse('floor-plan', kwargs=dict(num=meeting.number)))
         self.assertEqual(r.status_code, 200)
 
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_agenda_data_conditional_get(self):
+        meeting = make_meeting_test_data()
+        session = Session.objects.filter(meeting=meeting, group__acronym="mars").first()
+        url = urlreverse("ietf.meeting.views.api_get_agenda_data", kwargs=dict(num=meeting.number))
+
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        etag = r["ETag"]
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+
+        # changing a session renews the agenda data
+        with self.captureOnCommitCallbacks(execute=True):
+            session.agenda_note = "Agenda note changed"
+            session.save()
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r["ETag"], etag)
+        self.assertContains(r, "Agenda note changed")
+
+        # changing a schedule that is not the official one does not
+        etag = r["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            SchedTimeSessAssignment.objects.create(
+                schedule=ScheduleFactory(meeting=meeting),
+                session=session,
+                timeslot=meeting.timeslot_set.first(),
+            )
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+
+        # the ETag follows the content when the cached data expires and is rebuilt
+        cache_key = f"agenda_data_and_etag_{meeting.number}_{agenda_data_version(meeting.number)}"
+        caches["default"].delete(cache_key)
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+        session.group.name = "Renamed group"
+        session.group.save()
+        caches["default"].delete(cache_key)
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r["ETag"], etag)
+        self.assertContains(r, "Renamed group")
+
     def test_session_recordings_via_factories(self):
         session = SessionFactory(meeting__type_id="ietf", meeting__date=date_today()-datetime.timedelta(days=180))
         self.assertEqual(session.meetecho_recording_name, "")
@@ -1071,6 +1117,49 @@ def test_group_ical(self):
         self.assertContains(r, t1.local_start_time().strftime('%Y%m%dT%H%M%S'))
         self.assertNotContains(r, t2.local_start_time().strftime('%Y%m%dT%H%M%S'))
 
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_agenda_ical_conditional_get(self):
+        meeting = make_meeting_test_data()
+        session = Session.objects.filter(meeting=meeting, group__acronym="mars").first()
+        url = urlreverse('ietf.meeting.views.agenda_ical', kwargs={'num': meeting.number})
+
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("Last-Modified", r)
+        etag = r["ETag"]
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+
+        # filtered calendars are assembled from the cached events
+        r = self.client.get(url + '?show=ames')
+        assert_ical_response_is_valid(self, r,
+                                      expected_event_summaries=['ames - Asteroid Mining Equipment Standardization Group'],
+                                      expected_event_count=1)
+
+        # a change to a session gives a new ETag and updated content
+        with self.captureOnCommitCallbacks(execute=True):
+            session.agenda_note = "Agenda note changed"
+            session.save()
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r["ETag"], etag)
+        self.assertContains(r, "Agenda note changed")
+
+        # the ETag follows the content when the cached events expire and are rebuilt
+        etag = r["ETag"]
+        updated = meeting.updated()
+        cache_key = f"agenda_ical_events_and_etag_{meeting.number}_{agenda_data_version(meeting.number)}_{updated.timestamp()}"
+        caches["default"].delete(cache_key)
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+        session.group.name = "Renamed group"
+        session.group.save()
+        caches["default"].delete(cache_key)
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r["ETag"], etag)
+        self.assertContains(r, "Renamed group")
+
     def test_parse_agenda_filter_params(self):
         def _r(show=(), hide=(), showtypes=(), hidetypes=()):
             """Helper to create expected result dict"""
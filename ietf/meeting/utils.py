@@ -3,6 +3,7 @@
 import datetime
 import itertools
 import os
+import uuid
 from hashlib import sha384
 
 import pytz
@@ -1013,6 +1014,24 @@ def participants_for_meeting(meeting):
     return (checked_in, attended)
 
 
+def agenda_data_version(meeting_number, renew=False):
+    """Get the version token for the agenda data of a meeting
+
+    The token is part of the agenda data cache key. It is renewed when the official
+    schedule, sessions or materials of the meeting change.
+
+    :meeting_number: meeting number
+    :renew: True to replace the token with a new one
+    """
+    cache = caches["default"]
+    cache_key = f"agenda_data_version_{meeting_number}"
+    version = None if renew else cache.get(cache_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(cache_key, version, timeout=None)
+    return version
+
+
 def generate_proceedings_content(meeting, force_refresh=False):
     """Render proceedings content for a meeting and update cache
     
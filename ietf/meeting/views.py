@@ -4,6 +4,7 @@
 
 import csv
 import datetime
+import hashlib
 import io
 import itertools
 import json
@@ -34,6 +35,7 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.validators import URLValidator
 from django.urls import reverse,reverse_lazy
@@ -42,10 +44,13 @@
 from django.template import TemplateDoesNotExist
 from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from django.utils.encoding import force_str
+from django.utils.http import http_date, quote_etag
 from django.utils.text import slugify
 from django.views.decorators.cache import cache_page
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_exempt
+from django.views.decorators.http import condition
 from django.views.generic import RedirectView
 
 import debug                            # pyflakes:ignore
@@ -83,7 +88,7 @@
     organize_proceedings_sessions,
     sort_accept_tuple,
 )
-from ietf.meeting.utils import add_event_info_to_session_qs
+from ietf.meeting.utils import add_event_info_to_session_qs, agenda_data_version
 from ietf.meeting.utils import session_time_for_sorting
 from ietf.meeting.utils import session_requested_by, SaveMaterialsError
 from ietf.meeting.utils import current_session_status, get_meeting_sessions, SessionNotScheduledError
@@ -1673,18 +1678,29 @@ def generate_agenda_data(num=None, force_refresh=False):
     :num: meeting number
     :force_refresh: True to force a refresh of the cache
     """
+    return _generate_agenda_data_and_etag(num, force_refresh)[0]
+
+
+def _generate_agenda_data_and_etag(num=None, force_refresh=False):
+    """Generate data for the api_get_agenda_data endpoint, with an ETag for it
+
+    The ETag is a hash of the data, cached along with it, so it changes whenever
+    the cached data is rebuilt with different content.
+    """
     cache = caches["default"]
-    cache_timeout = 6 * 60
+    # Changes to the schedule, sessions and materials renew the agenda data version,
+    # the timeout only needs to pick up changes to other things, such as groups.
+    cache_timeout = 60 * 60
 
     meeting = get_ietf_meeting(num)
     if meeting is None:
         raise Http404("No such full IETF meeting")
     elif int(meeting.number) <= 64:
-        return Http404("Pre-IETF 64 meetings are not available through this API")
+        return Http404("Pre-IETF 64 meetings are not available through this API"), None
     else:
         pass
 
-    cache_key = f"generate_agenda_data_{meeting.number}"
+    cache_key = f"agenda_data_and_etag_{meeting.number}_{agenda_data_version(meeting.number)}"
     if not force_refresh:
         cached_value = cache.get(cache_key)
         if cached_value is not None:
@@ -1726,10 +1742,19 @@ def generate_agenda_data(num=None, force_refresh=False):
         "schedule": list(map(agenda_extract_schedule, filtered_assignments)),
         "floors": list(map(agenda_extract_floorplan, floors))
     }
-    cache.set(cache_key, result, timeout=cache_timeout)
-    return result
+    etag = hashlib.sha256(json.dumps(result, cls=DjangoJSONEncoder, sort_keys=True).encode()).hexdigest()
+    cache.set(cache_key, (result, etag), timeout=cache_timeout)
+    return result, etag
+
+
+def agenda_data_etag(request, num=None):
+    try:
+        return _generate_agenda_data_and_etag(num)[1]
+    except Http404:
+        return None
 
 
+@condition(etag_func=agenda_data_etag)
 def api_get_agenda_data(request, num=None):
     return JsonResponse(generate_agenda_data(num, force_refresh=False))
 
@@ -1978,7 +2003,8 @@ def agenda_by_type_ics(request,num=None,type=None):
     if type:
         assignments = assignments.filter(session__type__slug=type)
     updated = meeting.updated()
-    return render(request,"meeting/agenda.ics",{"schedule":schedule,"updated":updated,"assignments":assignments},content_type="text/calendar")
+    vevents = [render_agenda_vevent(schedule, a) for a in assignments]
+    return render(request,"meeting/agenda.ics",{"schedule":schedule,"updated":updated,"vevents":vevents},content_type="text/calendar")
 
 def session_draft_list(num, acronym):
     try:
@@ -2121,6 +2147,54 @@ def should_include_assignment(filter_params, assignment):
     hidden = len(set(filter_params['hide']).intersection(assignment.filter_keywords)) > 0
     return shown and not hidden
 
+AgendaIcalEvent = namedtuple('AgendaIcalEvent', ['session_id', 'acronym', 'filter_keywords', 'vevent'])
+
+
+def render_agenda_vevent(schedule, assignment):
+    """Render the VEVENT block for an assignment in an iCalendar agenda"""
+    return render_to_string("meeting/agenda_vevent.ics", {"schedule": schedule, "item": assignment})
+
+
+def agenda_ical_events_and_etag(meeting, schedule, version, updated):
+    """Get an AgendaIcalEvent for each assignment on the agenda of a meeting, with an ETag for them
+
+    The events, including their rendered VEVENT blocks, are cached. The cache key
+    includes the agenda data version and the time the meeting was last updated,
+    so the cache is bypassed when those change. The ETag is a hash of the events,
+    cached along with them, so it changes whenever they are rebuilt with different
+    content.
+    """
+    cache = caches["default"]
+    cache_key = f"agenda_ical_events_and_etag_{meeting.number}_{version}_{updated.timestamp() if updated else ''}"
+    cached_value = cache.get(cache_key)
+    if cached_value is None:
+        assignments = SchedTimeSessAssignment.objects.filter(
+            schedule__in=[schedule, schedule.base],
+            session__on_agenda=True,
+        )
+        assignments = preprocess_assignments_for_agenda(assignments, meeting)
+        AgendaKeywordTagger(assignments=assignments).apply()
+
+        events = []
+        for a in assignments:
+            if a.session:
+                a.session.ical_status = ical_session_status(a)
+            events.append(AgendaIcalEvent(
+                session_id=a.session_id,
+                acronym=a.session.group_at_the_time().acronym,
+                filter_keywords=a.filter_keywords,
+                vevent=render_agenda_vevent(schedule, a),
+            ))
+        etag = hashlib.sha256(
+            json.dumps(
+                [meeting.time_zone, [[e.session_id, e.acronym, sorted(e.filter_keywords), e.vevent] for e in events]]
+            ).encode()
+        ).hexdigest()
+        cached_value = (events, etag)
+        cache.set(cache_key, cached_value, timeout=30 * 60)
+    return cached_value
+
+
 def agenda_ical(request, num=None, acronym=None, session_id=None):
     """Agenda ical view
 
@@ -2154,36 +2228,36 @@ def agenda_ical(request, num=None, acronym=None, session_id=None):
     if schedule is None and acronym is None and session_id is None:
         raise Http404
 
-    assignments = SchedTimeSessAssignment.objects.filter(
-        schedule__in=[schedule, schedule.base],
-        session__on_agenda=True,
-    )
-    assignments = preprocess_assignments_for_agenda(assignments, meeting)
-    AgendaKeywordTagger(assignments=assignments).apply()
-
     try:
         filt_params = parse_agenda_filter_params(request.GET)
     except ValueError as e:
         return HttpResponseBadRequest(str(e))
 
+    events, etag = agenda_ical_events_and_etag(meeting, schedule, agenda_data_version(meeting.number), updated)
+    etag = quote_etag(etag)
+    last_modified = timegm(updated.utctimetuple()) if updated else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
     if filt_params is not None:
         # Apply the filter
-        assignments = [a for a in assignments if should_include_assignment(filt_params, a)]
+        events = [e for e in events if should_include_assignment(filt_params, e)]
 
     if acronym:
-        assignments = [ a for a in assignments if a.session.group_at_the_time().acronym == acronym ]
+        events = [ e for e in events if e.acronym == acronym ]
     elif session_id:
-        assignments = [ a for a in assignments if a.session_id == int(session_id) ]
+        events = [ e for e in events if e.session_id == int(session_id) ]
 
-    for a in assignments:
-        if a.session:
-            a.session.ical_status = ical_session_status(a)
-
-    return render(request, "meeting/agenda.ics", {
+    response = render(request, "meeting/agenda.ics", {
         "schedule": schedule,
-        "assignments": assignments,
+        "vevents": [e.vevent for e in events],
         "updated": updated
     }, content_type="text/calendar")
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
 
 @cache_page(15 * 60)
 def agenda_json(request, num=None):
@@ -8,6 +8,7 @@
 from django.http import HttpResponsePermanentRedirect
 from ietf.utils.log import log, exc_parts
 from ietf.utils.mail import log_smtp_exception
+from ietf.utils.request_cache import request_cache
 import re
 import smtplib
 import unicodedata
@@ -99,3 +100,15 @@ def add_header(request):
         return response
 
     return add_header
+
+
+def request_cache_middleware(get_response):
+    """Middleware to memoize model accessors for the duration of a request
+
+    See ietf.utils.request_cache.
+    """
+    def with_request_cache(request):
+        with request_cache():
+            return get_response(request)
+
+    return with_request_cache
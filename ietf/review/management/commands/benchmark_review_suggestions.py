@@ -0,0 +1,47 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ietf.review.utils import active_review_teams, suggested_review_requests_for_team
+
+
+class Command(BaseCommand):
+    help = "Time suggested_review_requests_for_team() for each active review team"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-r", "--repeat", type=int, default=5,
+            help="Number of times to run the suggestions for each team (default: 5)",
+        )
+        parser.add_argument(
+            "--team", dest="teams", action="append",
+            help="Acronym of a team to benchmark, may be repeated (default: all active review teams)",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("Need at least one repetition")
+        teams = active_review_teams().select_related("reviewteamsettings").order_by("acronym")
+        if options["teams"]:
+            teams = teams.filter(acronym__in=options["teams"])
+
+        self.stdout.write(f"{'team':<12} {'suggestions':>11} {'queries':>8} {'median ms':>10} {'max ms':>8}")
+        total = 0.0
+        for team in teams:
+            timings = []
+            for _ in range(options["repeat"]):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    suggestions = suggested_review_requests_for_team(team)
+                    timings.append(time.perf_counter() - start)
+            total += sum(timings) / len(timings)
+            self.stdout.write(
+                f"{team.acronym:<12} {len(suggestions):>11} {len(queries):>8} "
+                f"{statistics.median(timings) * 1000:>10.1f} {max(timings) * 1000:>8.1f}"
+            )
+        self.stdout.write(f"Mean time for all {len(teams)} teams together: {total * 1000:.1f} ms")
@@ -0,0 +1,71 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.db import migrations, models
+import django.db.models.deletion
+import ietf.utils.models
+
+
+def forward(apps, schema_editor):
+    LastCallDocEvent = apps.get_model("doc", "LastCallDocEvent")
+    TelechatDocEvent = apps.get_model("doc", "TelechatDocEvent")
+    ReviewCandidate = apps.get_model("review", "ReviewCandidate")
+    candidates = {}
+    for doc_id, time, expires in (
+        LastCallDocEvent.objects.order_by("doc", "-time", "-id")
+        .distinct("doc")
+        .values_list("doc", "time", "expires")
+    ):
+        candidates[doc_id] = ReviewCandidate(
+            doc_id=doc_id, last_call_time=time, last_call_expires=expires
+        )
+    for doc_id, time, telechat_date in (
+        TelechatDocEvent.objects.order_by("doc", "-time", "-id")
+        .distinct("doc")
+        .values_list("doc", "time", "telechat_date")
+    ):
+        candidate = candidates.setdefault(doc_id, ReviewCandidate(doc_id=doc_id))
+        candidate.telechat_time = time
+        candidate.telechat_date = telechat_date
+    ReviewCandidate.objects.bulk_create(candidates.values(), batch_size=1000)
+
+
+def reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doc", "0025_storedobject_storedobject_unique_name_per_store"),
+        ("review", "0002_reviewteamsettings_allow_reviewer_to_reject_after_deadline"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReviewCandidate",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_call_time", models.DateTimeField(blank=True, null=True)),
+                ("last_call_expires", models.DateTimeField(blank=True, null=True)),
+                ("telechat_time", models.DateTimeField(blank=True, null=True)),
+                ("telechat_date", models.DateField(blank=True, db_index=True, null=True)),
+                (
+                    "doc",
+                    ietf.utils.models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="review_candidate",
+                        to="doc.document",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(forward, reverse),
+    ]
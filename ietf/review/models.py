@@ -185,6 +185,22 @@ def save(self, *args, **kwargs):
                     self.review_request.save()
             self._original_state = self.state_id
 
+class ReviewCandidate(models.Model):
+    """The latest last call and telechat scheduling events of a document
+
+    Kept up to date from the events by the review app's signals, so that
+    suggested_review_requests_for_team() can find the documents in last call or on
+    an upcoming telechat without scanning the event history.
+    """
+    doc               = OneToOneField(Document, related_name='review_candidate')
+    last_call_time    = models.DateTimeField(blank=True, null=True)
+    last_call_expires = models.DateTimeField(blank=True, null=True)
+    telechat_time     = models.DateTimeField(blank=True, null=True)
+    telechat_date     = models.DateField(blank=True, null=True, db_index=True)
+
+    def __str__(self):
+        return "Review candidate %s" % self.doc.name
+
 def get_default_review_types():
     return ReviewTypeName.objects.filter(slug__in=['early','lc','telechat'])
 
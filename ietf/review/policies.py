@@ -2,7 +2,9 @@
 
 
 import re
+import uuid
 
+from django.core.cache import caches
 from django.db.models.aggregates import Max
 from django.utils import timezone
 from simple_history.utils import bulk_update_with_history
@@ -20,6 +22,8 @@
                                get_default_filter_re,
                                latest_review_assignments_for_reviewers)
 from ietf.utils import log
+from ietf.utils.request_cache import request_memoize
+from ietf.utils.timezone import date_today
 
 """
 This file contains policies regarding reviewer queues.
@@ -61,6 +65,58 @@ def persons_with_previous_review(team, review_req, possible_person_ids, state_id
     return has_reviewed_previous
 
 
+# The team context depends on the time of day only through the days needed to
+# fulfill minimum intervals, which this timeout keeps reasonably fresh. Other
+# changes renew the team's context version.
+TEAM_REVIEWER_CONTEXT_CACHE_TIMEOUT = 15 * 60
+
+
+class TeamReviewerContext:
+    """
+    Team-wide data used to rank the reviewers of a team, which is the same for
+    every review request of the team. Values are dicts keyed by person ID.
+    """
+    def __init__(self, team):
+        self.days_needed_for_reviewers = days_needed_to_fulfill_min_interval_for_reviewers(team)
+        self.unavailable_periods = dict(current_unavailable_periods_for_reviewers(team))
+        self.assignment_data_for_reviewers = latest_review_assignments_for_reviewers(team)
+
+
+def team_reviewer_context_version(team_id, renew=False):
+    """Get the version token for the cached TeamReviewerContext of a team
+
+    The token is renewed when review assignments, review requests, reviewer
+    settings or unavailable periods of the team change.
+
+    :team_id: team (Group) primary key
+    :renew: True to replace the token with a new one
+    """
+    cache = caches["default"]
+    cache_key = f"team_reviewer_context_version_{team_id}"
+    version = None if renew else cache.get(cache_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(cache_key, version, timeout=None)
+    return version
+
+
+@request_memoize("team_reviewer_context")
+def team_reviewer_context(team):
+    """Get the TeamReviewerContext for a team
+
+    The context is kept in the default cache, and shared by all resolvers within
+    a request, so that pages with many review requests compute it once. It must
+    not be modified.
+    """
+    cache = caches["default"]
+    cache_key = f"team_reviewer_context_{team.pk}_{date_today().isoformat()}_{team_reviewer_context_version(team.pk)}"
+    context = cache.get(cache_key)
+    if context is None:
+        context = TeamReviewerContext(team)
+        cache.set(cache_key, context, timeout=TEAM_REVIEWER_CONTEXT_CACHE_TIMEOUT)
+    return context
+
+
 class AbstractReviewerQueuePolicy:
     def __init__(self, team):
         self.team = team
@@ -240,7 +296,7 @@ def _filter_unavailable_reviewers(self, reviewers, review_req=None):
         
         If multiple UnavailablePeriods apply, a 'canfinish' will take priority over an 'unavailable'.
         """
-        unavailable_periods = current_unavailable_periods_for_reviewers(self.team)
+        unavailable_periods = team_reviewer_context(self.team).unavailable_periods
         if len(unavailable_periods) == 0:
             return reviewers.copy()  # nothing to do
 
@@ -284,7 +340,8 @@ class AssignmentOrderResolver:
     """
     The AssignmentOrderResolver resolves the "recommended assignment order",
     for a set of possible reviewers (email_queryset), a review request, and a
-    rotation list.
+    rotation list. The team-wide data comes from team_reviewer_context(), the
+    rest is collected for the review request.
     """
     def __init__(self, email_queryset, review_req, rotation_list):
         self.review_req = review_req
@@ -302,11 +359,11 @@ def _collect_context(self):
         # This data is collected as a dict, keys being person IDs, values being numbers/objects.
         self.rotation_index = {p.pk: i for i, p in enumerate(self.rotation_list)}
         self.reviewer_settings = self._reviewer_settings_for_person_ids(self.possible_person_ids)
-        self.days_needed_for_reviewers = days_needed_to_fulfill_min_interval_for_reviewers(self.team)
         self.connections = self._connections_with_doc(self.doc, self.possible_person_ids)
-        self.unavailable_periods = current_unavailable_periods_for_reviewers(self.team)
-        self.assignment_data_for_reviewers = latest_review_assignments_for_reviewers(self.team)
-        self.unavailable_periods = current_unavailable_periods_for_reviewers(self.team)
+        team_context = team_reviewer_context(self.team)
+        self.days_needed_for_reviewers = team_context.days_needed_for_reviewers
+        self.unavailable_periods = team_context.unavailable_periods
+        self.assignment_data_for_reviewers = team_context.assignment_data_for_reviewers
 
         # This data is collected as a set of person IDs.
         self.has_completed_review_previous = persons_with_previous_review(
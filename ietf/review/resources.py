@@ -15,7 +15,7 @@
                                 UnavailablePeriod, ReviewWish, NextReviewerInTeam,
                                 ReviewSecretarySettings, ReviewTeamSettings, 
                                 HistoricalReviewerSettings, HistoricalUnavailablePeriod,
-                                HistoricalReviewRequest, HistoricalReviewAssignment)
+                                HistoricalReviewRequest, HistoricalReviewAssignment, ReviewCandidate)
 
 
 from ietf.person.resources import PersonResource
@@ -311,3 +311,22 @@ class Meta:
             "result": ALL_WITH_RELATIONS,
         }
 api.review.register(HistoricalReviewAssignmentResource())
+
+
+class ReviewCandidateResource(ModelResource):
+    doc              = ToOneField(DocumentResource, 'doc')
+    class Meta:
+        queryset = ReviewCandidate.objects.all()
+        serializer = api.Serializer()
+        cache = SimpleCache()
+        #resource_name = 'reviewcandidate'
+        ordering = ['id', ]
+        filtering = { 
+            "id": ALL,
+            "last_call_time": ALL,
+            "last_call_expires": ALL,
+            "telechat_time": ALL,
+            "telechat_date": ALL,
+            "doc": ALL_WITH_RELATIONS,
+        }
+api.review.register(ReviewCandidateResource())
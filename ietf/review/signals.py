@@ -0,0 +1,54 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ietf.community.signals import deleted_by_cascade_from
+from ietf.doc.models import Document, LastCallDocEvent, TelechatDocEvent
+from ietf.group.models import Group
+from ietf.utils.request_cache import invalidate_request_cache
+from .models import ReviewAssignment, ReviewerSettings, ReviewRequest, UnavailablePeriod
+from .policies import team_reviewer_context_version
+from .utils import update_review_candidate
+
+
+# The receivers below keep the ReviewCandidate table up to date with the last
+# call and telechat scheduling events of each document.
+
+# dispatch_uid ensures only a single signal receiver binding is made
+@receiver([post_save, post_delete], sender=LastCallDocEvent, dispatch_uid="review_candidate_last_call_receiver_uid")
+@receiver([post_save, post_delete], sender=TelechatDocEvent, dispatch_uid="review_candidate_telechat_receiver_uid")
+def review_candidate_event_receiver(sender, instance, raw=False, origin=None, **kwargs):
+    if not raw and not deleted_by_cascade_from(origin, Document):
+        update_review_candidate(instance.doc_id)
+
+
+# The receivers below make the cached TeamReviewerContext of a team stale when
+# data it is computed from changes.
+
+def team_reviewer_context_changed(team_id):
+    """Renew the team's context version, and again once the change is visible to other requests"""
+    invalidate_request_cache(Group, team_id, "team_reviewer_context")
+    team_reviewer_context_version(team_id, renew=True)
+    transaction.on_commit(lambda: team_reviewer_context_version(team_id, renew=True))
+
+
+@receiver([post_save, post_delete], sender=ReviewAssignment, dispatch_uid="team_reviewer_context_assignment_receiver_uid")
+def team_reviewer_context_assignment_receiver(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        team_id = instance.review_request.team_id
+    except ObjectDoesNotExist:
+        return  # the request is already gone, and its deletion renews the context
+    team_reviewer_context_changed(team_id)
+
+
+@receiver([post_save, post_delete], sender=ReviewRequest, dispatch_uid="team_reviewer_context_request_receiver_uid")
+@receiver([post_save, post_delete], sender=ReviewerSettings, dispatch_uid="team_reviewer_context_settings_receiver_uid")
+@receiver([post_save, post_delete], sender=UnavailablePeriod, dispatch_uid="team_reviewer_context_unavailable_receiver_uid")
+def team_reviewer_context_team_receiver(sender, instance, raw=False, **kwargs):
+    if not raw:
+        team_reviewer_context_changed(instance.team_id)
@@ -4,17 +4,23 @@
 import mock
 import debug # pyflakes:ignore
 
+from io import StringIO
 from pyquery import PyQuery
 
-from ietf.group.factories import RoleFactory
+from django.core.management import call_command
+from django.utils import timezone
+
+from ietf.group.factories import RoleFactory, ReviewTeamFactory
 from ietf.doc.factories import WgDraftFactory
+from ietf.doc.models import LastCallDocEvent, TelechatDocEvent
+from ietf.person.models import Person
 from ietf.utils.mail import empty_outbox, get_payload_text, outbox
 from ietf.utils.test_utils import TestCase, reload_db_objects
 from ietf.utils.test_utils import login_testing_unauthorized, unicontent
 from ietf.utils.timezone import date_today, datetime_from_date
 from .factories import ReviewAssignmentFactory, ReviewRequestFactory, ReviewerSettingsFactory
 from .mailarch import hash_list_message_id
-from .models import ReviewerSettings, ReviewSecretarySettings, ReviewTeamSettings, UnavailablePeriod
+from .models import ReviewerSettings, ReviewSecretarySettings, ReviewTeamSettings, UnavailablePeriod, ReviewCandidate
 from .tasks import send_review_reminders_task
 from .utils import (email_secretary_reminder, review_assignments_needing_secretary_reminder,
                     email_reviewer_reminder, review_assignments_needing_reviewer_reminder,
@@ -40,6 +46,43 @@ def test_hash_list_message_id(self):
             self.assertEqual(hash, hash_list_message_id(list, msgid))
 
 
+class ReviewCandidateTests(TestCase):
+    def test_review_candidate_follows_events(self):
+        doc = WgDraftFactory()
+        system = Person.objects.get(name="(System)")
+        self.assertFalse(ReviewCandidate.objects.filter(doc=doc).exists())
+
+        expires = timezone.now() + datetime.timedelta(days=14)
+        last_call = LastCallDocEvent.objects.create(doc=doc, rev=doc.rev, by=system, type="sent_last_call", expires=expires)
+        candidate = ReviewCandidate.objects.get(doc=doc)
+        self.assertEqual(candidate.last_call_time, last_call.time)
+        self.assertEqual(candidate.last_call_expires, expires)
+        self.assertIsNone(candidate.telechat_date)
+
+        telechat_date = date_today() + datetime.timedelta(days=30)
+        for date in (telechat_date - datetime.timedelta(days=7), telechat_date):
+            telechat = TelechatDocEvent.objects.create(doc=doc, rev=doc.rev, by=system, type="scheduled_for_telechat", telechat_date=date)
+        candidate = ReviewCandidate.objects.get(doc=doc)
+        self.assertEqual(candidate.telechat_date, telechat_date)
+        self.assertEqual(candidate.telechat_time, telechat.time)
+
+        telechat.delete()
+        self.assertEqual(ReviewCandidate.objects.get(doc=doc).telechat_date, telechat_date - datetime.timedelta(days=7))
+        TelechatDocEvent.objects.filter(doc=doc).delete()
+        last_call.delete()
+        self.assertFalse(ReviewCandidate.objects.filter(doc=doc).exists())
+
+        LastCallDocEvent.objects.create(doc=doc, rev=doc.rev, by=system, type="sent_last_call", expires=expires)
+        doc.delete()
+        self.assertFalse(ReviewCandidate.objects.exists())
+
+    def test_benchmark_review_suggestions(self):
+        team = ReviewTeamFactory()
+        out = StringIO()
+        call_command("benchmark_review_suggestions", "--repeat", "2", stdout=out)
+        self.assertIn(team.acronym, out.getvalue())
+
+
 class ReviewAssignmentTest(TestCase):
     def do_test_update_review_req_status(self, assignment_state, expected_state):
         review_req = ReviewRequestFactory(state_id='assigned')
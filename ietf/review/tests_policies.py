@@ -3,6 +3,7 @@
 import debug                            # pyflakes:ignore
 import datetime
 
+from django.test import override_settings
 from django.utils import timezone
 
 from ietf.doc.factories import WgDraftFactory, IndividualDraftFactory
@@ -16,7 +17,8 @@
 from ietf.review.models import ReviewerSettings, NextReviewerInTeam, UnavailablePeriod, ReviewWish, \
     ReviewTeamSettings
 from ietf.review.policies import (AssignmentOrderResolver, LeastRecentlyUsedReviewerQueuePolicy,
-                                  get_reviewer_queue_policy, QUEUE_POLICY_NAME_MAPPING)
+                                  get_reviewer_queue_policy, team_reviewer_context, QUEUE_POLICY_NAME_MAPPING)
+from ietf.utils.request_cache import request_cache
 from ietf.utils.test_data import create_person
 from ietf.utils.test_utils import TestCase
 
@@ -838,3 +840,34 @@ def test_determine_ranking(self):
         self.assertEqual(ranking[1]['scores'], [-1, -1, -1, -1, -1, -1, -91, -2,  0])
         self.assertEqual(ranking[0]['label'], 'Test Reviewer-high: unavailable indefinitely (Can do follow-ups); requested to be selected next for assignment; reviewed document before; wishes to review document; #2; 1 no response, 1 partially complete, 1 fully completed')
         self.assertEqual(ranking[1]['label'], 'Test Reviewer-low: rejected review of document before; is author of document; filter regexp matches; max frequency exceeded, ready in 91 days; skip next 2; #1; currently 1 open, 10 pages')
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_team_reviewer_context(self):
+        team = ReviewTeamFactory(acronym="rotationteam", name="Review Team", list_email="rotationteam@ietf.org", parent=Group.objects.get(acronym="farfut"))
+        reviewer = create_person(team, "reviewer", name="Test Reviewer", username="testreviewer")
+        rotation_list = [reviewer]
+
+        with request_cache():
+            context = team_reviewer_context(team)
+            self.assertEqual(context.unavailable_periods, {})
+            self.assertEqual(context.assignment_data_for_reviewers, {})
+            # resolvers for other requests of the team share the context
+            with self.assertNumQueries(0):
+                self.assertIs(team_reviewer_context(team), context)
+            for review_req in ReviewRequestFactory.create_batch(2, team=team):
+                order = AssignmentOrderResolver(Email.objects.all(), review_req, rotation_list)
+                self.assertIs(order.unavailable_periods, context.unavailable_periods)
+
+            # changes within the request are seen
+            UnavailablePeriod.objects.create(team=team, person=reviewer, start_date=None, availability='unavailable')
+            self.assertIn(reviewer.pk, team_reviewer_context(team).unavailable_periods)
+
+        # the context is cached between requests
+        with self.assertNumQueries(0):
+            context = team_reviewer_context(team)
+        self.assertIn(reviewer.pk, context.unavailable_periods)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ReviewAssignmentFactory(review_request__team=team, reviewer=reviewer.email(), state_id='assigned')
+        context = team_reviewer_context(team)
+        self.assertEqual(len(context.assignment_data_for_reviewers[reviewer.pk]), 1)
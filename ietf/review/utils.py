@@ -28,7 +28,7 @@
 from ietf.ietfauth.utils import has_role, is_authorized_in_doc_stream
 from ietf.review.models import (ReviewRequest, ReviewAssignment, ReviewRequestStateName, ReviewTypeName, 
                                 ReviewerSettings, UnavailablePeriod, ReviewSecretarySettings,
-                                ReviewTeamSettings)
+                                ReviewTeamSettings, ReviewCandidate)
 from ietf.utils.mail import send_mail
 from ietf.doc.utils import extract_complete_replaces_ancestor_mapping_for_docs
 from ietf.utils import log
@@ -75,6 +75,8 @@ def can_access_review_stats_for_team(user, team):
 def review_assignments_to_list_for_docs(docs):
     assignment_qs = ReviewAssignment.objects.filter(
         state__in=["assigned", "accepted", "part-completed", "completed"],
+    ).select_related(
+        "review_request__doc", "review_request__team", "review_request__type", "review",
     ).prefetch_related("result")
 
     doc_names = [d.name for d in docs]
@@ -494,6 +496,24 @@ def close_review_request(request, review_req, close_state, close_comment=''):
             msg=msg, by=request.user.person, notify_secretary=True,
             notify_reviewer=True, notify_requested_by=True)
 
+def update_review_candidate(doc_id):
+    """Bring the ReviewCandidate of a document in line with its latest last call and
+    telechat scheduling events"""
+    last_call = LastCallDocEvent.objects.filter(doc_id=doc_id).order_by("-time", "-id").first()
+    telechat = TelechatDocEvent.objects.filter(doc_id=doc_id).order_by("-time", "-id").first()
+    if last_call is None and telechat is None:
+        ReviewCandidate.objects.filter(doc_id=doc_id).delete()
+        return
+    ReviewCandidate.objects.update_or_create(
+        doc_id=doc_id,
+        defaults=dict(
+            last_call_time=last_call.time if last_call else None,
+            last_call_expires=last_call.expires if last_call else None,
+            telechat_time=telechat.time if telechat else None,
+            telechat_date=telechat.telechat_date if telechat else None,
+        ),
+    )
+
 def suggested_review_requests_for_team(team):
 
     if not team.reviewteamsettings.autosuggest:
@@ -516,18 +536,21 @@ def suggested_review_requests_for_team(team):
         # in Last Call
         last_call_docs = reviewable_docs_qs.filter(
             states=State.objects.get(type="draft-iesg", slug="lc", used=True)
+        ).annotate(
+            last_call_time=F("review_candidate__last_call_time"),
+            last_call_expires=F("review_candidate__last_call_expires"),
         )
-        last_call_expiry_events = { e.doc_id: e for e in LastCallDocEvent.objects.order_by("time", "id") }
         for doc in last_call_docs:
-            e = last_call_expiry_events[doc.pk] if doc.pk in last_call_expiry_events else LastCallDocEvent(expires=now, time=now)
+            time = doc.last_call_time or now
+            expires = doc.last_call_expires or now
 
-            deadline = e.expires.astimezone(DEADLINE_TZINFO).date()
+            deadline = expires.astimezone(DEADLINE_TZINFO).date()
 
             if deadline > seen_deadlines.get(doc.pk, datetime.date.max) or deadline < now.date():
                 continue
 
             requests[doc.pk] = ReviewRequest(
-                time=e.time,
+                time=time,
                 type=last_call_type,
                 doc=doc,
                 team=team,
@@ -545,28 +568,17 @@ def suggested_review_requests_for_team(team):
 
         telechat_deadline_delta = datetime.timedelta(days=2)
 
-        telechat_docs = reviewable_docs_qs.filter(
-            docevent__telechatdocevent__telechat_date__in=telechat_dates
-        )
-
-        # we need to check the latest telechat event for each document
-        # scheduled for the telechat, as the appearance might have been
-        # cancelled/moved
-        telechat_events = TelechatDocEvent.objects.filter(
-            # turn into list so we don't get a complex and slow join sent down to the DB
-            doc__id__in=list(telechat_docs.values_list("pk", flat=True)),
-        ).values_list(
-            "doc", "pk", "time", "telechat_date"
-        ).order_by("doc", "-time", "-id").distinct()
-
-        for doc_pk, events in itertools.groupby(telechat_events, lambda t: t[0]):
-            _, _, event_time, event_telechat_date = list(events)[0]
+        # the candidates hold the latest telechat event of each document, so
+        # appearances that were cancelled or moved are not included
+        telechat_candidates = ReviewCandidate.objects.filter(
+            doc__in=reviewable_docs_qs,
+            telechat_date__in=telechat_dates,
+        ).values_list("doc", "telechat_time", "telechat_date").order_by("doc")
 
-            deadline = None
-            if event_telechat_date in telechat_dates:
-                deadline = event_telechat_date - telechat_deadline_delta
+        for doc_pk, event_time, event_telechat_date in telechat_candidates:
+            deadline = event_telechat_date - telechat_deadline_delta
 
-            if not deadline or deadline > seen_deadlines.get(doc_pk, datetime.date.max):
+            if deadline > seen_deadlines.get(doc_pk, datetime.date.max):
                 continue
                 
             if doc_pk in requests:
@@ -189,6 +189,15 @@
 BLOBSTORAGE_CONNECT_TIMEOUT = 2
 BLOBSTORAGE_READ_TIMEOUT = 2
 
+# Queue blob store writes on local disk and upload them in batches from a Celery
+# task instead of inline. See ietf.doc.storage_queue.
+BLOBSTORAGE_WRITE_BEHIND = False
+BLOBSTORAGE_WRITE_BEHIND_DIR = "/a/ietfdata/blob-write-behind"
+BLOBSTORAGE_WRITE_BEHIND_DELAY = 5  # seconds to wait for more writes before uploading
+BLOBSTORAGE_WRITE_BEHIND_BATCH_SIZE = 100
+BLOBSTORAGE_WRITE_BEHIND_CONCURRENCY = 8
+BLOBSTORAGE_WRITE_BEHIND_MAX_ATTEMPTS = 5
+
 WSGI_APPLICATION = "ietf.wsgi.application"
 
 AUTHENTICATION_BACKENDS = ( 'ietf.ietfauth.backends.CaseInsensitiveModelBackend', )
@@ -426,6 +435,7 @@ def skip_unreadable_post(record):
     #"csp.middleware.CSPMiddleware",
     "ietf.middleware.unicode_nfkc_normalization_middleware",
     "ietf.middleware.is_authenticated_header_middleware",
+    "ietf.middleware.request_cache_middleware",
 ]
 
 ROOT_URLCONF = 'ietf.urls'
@@ -772,6 +782,8 @@ def skip_unreadable_post(record):
     "meetinghostlogo",
     "photo",
     "review",
+    "htmlized",
+    "pdfized",
 ]
 
 # Override this in settings_local.py if needed
@@ -800,6 +812,8 @@ def skip_unreadable_post(record):
 DERIVED_DIR = '/a/ietfdata/derived'
 FTP_DIR = '/a/ftp'
 ALL_ID_DOWNLOAD_DIR = '/a/www/www6s/download'
+# Regenerate the I-D index files at least this often, even if no change is detected
+IDINDEX_MAX_UNCHANGED_SECONDS = 60 * 60
 NFS_METRICS_TMP_DIR = '/a/tmp'
 
 DOCUMENT_FORMAT_ALLOWLIST = ["txt", "ps", "pdf", "xml", "html", ]
@@ -912,6 +926,8 @@ def skip_unreadable_post(record):
 IDSUBMIT_IDNITS_BINARY = '/a/www/ietf-datatracker/scripts/idnits'
 SUBMIT_PYANG_COMMAND = 'pyang --verbose --ietf -p {libs} {model}'
 SUBMIT_YANGLINT_COMMAND = 'yanglint --verbose -p {tmplib} -p {rfclib} -p {draftlib} -p {ianalib} -p {cataloglib} {model} -i'
+# Seconds an external submission checker command may run before it is killed
+SUBMIT_CHECKER_COMMAND_TIMEOUT = 300
 
 SUBMIT_YANG_CATALOG_MODULEARG = "modules[]={module}"
 SUBMIT_YANG_CATALOG_IMPACT_URL = "https://www.yangcatalog.org/yang-search/impact_analysis.php?{moduleargs}&recurse=0&rfcs=1&show_subm=1&show_dir=both"
@@ -926,6 +942,11 @@ def skip_unreadable_post(record):
     "ietf.submit.checkers.DraftYangChecker",
 #    "ietf.submit.checkers.DraftYangvalidatorChecker",    
 )
+# Number of submission checkers to run concurrently; 1 runs them one at a time
+IDSUBMIT_CHECKER_POOL_SIZE = 4
+
+# Also render a PDF of xml submissions
+IDSUBMIT_RENDER_PDF = False
 
 # Max time to allow for validation before a submission is subject to cancellation
 IDSUBMIT_MAX_VALIDATION_TIME = datetime.timedelta(minutes=20)
@@ -1330,21 +1351,21 @@ def skip_unreadable_post(record):
                 "KEY_PREFIX": "ietf:dt",
             },
             "htmlized": {
-                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "BACKEND": "ietf.utils.cache.TieredFileCache",
                 "LOCATION": "/a/cache/datatracker/htmlized",
                 "OPTIONS": {
                     "MAX_ENTRIES": 100000,  # 100,000
                 },
             },
             "pdfized": {
-                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "BACKEND": "ietf.utils.cache.TieredFileCache",
                 "LOCATION": "/a/cache/datatracker/pdfized",
                 "OPTIONS": {
                     "MAX_ENTRIES": 100000,  # 100,000
                 },
             },
             "slowpages": {
-                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "BACKEND": "ietf.utils.cache.TieredFileCache",
                 "LOCATION": "/a/cache/datatracker/slowpages",
                 "OPTIONS": {
                     "MAX_ENTRIES": 5000,
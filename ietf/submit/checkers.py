@@ -6,7 +6,9 @@
 import os
 from pathlib import Path
 import re
+import shlex
 import shutil
+import subprocess
 import sys
 import tempfile
 
@@ -17,9 +19,28 @@
 
 from ietf.utils import tool_version
 from ietf.utils.log import log, assertion
-from ietf.utils.pipe import pipe
+from ietf.utils.pipe import command_string, run_command
 from ietf.utils.test_runner import set_coverage_checking
 
+
+def run_checker_command(cmd):
+    """Run a checker's external command, returning (code, out, err) as text
+
+    A command that runs for longer than SUBMIT_CHECKER_COMMAND_TIMEOUT is killed
+    and reported as failed, with whatever output it produced. A command that can't
+    be started is reported with exit code 127, as the shell would.
+    """
+    try:
+        code, out, err = run_command(cmd, timeout=settings.SUBMIT_CHECKER_COMMAND_TIMEOUT)
+    except subprocess.TimeoutExpired as e:
+        code = -1
+        out = e.output or b""
+        err = (e.stderr or b"") + b"\nTimed out after %d seconds" % e.timeout
+    except OSError as e:
+        code, out, err = 127, b"", str(e).encode('utf-8')
+    return code, out.decode('utf-8', errors='replace'), err.decode('utf-8', errors='replace')
+
+
 class DraftSubmissionChecker(object):
     name = ""
 
@@ -63,7 +84,7 @@ def __init__(self, options=["--submitcheck", "--nitcount", ]):
         assert isinstance(options, list)
         if not "--nitcount" in options:
             options.append("--nitcount")
-        self.options = ' '.join(options)
+        self.options = options
 
     def check_file_txt(self, path):
         """
@@ -80,12 +101,10 @@ def check_file_txt(self, path):
         warnstart = ['  == ', '  -- ']
         
 
-        cmd = "%s %s %s" % (settings.IDSUBMIT_IDNITS_BINARY, self.options, path)
-        code, out, err = pipe(cmd)
-        out = out.decode('utf-8')
-        err = err.decode('utf-8')
+        cmd = [settings.IDSUBMIT_IDNITS_BINARY, *self.options, path]
+        code, out, err = run_checker_command(cmd)
         if code != 0 or out == "":
-            message = "idnits error: %s:\n  Error %s: %s" %( cmd, code, err)
+            message = "idnits error: %s:\n  Error %s: %s" %( command_string(cmd), code, err)
             log(message)
             passed = False
             
@@ -122,6 +141,7 @@ class DraftYangChecker(object):
 
     name = "yang validation"
     symbol = '<i class="bi bi-yin-yang"></i>'
+    thread_safe = False  # captures xym's output by replacing sys.stdout and sys.stderr
 
     def check_file_txt(self, path):
         name = os.path.basename(path)
@@ -212,15 +232,13 @@ def check_file_txt(self, path):
                 # pyang
                 cmd_template = settings.SUBMIT_PYANG_COMMAND
                 command = [ w for w in cmd_template.split() if not '=' in w ][0]
-                cmd = cmd_template.format(libs=modpath, model=path)
+                cmd = [ w.format(libs=modpath, model=path) for w in shlex.split(cmd_template) ]
                 venv_path = os.environ.get('VIRTUAL_ENV') or os.path.join(os.getcwd(), 'env')
                 venv_bin = os.path.join(venv_path, 'bin')
                 if not venv_bin in os.environ.get('PATH', '').split(':'):
                     os.environ['PATH'] = os.environ.get('PATH', '') + ":" + venv_bin
-                code, out, err = pipe(cmd)
-                out = out.decode('utf-8')
-                err = err.decode('utf-8')
-                if code > 0 or len(err.strip()) > 0 :
+                code, out, err = run_checker_command(cmd)
+                if code != 0 or len(err.strip()) > 0 :
                     error_lines = err.splitlines()
                     assertion('len(error_lines) > 0')
                     for line in error_lines:
@@ -251,13 +269,11 @@ def check_file_txt(self, path):
                 if settings.SUBMIT_YANGLINT_COMMAND and os.path.exists(settings.YANGLINT_BINARY):
                     cmd_template = settings.SUBMIT_YANGLINT_COMMAND
                     command = [ w for w in cmd_template.split() if not '=' in w ][0]
-                    cmd = cmd_template.format(model=path, rfclib=settings.SUBMIT_YANG_RFC_MODEL_DIR, tmplib=workdir,
+                    cmd = [ w.format(model=path, rfclib=settings.SUBMIT_YANG_RFC_MODEL_DIR, tmplib=workdir,
                         draftlib=settings.SUBMIT_YANG_DRAFT_MODEL_DIR, ianalib=settings.SUBMIT_YANG_IANA_MODEL_DIR,
-                        cataloglib=settings.SUBMIT_YANG_CATALOG_MODEL_DIR, )
-                    code, out, err = pipe(cmd)
-                    out = out.decode('utf-8')
-                    err = err.decode('utf-8')
-                    if code > 0 or len(err.strip()) > 0:
+                        cataloglib=settings.SUBMIT_YANG_CATALOG_MODEL_DIR, ) for w in shlex.split(cmd_template) ]
+                    code, out, err = run_checker_command(cmd)
+                    if code != 0 or len(err.strip()) > 0:
                         err_lines = err.splitlines()
                         for line in err_lines:
                             if line.strip():
@@ -0,0 +1,20 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("submit", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="submissioncheck",
+            name="duration",
+            field=models.DurationField(
+                blank=True, help_text="Wall time taken by the checker", null=True
+            ),
+        ),
+    ]
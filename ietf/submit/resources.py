@@ -107,6 +107,7 @@ class Meta:
             "errors": ALL,
             "warnings": ALL,
             "items": ALL,
+            "duration": ALL,
             "submission": ALL_WITH_RELATIONS,
         }
 api.submit.register(SubmissionCheckResource())
@@ -2,19 +2,45 @@
 #
 # Celery task definitions
 #
-from celery import shared_task
+from celery import chord, shared_task
+from pathlib import Path
 
 from django.db.models import Min
 from django.conf import settings
 from django.utils import timezone
 
 from ietf.submit.models import Submission
-from ietf.submit.utils import (cancel_submission, create_submission_event, process_uploaded_submission,
-                               process_and_accept_uploaded_submission, run_all_yang_model_checks,
-                               populate_yang_model_dirs)
+from ietf.submit.utils import (XmlRfcError, cancel_submission, create_submission_event, prep_missing_formats,
+                               process_uploaded_submission, process_and_accept_uploaded_submission,
+                               render_submission_format, run_all_yang_model_checks, populate_yang_model_dirs)
 from ietf.utils import log
 
 
+def render_then(submission, callback_task):
+    """Render the missing formats of an xml submission in parallel, then call callback_task
+
+    The formats are rendered by a chord of render_submission_format_task tasks, whose
+    callback is callback_task with the results, the submission id and the description
+    of the rendering. Nothing waits for the chord, so no worker is tied up while the
+    formats are being rendered.
+
+    Returns False, without queuing anything, if there is nothing to render or the xml
+    could not be prepped. The caller then processes the submission itself, which
+    reports any error.
+    """
+    if submission.state_id != "validating" or ".xml" not in submission.file_types:
+        return False
+    try:
+        prepped = prep_missing_formats(submission)
+    except XmlRfcError:
+        return False
+    chord(
+        render_submission_format_task.s(prepped["path"], submission.name, submission.rev, fmt, prepped["date"])
+        for fmt in prepped["formats"]
+    )(callback_task.s(submission.pk, prepped))
+    return True
+
+
 @shared_task
 def process_uploaded_submission_task(submission_id):
     try:
@@ -22,7 +48,20 @@ def process_uploaded_submission_task(submission_id):
     except Submission.DoesNotExist:
         log.log(f'process_uploaded_submission_task called for missing submission_id={submission_id}')
     else:
-        process_uploaded_submission(submission)
+        if not render_then(submission, process_rendered_uploaded_submission_task):
+            process_uploaded_submission(submission)
+
+
+@shared_task
+def process_rendered_uploaded_submission_task(results, submission_id, prepped):
+    try:
+        submission = Submission.objects.get(pk=submission_id)
+    except Submission.DoesNotExist:
+        log.log(f'process_rendered_uploaded_submission_task called for missing submission_id={submission_id}')
+    else:
+        process_uploaded_submission(submission, rendered=(prepped, results))
+    finally:
+        Path(prepped["path"]).unlink(missing_ok=True)  # in case the submission was not processed
 
 
 @shared_task
@@ -32,7 +71,30 @@ def process_and_accept_uploaded_submission_task(submission_id):
     except Submission.DoesNotExist:
         log.log(f'process_uploaded_submission_task called for missing submission_id={submission_id}')
     else:
-        process_and_accept_uploaded_submission(submission)
+        # only XML uploads are accepted automatically, don't render anything else
+        if submission.file_types != ".xml" or not render_then(
+            submission, process_and_accept_rendered_uploaded_submission_task
+        ):
+            process_and_accept_uploaded_submission(submission)
+
+
+@shared_task
+def process_and_accept_rendered_uploaded_submission_task(results, submission_id, prepped):
+    try:
+        submission = Submission.objects.get(pk=submission_id)
+    except Submission.DoesNotExist:
+        log.log(
+            f'process_and_accept_rendered_uploaded_submission_task called for missing submission_id={submission_id}'
+        )
+    else:
+        process_and_accept_uploaded_submission(submission, rendered=(prepped, results))
+    finally:
+        Path(prepped["path"]).unlink(missing_ok=True)  # in case the submission was not processed
+
+
+@shared_task(ignore_result=False)
+def render_submission_format_task(prepped_path, name, rev, fmt, date):
+    return render_submission_format(prepped_path, name, rev, fmt, date)
 
 
 @shared_task
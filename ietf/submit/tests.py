@@ -9,6 +9,7 @@
 import os
 import re
 import sys
+import threading
 
 from io import StringIO
 from pyquery import PyQuery
@@ -44,13 +45,15 @@
 from ietf.submit.factories import SubmissionFactory, SubmissionExtResourceFactory
 from ietf.submit.forms import SubmissionBaseUploadForm, SubmissionAutoUploadForm
 from ietf.submit.models import Submission, Preapproval, SubmissionExtResource
-from ietf.submit.tasks import cancel_stale_submissions, process_and_accept_uploaded_submission_task
+from ietf.submit.tasks import (cancel_stale_submissions, process_and_accept_uploaded_submission_task,
+                               process_and_accept_rendered_uploaded_submission_task, process_uploaded_submission_task,
+                               render_submission_format_task)
 from ietf.submit.utils import (expirable_submissions, expire_submission, find_submission_filenames,
                                post_submission, validate_submission_name, validate_submission_rev,
                                process_and_accept_uploaded_submission, SubmissionError, process_submission_text,
                                process_submission_xml, process_uploaded_submission, 
                                process_and_validate_submission, apply_yang_checker_to_draft, 
-                               run_all_yang_model_checks)
+                               run_all_yang_model_checks, apply_checkers, render_submission_format)
 from ietf.utils import tool_version
 from ietf.utils.accesstoken import generate_access_token
 from ietf.utils.mail import outbox, get_payload_text
@@ -2829,8 +2832,64 @@ def test_process_and_accept_uploaded_submission(self):
         for ext in ["txt", "html"]:
             self.assertTrue(exists_in_storage("staging", f"draft-somebody-test-00.{ext}"))
         self.assertEqual(submission.file_size, os.stat(txt_path).st_size)
+        self.assertFalse(Path(settings.IDSUBMIT_STAGING_PATH).joinpath('draft-somebody-test-00.prepped.xml').exists())
+        self.assertTrue(
+            submission.submissionevent_set.filter(desc__startswith='Rendered txt, html from xml in').exists()
+        )
         self.assertIn('Completed submission validation checks', submission.submissionevent_set.last().desc)
 
+    @mock.patch("ietf.submit.tasks.chord")
+    def test_process_and_accept_uploaded_submission_task_renders_in_chord(self, mock_chord):
+        """process_and_accept_uploaded_submission_task should render in a chord and accept in its callback"""
+        xml, author = submission_file('draft-somebody-test-00', 'draft-somebody-test-00.xml', None, 'test_submission.xml')
+        xml_data = xml.read()
+        xml.close()
+        submission = SubmissionFactory(
+            name='draft-somebody-test',
+            rev='00',
+            file_types='.xml',
+            submitter=author.formatted_email(),
+            state_id='validating',
+        )
+        xml_path = Path(settings.IDSUBMIT_STAGING_PATH) / 'draft-somebody-test-00.xml'
+        xml_path.write_text(xml_data)
+        store_str("staging", "draft-somebody-test-00.xml", xml_data)
+        prepped_path = Path(settings.IDSUBMIT_STAGING_PATH) / 'draft-somebody-test-00.prepped.xml'
+
+        process_and_accept_uploaded_submission_task(submission.pk)
+        # the task queued the chord and returned without waiting for it
+        self.assertEqual(mock_chord.call_count, 1)
+        header = list(mock_chord.call_args.args[0])
+        self.assertEqual([sig.task for sig in header], [render_submission_format_task.name] * 2)
+        self.assertEqual([sig.args[3] for sig in header], ["txt", "html"])
+        callback = mock_chord.return_value.call_args.args[0]
+        self.assertEqual(callback.task, process_and_accept_rendered_uploaded_submission_task.name)
+        self.assertEqual(callback.args[0], submission.pk)
+        self.assertTrue(prepped_path.exists())
+        self.assertEqual(Submission.objects.get(pk=submission.pk).state_id, 'validating')
+
+        # run the chord
+        results = [render_submission_format(*sig.args) for sig in header]
+        process_and_accept_rendered_uploaded_submission_task(results, *callback.args)
+        submission = Submission.objects.get(pk=submission.pk)  # refresh
+        self.assertEqual(submission.state_id, 'auth')
+        self.assertTrue(xml_path.with_suffix('.txt').exists())
+        self.assertTrue(xml_path.with_suffix('.html').exists())
+        self.assertFalse(prepped_path.exists())
+        self.assertTrue(
+            submission.submissionevent_set.filter(desc__startswith='Rendered txt, html from xml in').exists()
+        )
+
+    @mock.patch("ietf.submit.tasks.chord")
+    @mock.patch("ietf.submit.tasks.process_uploaded_submission")
+    def test_process_uploaded_submission_task_bad_xml(self, mock_process, mock_chord):
+        """process_uploaded_submission_task should process at once if the xml can't be prepped"""
+        submission = SubmissionFactory(name='draft-somebody-test', rev='00', file_types='.xml', state_id='validating')
+        (Path(settings.IDSUBMIT_STAGING_PATH) / 'draft-somebody-test-00.xml').write_text('<rfc>not valid')
+        process_uploaded_submission_task(submission.pk)
+        self.assertFalse(mock_chord.called)
+        self.assertEqual(mock_process.call_args.args, (submission,))
+
     def test_process_and_accept_uploaded_submission_invalid(self):
         """process_and_accept_uploaded_submission should properly process an invalid submission"""
         xml, author = submission_file('draft-somebody-test-00', 'draft-somebody-test-00.xml', None, 'test_submission.xml')
@@ -3451,6 +3510,90 @@ def test_submission_checks(self):
             )
 
 
+class _BarrierChecker:
+    """Submission checker that only finishes once another one is running too"""
+    barrier = None
+    symbol = ""
+
+    def check_file_txt(self, path):
+        self.barrier.wait(timeout=10)
+        return True, f"{self.name}: {path}", 0, 0, {}
+
+class _FirstChecker(_BarrierChecker):
+    name = "first check"
+
+class _SecondChecker(_BarrierChecker):
+    name = "second check"
+
+class _ThreadUnsafeChecker(_BarrierChecker):
+    name = "thread-unsafe check"
+    thread_safe = False
+    thread_ident = None
+
+    def check_file_txt(self, path):
+        _ThreadUnsafeChecker.thread_ident = threading.get_ident()
+        return super().check_file_txt(path)
+
+class _XmlOnlyChecker:
+    name = "xml check"
+    symbol = ""
+
+    def check_file_xml(self, path):
+        raise AssertionError("should not be called without an xml file")
+
+
+@override_settings(IDSUBMIT_CHECKER_CLASSES=[
+    "ietf.submit.tests._FirstChecker",
+    "ietf.submit.tests._XmlOnlyChecker",
+    "ietf.submit.tests._SecondChecker",
+])
+class ApplyCheckersTests(TestCase):
+    def tearDown(self):
+        _BarrierChecker.barrier = None
+        _ThreadUnsafeChecker.thread_ident = None
+        super().tearDown()
+
+    @override_settings(IDSUBMIT_CHECKER_POOL_SIZE=2)
+    def test_apply_checkers_concurrently(self):
+        # the checkers wait for each other, so they only finish if run concurrently
+        _BarrierChecker.barrier = threading.Barrier(2)
+        submission = SubmissionFactory()
+        apply_checkers(submission, {"txt": "draft.txt"})
+        checks = list(submission.checks.order_by("pk"))
+        self.assertEqual([c.checker for c in checks], ["first check", "second check"])
+        self.assertEqual([c.message for c in checks], ["first check: draft.txt", "second check: draft.txt"])
+        self.assertTrue(all(c.duration is not None for c in checks))
+
+    @override_settings(
+        IDSUBMIT_CHECKER_POOL_SIZE=2,
+        IDSUBMIT_CHECKER_CLASSES=[
+            "ietf.submit.tests._FirstChecker",
+            "ietf.submit.tests._ThreadUnsafeChecker",
+            "ietf.submit.tests._SecondChecker",
+        ],
+    )
+    def test_apply_checkers_thread_unsafe(self):
+        # a thread-unsafe checker runs in the calling thread, alongside the pool
+        _BarrierChecker.barrier = threading.Barrier(3)
+        submission = SubmissionFactory()
+        apply_checkers(submission, {"txt": "draft.txt"})
+        self.assertEqual(_ThreadUnsafeChecker.thread_ident, threading.get_ident())
+        self.assertEqual(
+            list(submission.checks.order_by("pk").values_list("checker", flat=True)),
+            ["first check", "thread-unsafe check", "second check"],
+        )
+
+    @override_settings(IDSUBMIT_CHECKER_POOL_SIZE=1)
+    def test_apply_checkers_sequentially(self):
+        _BarrierChecker.barrier = threading.Barrier(1)
+        submission = SubmissionFactory()
+        apply_checkers(submission, {"txt": "draft.txt"})
+        self.assertEqual(
+            list(submission.checks.order_by("pk").values_list("checker", flat=True)),
+            ["first check", "second check"],
+        )
+
+
 class YangCheckerTests(TestCase):
     @mock.patch("ietf.submit.utils.apply_yang_checker_to_draft")
     def test_run_all_yang_model_checks(self, mock_apply):
@@ -14,6 +14,7 @@
 import traceback
 import xml2rfc
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from shutil import move
 from typing import Optional, Union  # pyflakes:ignore
@@ -819,31 +820,64 @@ def fill_in_submission(form, submission, authors, abstract, file_size):
         submission.formal_languages.set(FormalLanguageName.objects.filter(slug__in=form.parsed_draft.get_formal_languages()))
     set_extresources_from_existing_draft(submission)
 
-def apply_checker(checker, submission, file_name):
-    def apply_check(submission, checker, method, fn):
-        func = getattr(checker, method)
-        passed, message, errors, warnings, info = func(fn)
-        check = SubmissionCheck(submission=submission, checker=checker.name, passed=passed,
-                                message=message, errors=errors, warnings=warnings, items=info,
-                                symbol=checker.symbol)
-        check.save()
+def run_checker(checker, file_name):
+    """Run a checker on the first submission file it can handle
+
+    Returns the checker's result and the wall time it took, or None if the checker
+    can't handle any of the files. Doesn't touch the database, so that checkers can
+    be run in worker threads.
+    """
     # ordered list of methods to try
     for method in ("check_fragment_xml", "check_file_xml", "check_fragment_txt", "check_file_txt", ):
         ext = method[-3:]
         if hasattr(checker, method) and ext in file_name:
-            apply_check(submission, checker, method, file_name[ext])
-            break
+            lap = time.time()
+            result = getattr(checker, method)(file_name[ext])
+            return result, datetime.timedelta(seconds=time.time() - lap)
+    return None
+
+def save_check(submission, checker, result, duration):
+    passed, message, errors, warnings, info = result
+    check = SubmissionCheck(submission=submission, checker=checker.name, passed=passed,
+                            message=message, errors=errors, warnings=warnings, items=info,
+                            symbol=checker.symbol, duration=duration)
+    check.save()
+
+def apply_checker(checker, submission, file_name):
+    outcome = run_checker(checker, file_name)
+    if outcome is not None:
+        save_check(submission, checker, *outcome)
 
 def apply_checkers(submission, file_name):
-    # run submission checkers
+    """Run the submission checkers and save their results
+
+    Up to IDSUBMIT_CHECKER_POOL_SIZE checkers run at once in worker threads. A
+    checker with thread_safe = False, such as one that replaces sys.stdout, runs in
+    the calling thread instead, while the others run in the pool. The results are
+    saved in the order of IDSUBMIT_CHECKER_CLASSES, whichever checker finishes first.
+    """
     mark = time.time()
-    for checker_path in settings.IDSUBMIT_CHECKER_CLASSES:
-        lap = time.time()
-        checker_class = import_string(checker_path)
-        checker = checker_class()
-        apply_checker(checker, submission, file_name)
-        tau = time.time() - lap
-        log.log(f"ran {checker.__class__.__name__} ({tau:.3}s) for {file_name}")
+    checkers = [import_string(checker_path)() for checker_path in settings.IDSUBMIT_CHECKER_CLASSES]
+    pooled = [checker for checker in checkers if getattr(checker, "thread_safe", True)]
+    pool_size = min(settings.IDSUBMIT_CHECKER_POOL_SIZE, len(pooled))
+    if pool_size > 1:
+        with ThreadPoolExecutor(max_workers=pool_size) as pool:
+            futures = {checker: pool.submit(run_checker, checker, file_name) for checker in pooled}
+            unpooled = {
+                checker: run_checker(checker, file_name) for checker in checkers if checker not in futures
+            }
+            outcomes = [
+                futures[checker].result() if checker in futures else unpooled[checker]
+                for checker in checkers
+            ]
+    else:
+        outcomes = [run_checker(checker, file_name) for checker in checkers]
+    for checker, outcome in zip(checkers, outcomes):
+        if outcome is None:
+            continue
+        result, duration = outcome
+        save_check(submission, checker, result, duration)
+        log.log(f"ran {checker.__class__.__name__} ({duration.total_seconds():.3}s) for {file_name}")
     tau = time.time() - mark
     log.log(f"ran submission checks ({tau:.3}s) for {file_name}")
 
@@ -921,11 +955,37 @@ def staging_path(filename, revision, ext):
 
 
 def render_missing_formats(submission):
-    """Generate txt and html formats from xml draft
+    """Generate txt and html formats from xml draft, in this process
 
-    If a txt file already exists, leaves it in place. Overwrites an existing html file
-    if there is one.
+    Also renders a pdf with settings.IDSUBMIT_RENDER_PDF. If a txt file already exists,
+    leaves it in place. Overwrites an existing html file if there is one. Celery tasks
+    render the formats in parallel instead; see ietf.submit.tasks.
     """
+    prepped = prep_missing_formats(submission)
+    results = [
+        render_submission_format(prepped["path"], submission.name, submission.rev, fmt, prepped["date"])
+        for fmt in prepped["formats"]
+    ]
+    complete_missing_formats(submission, prepped, results)
+
+
+def prep_missing_formats(submission):
+    """Parse and prep the xml of a submission for rendering its missing formats
+
+    The prepped xml is written to the staging directory once, and each format is
+    rendered from it by render_submission_format(). Returns a JSON-serializable
+    description of the rendering for render_submission_format() and
+    complete_missing_formats().
+    """
+    mark = lap = time.time()
+    timings = []
+
+    def lap_done(stage):
+        nonlocal lap
+        now = time.time()
+        timings.append(f"{stage} {now - lap:.3}s")
+        lap = now
+
     # Capture stdio/stdout from xml2rfc
     xml2rfc_stdout = io.StringIO()
     xml2rfc_stderr = io.StringIO()
@@ -942,6 +1002,7 @@ def render_missing_formats(submission):
             xml2rfc_stdout=xml2rfc_stdout.getvalue(),
             xml2rfc_stderr=xml2rfc_stderr.getvalue(),
         ) from err
+    lap_done("parse")
     # If we have v2, run it through v2v3. Keep track of the submitted version, though.
     xmlroot = xmltree.getroot()
     xml_version = xmlroot.get('version', '2')
@@ -955,6 +1016,7 @@ def render_missing_formats(submission):
                 xml2rfc_stdout=xml2rfc_stdout.getvalue(),
                 xml2rfc_stderr=xml2rfc_stderr.getvalue(),
             ) from err
+        lap_done("v2v3")
 
     # --- Prep the xml ---
     today = date_today()
@@ -975,58 +1037,103 @@ def render_missing_formats(submission):
             xml2rfc_stdout=xml2rfc_stdout.getvalue(),
             xml2rfc_stderr=xml2rfc_stderr.getvalue(),
         ) from err
+    lap_done("prep")
+
+    # --- Write the prepped xml once for the renderers ---
+    prepped_path = staging_path(submission.name, submission.rev, '.prepped.xml')
+    xmltree.tree.write(str(prepped_path), encoding="utf-8", xml_declaration=True)
+    lap_done("write prepped")
+
+    # --- Work out the formats to render from it ---
+    # When the blobstores become autoritative - the txt guard needs to be based on the store
+    formats = []
+    if not staging_path(submission.name, submission.rev, '.txt').exists():
+        formats.append("txt")
+    formats.append("html")
+    if settings.IDSUBMIT_RENDER_PDF:
+        formats.append("pdf")
+    return dict(
+        path=str(prepped_path),
+        formats=formats,
+        date=today.isoformat(),
+        xml_version=xml_version,
+        started=mark,
+        timings=timings,
+        xml2rfc_stdout=xml2rfc_stdout.getvalue(),
+        xml2rfc_stderr=xml2rfc_stderr.getvalue(),
+    )
 
-    # --- Convert to txt ---
-    txt_path = staging_path(submission.name, submission.rev, '.txt')
-    if not txt_path.exists():
-        writer = xml2rfc.TextWriter(xmltree, quiet=True)
-        writer.options.accept_prepped = True
-        writer.options.date = today
-        try:
-            writer.write(txt_path)
-        except Exception as err:
+
+def complete_missing_formats(submission, prepped, results):
+    """Finish rendering the missing formats of a submission
+
+    Takes the description from prep_missing_formats() and the results of
+    render_submission_format() for each format. Removes the prepped xml, then logs the
+    time spent in each stage and records it as a SubmissionEvent. Raises XmlRfcError if
+    a format could not be rendered.
+    """
+    Path(prepped["path"]).unlink(missing_ok=True)
+    xml_path = staging_path(submission.name, submission.rev, '.xml')
+    timings = list(prepped["timings"])
+    for result in results:
+        if result["error"] is not None:
             raise XmlRfcError(
-                "Error generating text format from XML",
-            xml2rfc_stdout=xml2rfc_stdout.getvalue(),
-            xml2rfc_stderr=xml2rfc_stderr.getvalue(),
-            ) from err
+                result["error"],
+                xml2rfc_stdout=prepped["xml2rfc_stdout"] + result["xml2rfc_stdout"],
+                xml2rfc_stderr=prepped["xml2rfc_stderr"] + result["xml2rfc_stderr"],
+            )
         log.log(
             'In %s: xml2rfc %s generated %s from %s (version %s)' % (
                 str(xml_path.parent),
                 xml2rfc.__version__,
-                txt_path.name,
+                staging_path(submission.name, submission.rev, result["format"]).name,
                 xml_path.name,
-                xml_version,
+                prepped["xml_version"],
             )
         )
-        # When the blobstores become autoritative - the guard at the
-        # containing if statement needs to be based on the store
-        with Path(txt_path).open("rb") as f:
-            store_file("staging", f"{submission.name}-{submission.rev}.txt", f)
-
-    # --- Convert to html ---
-    html_path = staging_path(submission.name, submission.rev, '.html')
-    writer = xml2rfc.HtmlWriter(xmltree, quiet=True)
-    writer.options.date = today
+        timings.append(f"{result['format']} {result['render_time']:.3}s")
+        timings.append(f"store {result['format']} {result['store_time']:.3}s")
+    tau = time.time() - prepped["started"]
+    log.log(f"rendered missing formats ({tau:.3}s: {', '.join(timings)}) for {xml_path.name}")
+    create_submission_event(
+        None,
+        submission,
+        f"Rendered {', '.join(prepped['formats'])} from xml in {tau:.3}s ({', '.join(timings)})",
+    )
+
+
+def render_submission_format(prepped_path, name, rev, fmt, date):
+    """Render one format of a submission from its prepped xml and queue it for upload
+
+    The rendered file is written to the staging directory and queued on the blob store
+    write-behind queue. Returns a dict with the time spent rendering and storing and,
+    if rendering failed, the error and the xml2rfc output.
+    """
+    writer_classes = {"txt": "TextWriter", "html": "HtmlWriter", "pdf": "PdfWriter"}
+    xml2rfc_stdout = io.StringIO()
+    xml2rfc_stderr = io.StringIO()
+    xml2rfc.log.write_out = xml2rfc_stdout
+    xml2rfc.log.write_err = xml2rfc_stderr
+    result = dict(format=fmt, render_time=0.0, store_time=0.0, error=None)
+    mark = time.time()
+    out_path = staging_path(name, rev, fmt)
     try:
-        writer.write(str(html_path))
+        xmltree = xml2rfc.XmlRfcParser(prepped_path, quiet=True).parse(remove_comments=False)
+        writer = getattr(xml2rfc, writer_classes[fmt])(xmltree, quiet=True)
+        writer.options.accept_prepped = True
+        writer.options.date = datetime.date.fromisoformat(date)
+        writer.write(str(out_path))
     except Exception as err:
-        raise XmlRfcError(
-            "Error generating HTML format from XML",
-            xml2rfc_stdout=xml2rfc_stdout.getvalue(),
-            xml2rfc_stderr=xml2rfc_stderr.getvalue(),
-        ) from err
-    log.log(
-        'In %s: xml2rfc %s generated %s from %s (version %s)' % (
-            str(xml_path.parent),
-            xml2rfc.__version__,
-            html_path.name,
-            xml_path.name,
-            xml_version,
-        )
-    )
-    with Path(html_path).open("rb") as f:
-        store_file("staging", f"{submission.name}-{submission.rev}.html", f)
+        log.log(f"Error generating {fmt} format of {name}-{rev} from XML: {repr(err)}")
+        result["error"] = f"Error generating {fmt} format from XML"
+    else:
+        result["render_time"] = time.time() - mark
+        mark = time.time()
+        store_file("staging", out_path.name, out_path, write_behind=True)
+        result["store_time"] = time.time() - mark
+    result["xml2rfc_stdout"] = xml2rfc_stdout.getvalue()
+    result["xml2rfc_stderr"] = xml2rfc_stderr.getvalue()
+    return result
 
 
 def accept_submission(submission: Submission, request: Optional[HttpRequest] = None, autopost=False):
@@ -1301,9 +1408,13 @@ def process_submission_text(filename, revision):
     }
 
 
-def process_and_validate_submission(submission):
+def process_and_validate_submission(submission, rendered=None):
     """Process and validate a submission
 
+    Missing formats of an xml submission are rendered in this process, unless rendered
+    is given. It is a (prepped, results) pair from rendering them in Celery tasks; see
+    complete_missing_formats().
+
     Raises SubmissionError or a subclass if an error is encountered.
     """
     if len(set(submission.file_types.split(",")).intersection({".xml", ".txt"})) == 0:
@@ -1315,7 +1426,11 @@ def process_and_validate_submission(submission):
         if ".xml" in submission.file_types:
             xml_metadata = process_submission_xml(submission.name, submission.rev)
             try:
-                render_missing_formats(submission)  # makes HTML and text, unless text was uploaded
+                # makes HTML and text, unless text was uploaded
+                if rendered is None:
+                    render_missing_formats(submission)
+                else:
+                    complete_missing_formats(submission, *rendered)
             except XmlRfcError as err:
                 # log stdio/stderr
                 log.log(
@@ -1409,12 +1524,13 @@ def all_authors_have_emails(submission):
     return all(a["email"] for a in submission.authors)
 
 
-def process_and_accept_uploaded_submission(submission):
+def process_and_accept_uploaded_submission(submission, rendered=None):
     """Process, validate, and, if valid, accept an uploaded submission
 
     Requires that the submitter already be set and is an author of the submitted draft.
     The submission must be in the "validating" state. On success, it will be in the
-    "posted" state. On error, it wil be in the "cancel" state.
+    "posted" state. On error, it wil be in the "cancel" state. See
+    process_and_validate_submission() for rendered.
     """
     if submission.state_id != "validating":
         log.log(f'Submission {submission.pk} is not in "validating" state, skipping.')
@@ -1431,7 +1547,7 @@ def process_and_accept_uploaded_submission(submission):
         return
 
     try:
-        process_and_validate_submission(submission)
+        process_and_validate_submission(submission, rendered)
     except SubmissionError as err:
         submission.refresh_from_db()  # guard against incomplete changes in submission validation / processing
         cancel_submission(submission)  # changes Submission.state
@@ -1460,18 +1576,19 @@ def process_and_accept_uploaded_submission(submission):
     accept_submission(submission)
 
 
-def process_uploaded_submission(submission):
+def process_uploaded_submission(submission, rendered=None):
     """Process and validate an uploaded submission
 
     The submission must be in the "validating" state. On success, it will be in the "uploaded"
-    state. On error, it will be in the "cancel" state.
+    state. On error, it will be in the "cancel" state. See process_and_validate_submission()
+    for rendered.
     """
     if submission.state_id != "validating":
         log.log(f'Submission {submission.pk} is not in "validating" state, skipping.')
         return  # do nothing
 
     try:
-        process_and_validate_submission(submission)
+        process_and_validate_submission(submission, rendered)
     except InconsistentRevisionError as consistency_error:
         submission.refresh_from_db()  # guard against incomplete changes in submission validation / processing
         submission.state_id = "manual"
@@ -0,0 +1,22 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="RfcIndexEntryHash",
+            fields=[
+                ("rfc_number", models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ("hash", models.CharField(max_length=64)),
+                ("time", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+
+from django.db import models
+from django.utils import timezone
+
+
+class RfcIndexEntryHash(models.Model):
+    """Hash of an RFC index entry as of the last time the RFC index sync processed it
+
+    Lets the sync skip entries that have not changed; see
+    ietf.sync.rfceditor.update_docs_from_rfc_index().
+    """
+    rfc_number = models.PositiveIntegerField(primary_key=True)
+    hash = models.CharField(max_length=64)
+    time = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"RFC {self.rfc_number}: {self.hash}"
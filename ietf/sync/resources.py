@@ -0,0 +1,26 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+# -*- coding: utf-8 -*-
+
+
+from ietf.api import ModelResource
+from tastypie.constants import ALL
+from tastypie.cache import SimpleCache
+
+from ietf import api
+
+from ietf.sync.models import RfcIndexEntryHash
+
+
+class RfcIndexEntryHashResource(ModelResource):
+    class Meta:
+        cache = SimpleCache()
+        queryset = RfcIndexEntryHash.objects.all()
+        serializer = api.Serializer()
+        #resource_name = 'rfcindexentryhash'
+        ordering = ['rfc_number', ]
+        filtering = { 
+            "rfc_number": ALL,
+            "hash": ALL,
+            "time": ALL,
+        }
+api.sync.register(RfcIndexEntryHashResource())
@@ -4,6 +4,8 @@
 
 import base64
 import datetime
+import hashlib
+import json
 import re
 import requests
 
@@ -12,6 +14,7 @@
 from xml.dom import pulldom, Node
 
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Subquery, OuterRef, F, Q
 from django.utils import timezone
 from django.utils.encoding import smart_bytes, force_str
@@ -26,6 +29,7 @@
 from ietf.ipr.models import IprDocRel
 from ietf.name.models import StdLevelName, StreamName
 from ietf.person.models import Person
+from ietf.sync.models import RfcIndexEntryHash
 from ietf.utils.log import log
 from ietf.utils.mail import send_mail_text
 from ietf.utils.timezone import datetime_from_date, RPC_TZINFO
@@ -38,6 +42,9 @@
 MIN_INDEX_RESULTS = 8000
 MIN_QUEUE_RESULTS = 10
 
+RFC_INDEX_BATCH_SIZE = 100
+RFC_INDEX_ENTRY_HASH_VERSION = 2  # bump when the processing of index entries changes
+
 def get_child_text(parent_node, tag_name):
     text = []
     for node in parent_node.childNodes:
@@ -336,8 +343,30 @@ def extract_doc_list(parentNode, tagName):
     return data
 
 
+def rfc_index_entry_references(entry):
+    """Names of the documents that processing an entry from parse_index() looks up"""
+    rfc_number, _, _, _, _, updates, _, obsoletes, _, _, draft_name = entry[:11]
+    names = [f"rfc{rfc_number}"] + [name.lower() for name in obsoletes + updates]
+    if draft_name:
+        names.append(draft_name)
+    return names
+
+
+def rfc_index_entry_hash(entry, entry_errata, existing_references):
+    """Hash of an entry from parse_index(), the errata status codes that apply to it
+    and which of the documents it refers to exist"""
+    content = json.dumps(
+        [RFC_INDEX_ENTRY_HASH_VERSION, entry, sorted(er["errata_status_code"] for er in entry_errata), sorted(existing_references)],
+        default=str,
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
 def update_docs_from_rfc_index(
-    index_data, errata_data, skip_older_than_date: Optional[datetime.date] = None
+    index_data,
+    errata_data,
+    skip_older_than_date: Optional[datetime.date] = None,
+    skip_unchanged: bool = True,
 ) -> Iterator[tuple[int, list[str], Document, bool]]:
     """Given parsed data from the RFC Editor index, update the documents in the database
 
@@ -345,6 +374,14 @@ def update_docs_from_rfc_index(
     RFC document and, if applicable, the I-D that it came from.
 
     The skip_older_than_date is a bare date, not a datetime.
+
+    A hash of each processed entry is kept in an RfcIndexEntryHash. It covers the entry,
+    its errata and which of the documents it refers to exist. With skip_unchanged, entries
+    whose hash has not changed since the last sync are skipped. Local changes to the
+    documents are not seen by the hash, so a sync without skip_unchanged should be run
+    now and then to reconcile them. Entries are processed in batches of
+    RFC_INDEX_BATCH_SIZE, each in its own transaction together with the update of its
+    hashes, and the changes for a batch are yielded once it has been committed.
     """
     # Create dict mapping doc-id to list of errata records that apply to it
     errata: dict[str, list[dict]] = {}
@@ -387,29 +424,26 @@ def update_docs_from_rfc_index(
 
     first_sync_creating_subseries = not Document.objects.filter(type_id__in=["bcp","std","fyi"]).exists()
 
-    for (
-        rfc_number,
-        title,
-        authors,
-        rfc_published_date,
-        current_status,
-        updates,
-        updated_by,
-        obsoletes,
-        obsoleted_by,
-        also,
-        draft_name,
-        has_errata,
-        stream,
-        wg,
-        file_formats,
-        pages,
-        abstract,
-    ) in index_data:
-        if skip_older_than_date and rfc_published_date < skip_older_than_date:
-            # speed up the process by skipping old entries (n.b., the comparison above is a
-            # lexical comparison between "YYYY-MM-DD"-formatted dates)
-            continue
+    def update_rfc_from_index_entry(entry):
+        (
+            rfc_number,
+            title,
+            authors,
+            rfc_published_date,
+            current_status,
+            updates,
+            updated_by,
+            obsoletes,
+            obsoleted_by,
+            also,
+            draft_name,
+            has_errata,
+            stream,
+            wg,
+            file_formats,
+            pages,
+            abstract,
+        ) = entry
 
         # we assume two things can happen: we get a new RFC, or an
         # attribute has been updated at the RFC Editor (RFC Editor
@@ -629,43 +663,41 @@ def update_docs_from_rfc_index(
             )
             rfc_published = True
 
-        def parse_relation_list(l):
-            res = []
-            for x in l:
-                for a in Document.objects.filter(name=x.lower(), type_id="rfc"):
-                    if a not in res:
-                        res.append(a)
-            return res
-
-        for x in parse_relation_list(obsoletes):
-            if not RelatedDocument.objects.filter(
-                source=doc, target=x, relationship=relationship_obsoletes
-            ):
-                r = RelatedDocument.objects.create(
-                    source=doc, target=x, relationship=relationship_obsoletes
-                )
-                rfc_changes.append(
-                    "created {rel_name} relation between {src_name} and {tgt_name}".format(
-                        rel_name=r.relationship.name.lower(),
-                        src_name=prettify_std_name(r.source.name),
-                        tgt_name=prettify_std_name(r.target.name),
-                    )
-                )
-
-        for x in parse_relation_list(updates):
-            if not RelatedDocument.objects.filter(
-                source=doc, target=x, relationship=relationship_updates
-            ):
-                r = RelatedDocument.objects.create(
-                    source=doc, target=x, relationship=relationship_updates
-                )
-                rfc_changes.append(
-                    "created {rel_name} relation between {src_name} and {tgt_name}".format(
-                        rel_name=r.relationship.name.lower(),
-                        src_name=prettify_std_name(r.source.name),
-                        tgt_name=prettify_std_name(r.target.name),
+        # add missing obsoletes and updates relations, looking up the targets and
+        # existing relations with one query each
+        relation_names = {
+            relationship_obsoletes: [name.lower() for name in obsoletes],
+            relationship_updates: [name.lower() for name in updates],
+        }
+        targets = {
+            d.name: d
+            for d in Document.objects.filter(
+                name__in=[name for names in relation_names.values() for name in names], type_id="rfc"
+            )
+        }
+        existing_relations = set(
+            RelatedDocument.objects.filter(
+                source=doc, relationship__in=list(relation_names)
+            ).values_list("relationship_id", "target_id")
+        )
+        new_relations = []
+        for relationship, names in relation_names.items():
+            for name in names:
+                target = targets.get(name)
+                if target is not None and (relationship.pk, target.pk) not in existing_relations:
+                    existing_relations.add((relationship.pk, target.pk))
+                    new_relations.append(
+                        RelatedDocument(source=doc, target=target, relationship=relationship)
                     )
+        RelatedDocument.objects.bulk_create(new_relations)
+        for r in new_relations:
+            rfc_changes.append(
+                "created {rel_name} relation between {src_name} and {tgt_name}".format(
+                    rel_name=r.relationship.name.lower(),
+                    src_name=prettify_std_name(r.source.name),
+                    tgt_name=prettify_std_name(r.target.name),
                 )
+            )
 
         if also:
             # recondition also to have proper subseries document names:
@@ -710,16 +742,17 @@ def parse_relation_list(l):
         for subdoc in doc.related_that("contains"):
             if subdoc.name not in also:
                 assert(not first_sync_creating_subseries)
-                subseries_doc.relateddocument_set.filter(target=subdoc).delete()
-                rfc_events.append(doc.docevent_set.create(type="sync_from_rfc_editor", by=system, desc=f"Removed {doc.name} from {subseries_doc.name}"))
-                subseries_doc.docevent_set.create(type="sync_from_rfc_editor", by=system, desc=f"Removed {doc.name} from {subseries_doc.name}")
+                subdoc.relateddocument_set.filter(relationship_id="contains", target=doc).delete()
+                rfc_events.append(doc.docevent_set.create(type="sync_from_rfc_editor", by=system, desc=f"Removed {doc.name} from {subdoc.name}"))
+                subdoc.docevent_set.create(type="sync_from_rfc_editor", by=system, desc=f"Removed {doc.name} from {subdoc.name}")
 
         doc_errata = errata.get(f"RFC{rfc_number}", [])
         all_rejected = doc_errata and all(
             er["errata_status_code"] == "Rejected" for er in doc_errata
         )
+        doc_tags = set(doc.tags.values_list("pk", flat=True))
         if has_errata and not all_rejected:
-            if not doc.tags.filter(pk=tag_has_errata.pk).exists():
+            if tag_has_errata.pk not in doc_tags:
                 doc.tags.add(tag_has_errata)
                 rfc_changes.append("added Errata tag")
             has_verified_errata = any(
@@ -727,18 +760,18 @@ def parse_relation_list(l):
             )
             if (
                 has_verified_errata
-                and not doc.tags.filter(pk=tag_has_verified_errata.pk).exists()
+                and tag_has_verified_errata.pk not in doc_tags
             ):
                 doc.tags.add(tag_has_verified_errata)
                 rfc_changes.append("added Verified Errata tag")
         else:
-            if doc.tags.filter(pk=tag_has_errata.pk):
+            if tag_has_errata.pk in doc_tags:
                 doc.tags.remove(tag_has_errata)
                 if all_rejected:
                     rfc_changes.append("removed Errata tag (all errata rejected)")
                 else:
                     rfc_changes.append("removed Errata tag")
-            if doc.tags.filter(pk=tag_has_verified_errata.pk):
+            if tag_has_verified_errata.pk in doc_tags:
                 doc.tags.remove(tag_has_verified_errata)
                 rfc_changes.append("removed Verified Errata tag")
 
@@ -754,7 +787,55 @@ def parse_relation_list(l):
             )
             doc.save_with_history(rfc_events)
             yield rfc_number, rfc_changes, doc, rfc_published  # yield changes to the RFC
-    
+
+    entries = [
+        entry for entry in index_data
+        # speed up the process by skipping old entries
+        if not (skip_older_than_date and entry[3] < skip_older_than_date)
+    ]
+
+    def entry_hashes(entries):
+        references = {entry[0]: rfc_index_entry_references(entry) for entry in entries}
+        existing = set(
+            Document.objects.filter(
+                name__in=[name for names in references.values() for name in names]
+            ).values_list("name", flat=True)
+        )
+        return {
+            entry[0]: rfc_index_entry_hash(
+                entry,
+                errata.get(f"RFC{entry[0]}", []),
+                [name for name in references[entry[0]] if name in existing],
+            )
+            for entry in entries
+        }
+
+    # Skip the entries that have not changed since they were last processed. The
+    # hashes are not used on the first sync, which must visit every entry.
+    if skip_unchanged and not first_sync_creating_subseries:
+        hashes = entry_hashes(entries)
+        stored_hashes = dict(
+            RfcIndexEntryHash.objects.filter(rfc_number__in=hashes).values_list("rfc_number", "hash")
+        )
+        entries = [entry for entry in entries if stored_hashes.get(entry[0]) != hashes[entry[0]]]
+
+    for start in range(0, len(entries), RFC_INDEX_BATCH_SIZE):
+        batch = entries[start:start + RFC_INDEX_BATCH_SIZE]
+        with transaction.atomic():
+            changes = [change for entry in batch for change in update_rfc_from_index_entry(entry)]
+            # hash the entries as processed, now that their RFC documents exist
+            now = timezone.now()
+            RfcIndexEntryHash.objects.bulk_create(
+                [
+                    RfcIndexEntryHash(rfc_number=rfc_number, hash=entry_hash, time=now)
+                    for rfc_number, entry_hash in entry_hashes(batch).items()
+                ],
+                update_conflicts=True,
+                unique_fields=["rfc_number"],
+                update_fields=["hash", "time"],
+            )
+        yield from changes
+
     if first_sync_creating_subseries:
         # First - create the known subseries documents that have ghosted. 
         # The RFC editor (as of 31 Oct 2023) claims these subseries docs do not exist.
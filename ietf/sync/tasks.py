@@ -19,11 +19,13 @@
 
 
 @shared_task
-def rfc_editor_index_update_task(full_index=False):
+def rfc_editor_index_update_task(full_index=False, reconcile=False):
     """Update metadata from the RFC index
     
     Default is to examine only changes in the past 365 days. Call with full_index=True to update
-    the full RFC index.
+    the full RFC index. Either way, entries that have not changed since the last sync are skipped.
+    Call with reconcile=True to reprocess those as well, which brings back in line any documents
+    that were changed locally.
     
     According to comments on the original script, a year's worth took about 20s on production as of
     August 2022
@@ -65,7 +67,7 @@ def rfc_editor_index_update_task(full_index=False):
         log.log("Not enough errata entries, only %s" % len(errata_data))
         return  # failed
     for rfc_number, changes, doc, rfc_published in rfceditor.update_docs_from_rfc_index(
-        index_data, errata_data, skip_older_than_date=skip_date
+        index_data, errata_data, skip_older_than_date=skip_date, skip_unchanged=not reconcile
     ):
         for c in changes:
             log.log("RFC%s, %s: %s" % (rfc_number, doc.name, c))
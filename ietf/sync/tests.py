@@ -20,13 +20,14 @@
 import debug                            # pyflakes:ignore
 
 from ietf.api.views import EmailIngestionError
-from ietf.doc.factories import WgDraftFactory, RfcFactory, DocumentAuthorFactory, DocEventFactory
+from ietf.doc.factories import WgDraftFactory, RfcFactory, DocumentAuthorFactory, DocEventFactory, BcpFactory
 from ietf.doc.models import Document, DocEvent, DeletedEvent, DocTagName, RelatedDocument, State, StateDocEvent
 from ietf.doc.utils import add_state_change_event
 from ietf.group.factories import GroupFactory
 from ietf.person.factories import PersonFactory
 from ietf.person.models import Person
 from ietf.sync import iana, rfceditor, tasks
+from ietf.sync.models import RfcIndexEntryHash
 from ietf.utils.mail import outbox, empty_outbox
 from ietf.utils.test_utils import login_testing_unauthorized
 from ietf.utils.test_utils import TestCase
@@ -508,6 +509,42 @@ def test_rfc_index(self):
         changed = list(rfceditor.update_docs_from_rfc_index(data, errata, today - datetime.timedelta(days=30)))
         self.assertEqual(len(changed), 0)
 
+    def test_rfc_index_skips_unchanged_entries(self):
+        BcpFactory()  # not the first sync, which ignores the entry hashes
+        entry = (1234, "A Testing RFC", ["A. Author"], date_today().replace(day=1), "Proposed Standard",
+                 [], [], [], [], [], "", False, "IETF", None, "txt", "42", "Some abstract.")
+        changed = list(rfceditor.update_docs_from_rfc_index([entry], []))
+        self.assertEqual([rfc_number for rfc_number, _, _, _ in changed], [1234])
+        rfc = Document.objects.get(type_id="rfc", rfc_number=1234)
+        self.assertEqual(RfcIndexEntryHash.objects.get(rfc_number=1234).hash, rfceditor.rfc_index_entry_hash(entry, [], set()))
+
+        self.assertEqual(list(rfceditor.update_docs_from_rfc_index([entry], [])), [])
+
+        # local changes are left to a sync without skip_unchanged
+        Document.objects.filter(pk=rfc.pk).update(title="Changed locally")
+        self.assertEqual(list(rfceditor.update_docs_from_rfc_index([entry], [])), [])
+        changed = list(rfceditor.update_docs_from_rfc_index([entry], [], skip_unchanged=False))
+        self.assertEqual(len(changed), 1)
+        self.assertEqual(Document.objects.get(pk=rfc.pk).title, "A Testing RFC")
+
+        # an entry is processed again when a document it refers to appears
+        obsoleting = entry[:7] + (["RFC1233"],) + entry[8:]
+        self.assertEqual(list(rfceditor.update_docs_from_rfc_index([obsoleting], [])), [])  # nothing to relate to yet
+        target = RfcFactory(rfc_number=1233)
+        changed = list(rfceditor.update_docs_from_rfc_index([obsoleting], []))
+        self.assertEqual(len(changed), 1)
+        self.assertEqual(rfc.related_that_doc("obs"), [target])
+
+        # a change to the entry or its errata is processed
+        retitled = entry[:1] + ("A Retitled RFC",) + entry[2:11] + (True,) + entry[12:]
+        errata = [{"doc-id": "RFC1234", "errata_status_code": "Verified"}]
+        self.assertEqual(len(list(rfceditor.update_docs_from_rfc_index([retitled], errata))), 1)
+        self.assertEqual(Document.objects.get(pk=rfc.pk).title, "A Retitled RFC")
+        self.assertCountEqual(rfc.tags.values_list("slug", flat=True), ["errata", "verified-errata"])
+        errata[0]["errata_status_code"] = "Rejected"
+        self.assertEqual(len(list(rfceditor.update_docs_from_rfc_index([retitled], errata))), 1)
+        self.assertEqual(rfc.tags.count(), 0)
+
     def _generate_rfc_queue_xml(self, draft, state, auth48_url=None):
         """Generate an RFC queue xml string for a draft"""
         t = '''<rfc-editor-queue xmlns="http://www.rfc-editor.org/rfc-editor-queue">
@@ -826,6 +863,7 @@ def json(self):
             update_docs_args, (parse_index_mock.return_value, errata_response.json())
         )
         self.assertIsNotNone(update_docs_kwargs["skip_older_than_date"])
+        self.assertTrue(update_docs_kwargs["skip_unchanged"])
 
         # Test again with full_index = True
         requests_get_mock.reset_mock()
@@ -850,6 +888,18 @@ def json(self):
             update_docs_args, (parse_index_mock.return_value, errata_response.json())
         )
         self.assertIsNone(update_docs_kwargs["skip_older_than_date"])
+        self.assertTrue(update_docs_kwargs["skip_unchanged"])
+
+        # Test again with reconcile = True
+        requests_get_mock.reset_mock()
+        parse_index_mock.reset_mock()
+        update_docs_mock.reset_mock()
+        requests_get_mock.side_effect = (index_response, errata_response)  # will step through these
+        tasks.rfc_editor_index_update_task(full_index=True, reconcile=True)
+        self.assertTrue(update_docs_mock.called)
+        (_, update_docs_kwargs) = update_docs_mock.call_args
+        self.assertIsNone(update_docs_kwargs["skip_older_than_date"])
+        self.assertFalse(update_docs_kwargs["skip_unchanged"])
 
         # Test error handling
         requests_get_mock.reset_mock()
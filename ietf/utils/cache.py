@@ -1,7 +1,20 @@
-# Copyright The IETF Trust 2023, All Rights Reserved
+# Copyright The IETF Trust 2023-2025, All Rights Reserved
 # -*- coding: utf-8 -*-
 
-from django.core.cache.backends.base import DEFAULT_TIMEOUT
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from hashlib import sha384
+from pathlib import Path
+
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
 from django.core.cache.backends.memcached import PyMemcacheCache
 from pymemcache.exceptions import MemcacheServerError
 
@@ -18,3 +31,331 @@ def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
                 log(f"Memcache failed to cache large object for {key}")
             else:
                 raise
+
+
+class TieredFileCache(BaseCache):
+    """Cache backend with an in-process LRU over a content-addressed store on disk
+
+    Meant as a replacement for FileBasedCache for large values such as htmlized and
+    pdfized documents. FileBasedCache culls by listing its whole directory, which
+    stalls once it holds many entries, and unpickles every value it reads.
+
+    Values are kept in files named after the SHA-384 digest of their contents, so
+    identical values are stored once. bytes and str values are stored as they are,
+    anything else is pickled. An SQLite index in the cache directory maps keys to
+    digests and keeps expiry and last-use times, so culling removes the least
+    recently used entries through an index instead of scanning the directory.
+    Data files are only written and removed inside index write transactions, so a
+    file can't be removed between being written and being referred to. To keep
+    those transactions short, a set that finds the cache full removes the excess
+    plus MAX_ENTRIES / CULL_FREQUENCY more, so that the next few sets don't need to
+    cull, but at most CULL_BATCH_SIZE entries. An over-full cache, e.g. after
+    MAX_ENTRIES is lowered, shrinks back over several sets.
+
+    Values up to MEMORY_MAX_ENTRY_SIZE bytes are also kept in a per-process LRU of
+    at most MEMORY_MAX_SIZE bytes. Other processes can't invalidate it, so an entry
+    there may be served for up to MEMORY_TIMEOUT seconds after another process has
+    replaced or deleted it.
+
+    Hit, miss and eviction counters are kept per process and added to totals in the
+    index every STATS_FLUSH_INTERVAL seconds; see stats().
+    """
+    STAT_NAMES = ("memory_hits", "disk_hits", "misses", "sets", "evictions", "memory_evictions")
+    ACCESS_TIME_RESOLUTION = 60  # seconds; limits index writes for reads of hot entries
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._dir = Path(location)
+        self._memory_max_entry_size = int(options.get("MEMORY_MAX_ENTRY_SIZE", 64 * 1024))
+        self._memory_max_size = int(options.get("MEMORY_MAX_SIZE", 32 * 1024 * 1024))
+        self._memory_timeout = float(options.get("MEMORY_TIMEOUT", 60))
+        self._stats_flush_interval = float(options.get("STATS_FLUSH_INTERVAL", 10))
+        self._cull_batch_size = int(options.get("CULL_BATCH_SIZE", 100))
+        self._memory = OrderedDict()  # key -> (kind, data, expires)
+        self._memory_size = 0
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._stats = Counter()
+        self._stats_flushed = time.time()
+
+    # Index
+
+    def _db(self):
+        """SQLite connection for this thread and process"""
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            self._dir.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self._dir / "index.sqlite3", timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY, digest TEXT NOT NULL, kind TEXT NOT NULL,
+                    size INTEGER NOT NULL, expires REAL, accessed REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+                CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires);
+                CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+                CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            """)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @contextmanager
+    def _write_transaction(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        else:
+            db.execute("COMMIT")
+
+    def _adjust_entry_count(self, db, delta):
+        if delta:
+            db.execute(
+                "INSERT INTO counters (name, value) VALUES ('entries', ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                (delta, ),
+            )
+
+    def _remove_entries(self, db, rows):
+        """Remove entries given as (key, digest) rows, and their data when unused"""
+        if not rows:
+            return
+        db.executemany("DELETE FROM entries WHERE key = ?", [(key, ) for key, _ in rows])
+        self._adjust_entry_count(db, -len(rows))
+        for digest in set(digest for _, digest in rows):
+            if db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest, )).fetchone() is None:
+                self._data_path(digest).unlink(missing_ok=True)
+
+    def _cull(self, db):
+        """Drop expired entries, then the least recently used ones beyond MAX_ENTRIES
+
+        Removes at most CULL_BATCH_SIZE entries in all.
+        """
+        count = db.execute("SELECT value FROM counters WHERE name = 'entries'").fetchone()
+        excess = (count[0] if count else 0) - self._max_entries
+        if excess <= 0:
+            return
+        # like FileBasedCache, make room for more than one new entry at a time
+        slack = self._max_entries // self._cull_frequency if self._cull_frequency else 0
+        limit = min(excess + slack, self._cull_batch_size)
+        rows = db.execute(
+            "SELECT key, digest FROM entries WHERE expires <= ? LIMIT ?", (time.time(), limit)
+        ).fetchall()
+        self._remove_entries(db, rows)
+        limit -= len(rows)
+        if limit > 0:
+            rows = db.execute(
+                "SELECT key, digest FROM entries ORDER BY accessed LIMIT ?", (limit, )
+            ).fetchall()
+            self._remove_entries(db, rows)
+            with self._lock:
+                self._stats["evictions"] += len(rows)
+
+    # Data files
+
+    def _data_path(self, digest):
+        return self._dir / "data" / digest[:2] / digest
+
+    def _write_data(self, digest, data):
+        """Write a data file, unless it exists. Call within a write transaction."""
+        path = self._data_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{digest}.{uuid.uuid4().hex}.tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)  # atomic
+
+    def _read_data(self, digest):
+        return self._data_path(digest).read_bytes()
+
+    # Values
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return "b", value
+        if isinstance(value, str):
+            return "s", value.encode("utf-8")
+        return "p", pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(kind, data):
+        if kind == "b":
+            return data
+        if kind == "s":
+            return data.decode("utf-8")
+        return pickle.loads(data)
+
+    # Memory tier
+
+    def _memory_get(self, key):
+        with self._lock:
+            item = self._memory.get(key)
+            if item is None:
+                return None
+            if item[2] is not None and item[2] <= time.time():
+                self._memory_discard(key)
+                return None
+            self._memory.move_to_end(key)
+            return item
+
+    def _memory_put(self, key, kind, data, expires):
+        if len(data) > self._memory_max_entry_size:
+            return
+        memory_expires = time.time() + self._memory_timeout
+        if expires is not None:
+            memory_expires = min(expires, memory_expires)
+        with self._lock:
+            self._memory_discard(key)
+            self._memory[key] = (kind, data, memory_expires)
+            self._memory_size += len(data)
+            while self._memory_size > self._memory_max_size:
+                old_key = next(iter(self._memory))
+                self._memory_discard(old_key)
+                self._stats["memory_evictions"] += 1
+
+    def _memory_discard(self, key):
+        with self._lock:
+            item = self._memory.pop(key, None)
+            if item is not None:
+                self._memory_size -= len(item[1])
+
+    # Counters
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+        if time.time() - self._stats_flushed >= self._stats_flush_interval:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Add this process's counters to the totals in the index"""
+        with self._lock:
+            stats, self._stats = self._stats, Counter()
+            self._stats_flushed = time.time()
+        if stats:
+            with self._write_transaction() as db:
+                db.executemany(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                    list(stats.items()),
+                )
+
+    def stats(self):
+        """Counters for all processes using the cache, plus the number of entries"""
+        self.flush_stats()
+        counters = dict(self._db().execute("SELECT name, value FROM counters").fetchall())
+        return {name: counters.get(name, 0) for name in ("entries", ) + self.STAT_NAMES}
+
+    # Cache API
+
+    def _set(self, key, value, timeout, only_if_missing=False):
+        expires = self.get_backend_timeout(timeout)
+        if expires is not None and expires <= time.time():  # timeout of 0 or less - don't cache
+            self._delete(key)
+            return False
+        if only_if_missing and self._has_key(key):
+            return False
+        kind, data = self._encode(value)
+        digest = sha384(data).hexdigest()
+        now = time.time()
+        with self._write_transaction() as db:
+            existing = db.execute("SELECT digest, expires FROM entries WHERE key = ?", (key, )).fetchone()
+            if existing is not None and only_if_missing and (existing[1] is None or existing[1] > now):
+                return False
+            # Written within the transaction, so _remove_entries() in another process
+            # can't remove the file before the entry referring to it is committed
+            self._write_data(digest, data)
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, digest, kind, size, expires, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, digest, kind, len(data), expires, now),
+            )
+            if existing is None:
+                self._adjust_entry_count(db, 1)
+                self._cull(db)
+            elif existing[0] != digest and db.execute(
+                "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (existing[0], )
+            ).fetchone() is None:
+                self._data_path(existing[0]).unlink(missing_ok=True)
+        self._memory_put(key, kind, data, expires)
+        self._count("sets")
+        return True
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._set(key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._set(key, value, timeout, only_if_missing=True)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        item = self._memory_get(key)
+        if item is not None:
+            self._count("memory_hits")
+            return self._decode(item[0], item[1])
+        now = time.time()
+        row = self._db().execute(
+            "SELECT digest, kind, expires, accessed FROM entries WHERE key = ?", (key, )
+        ).fetchone()
+        if row is None or (row[2] is not None and row[2] <= now):
+            self._count("misses")
+            return default
+        digest, kind, expires, accessed = row
+        try:
+            data = self._read_data(digest)
+        except FileNotFoundError:  # removed by another process since the lookup
+            self._count("misses")
+            return default
+        if now - accessed > self.ACCESS_TIME_RESOLUTION:
+            with self._write_transaction() as db:
+                db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        self._memory_put(key, kind, data, expires)
+        self._count("disk_hits")
+        return self._decode(kind, data)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        expires = self.get_backend_timeout(timeout)
+        self._memory_discard(key)
+        with self._write_transaction() as db:
+            updated = db.execute(
+                "UPDATE entries SET expires = ?, accessed = ? WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (expires, time.time(), key, time.time()),
+            ).rowcount
+        return updated > 0
+
+    def _delete(self, key):
+        self._memory_discard(key)
+        with self._write_transaction() as db:
+            rows = db.execute("SELECT key, digest FROM entries WHERE key = ?", (key, )).fetchall()
+            self._remove_entries(db, rows)
+        return bool(rows)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._delete(key)
+
+    def _has_key(self, key):
+        row = self._db().execute("SELECT expires FROM entries WHERE key = ?", (key, )).fetchone()
+        return row is not None and (row[0] is None or row[0] > time.time())
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._has_key(key)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+        with self._write_transaction() as db:
+            db.execute("DELETE FROM entries")
+            db.execute("DELETE FROM counters WHERE name = 'entries'")
+            shutil.rmtree(self._dir / "data", ignore_errors=True)
@@ -111,6 +111,20 @@ def create_default_tasks(self):
             ),
         )
 
+        PeriodicTask.objects.get_or_create(
+            name="Reconcile with RFC Editor index",
+            task="ietf.sync.tasks.rfc_editor_index_update_task",
+            kwargs=json.dumps(dict(full_index=True, reconcile=True)),
+            defaults=dict(
+                enabled=False,
+                crontab=self.crontabs["weekly"],
+                description=(
+                    "Reprocess every RFC index entry, including those that have not changed since the "
+                    "last sync, to bring back in line documents that were changed locally"
+                ),
+            ),
+        )
+
         PeriodicTask.objects.get_or_create(
             name="Fetch meeting attendance",
             task="ietf.stats.tasks.fetch_meeting_attendance_task",
@@ -177,7 +191,7 @@ def create_default_tasks(self):
             defaults=dict(
                 enabled=False,
                 crontab=self.crontabs["hourly"],
-                description="Update I-D index files",
+                description="Update I-D index files (skipped when nothing has changed)",
             ),
         )
         
@@ -241,6 +255,16 @@ def create_default_tasks(self):
             ),
         )
 
+        PeriodicTask.objects.get_or_create(
+            name="Update group stats summary",
+            task="ietf.group.tasks.update_group_stats_documents_task",
+            defaults=dict(
+                enabled=False,
+                crontab=self.crontabs["hourly"],
+                description="Update the latest activity of drafts counted by the group stats",
+            ),
+        )
+
         PeriodicTask.objects.get_or_create(
             name="Generate I-D bibxml files",
             task="ietf.doc.tasks.generate_draft_bibxml_files_task",
@@ -251,6 +275,19 @@ def create_default_tasks(self):
             ),
         )
 
+        PeriodicTask.objects.get_or_create(
+            name="Flush blob store write-behind queue",
+            task="ietf.doc.tasks.flush_blob_write_behind_queue_task",
+            defaults=dict(
+                enabled=False,
+                crontab=self.crontabs["every_15m"],
+                description=(
+                    "Retry queued blob store writes. Writes normally trigger their own "
+                    "flush, this catches any that were missed."
+                ),
+            ),
+        )
+
         PeriodicTask.objects.get_or_create(
             name="Send personal API key usage emails",
             task="ietf.person.tasks.send_apikey_usage_emails_task",
@@ -0,0 +1,37 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+# -*- coding: utf-8 -*-
+
+from tqdm import tqdm
+
+from django.core.management.base import BaseCommand, CommandError
+
+import debug                            # pyflakes:ignore
+
+from ietf.community.models import CommunityList
+from ietf.community.utils import update_tracked_docs_for_community_list
+
+class Command(BaseCommand):
+    help = ("""
+        Rebuild the materialized table of documents tracked by each community list,
+        or with --verify, check that it is up to date.
+        """)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', default=False,
+            help="Only report the lists that are out of date, and fail if there are any")
+
+    def handle(self, *args, **options):
+        verbosity = int(options.get('verbosity', 1))
+        verify = options['verify']
+        out_of_date = 0
+        clists = CommunityList.objects.select_related('person', 'group')
+        for clist in tqdm(clists, disable=(verbosity!=1)):
+            added, removed = update_tracked_docs_for_community_list(clist, dry_run=verify)
+            if added or removed:
+                out_of_date += 1
+                if verbosity > 1:
+                    self.stdout.write("%-48s +%d -%d\n" % (str(clist)[:48], added, removed))
+        if verify and out_of_date:
+            raise CommandError("%d community lists are out of date" % out_of_date)
+        if verbosity > 0:
+            self.stdout.write("%d community lists %s out of date\n" % (out_of_date, "are" if verify else "were"))
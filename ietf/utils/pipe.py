@@ -1,34 +1,158 @@
-# Copyright The IETF Trust 2010-2020, All Rights Reserved
+# Copyright The IETF Trust 2010-2025, All Rights Reserved
 # -*- coding: utf-8 -*-
+"""Running external commands
 
+run_command() runs a command and collects its output. stdout and stderr are
+drained concurrently by reader threads, so a command that writes a lot to one of
+them can't deadlock against us reading the other, and output is collected in
+chunks that are joined once at the end. run_commands() runs several commands in
+parallel.
+"""
+
+import shlex
+import subprocess
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Union
+
+CHUNK_SIZE = 65536
+MAX_OUTPUT = 65536*16
+
+
+class _Reader(threading.Thread):
+    """Read a stream to its end, keeping at most max_output bytes of it
+
+    Output beyond max_output is read and dropped, so that the writer never blocks.
+    """
+    def __init__(self, stream, max_output=None, dest=None):
+        super().__init__(daemon=True)
+        self.stream = stream
+        self.max_output = max_output
+        self.dest = dest
+        self.chunks = []
+        self.length = 0
+        self.truncated = False
+
+    def run(self):
+        with self.stream:
+            for chunk in iter(lambda: self.stream.read(CHUNK_SIZE), b""):
+                if self.dest is not None:
+                    self.dest.write(chunk)
+                    continue
+                if self.max_output is not None and self.length + len(chunk) > self.max_output:
+                    chunk = chunk[:self.max_output - self.length]
+                    self.truncated = True
+                if chunk:
+                    self.chunks.append(chunk)
+                    self.length += len(chunk)
+
+    def output(self):
+        return b"".join(self.chunks)
+
+
+def _write_input(stream, data):
+    try:
+        stream.write(data)
+    except BrokenPipeError:
+        pass  # the command exited without reading all of its input
+    finally:
+        try:
+            stream.close()
+        except BrokenPipeError:
+            pass
+
+
+def run_command(
+    cmd: Union[str, list],
+    input: Optional[bytes] = None,
+    timeout: Optional[float] = None,
+    max_output: Optional[int] = MAX_OUTPUT,
+    stdout_path: Optional[Union[str, Path]] = None,
+    cwd: Optional[Union[str, Path]] = None,
+):
+    """Run a command and return its exit code, stdout and stderr as bytes
+
+    cmd is either an argument list, which is run directly, or a string, which is
+    run by the shell. input, if given, is written to the command's stdin.
+
+    stdout and stderr are each limited to max_output bytes (None for no limit).
+    If a stream is cut short a note saying so is added to the returned stderr.
+    With stdout_path, stdout is written to that file instead of being returned,
+    and is not limited.
+
+    If the command doesn't finish within timeout seconds it is killed and
+    subprocess.TimeoutExpired is raised, with the output collected so far.
+    """
+    shell = isinstance(cmd, str)
+    dest = open(stdout_path, "wb") if stdout_path is not None else None
+    try:
+        with subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            shell=shell,
+            cwd=cwd,
+        ) as proc:
+            readers = [
+                _Reader(proc.stdout, max_output, dest),
+                _Reader(proc.stderr, max_output),
+            ]
+            threads = list(readers)
+            if input is not None:
+                threads.append(threading.Thread(target=_write_input, args=(proc.stdin, input), daemon=True))
+            for thread in threads:
+                thread.start()
+            try:
+                code = proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+                for thread in threads:
+                    thread.join()
+                raise subprocess.TimeoutExpired(
+                    cmd, timeout, output=readers[0].output(), stderr=readers[1].output()
+                )
+            for thread in threads:
+                thread.join()
+    finally:
+        if dest is not None:
+            dest.close()
+
+    out, err = readers[0].output(), readers[1].output()
+    for name, reader in zip(("Output", "Error output"), readers):
+        if reader.truncated:
+            err += b"\n%s exceeds %d bytes and has been truncated" % (name.encode(), max_output)
+    return code, out, err
+
+
+def run_commands(cmds: list, max_workers: Optional[int] = None, **kwargs):
+    """Run several commands in parallel with run_command()
+
+    Returns a list of results in the order of cmds. The keyword arguments are
+    passed on to run_command(). If a command raises, the exception is returned in
+    place of its result, so one failed command doesn't hide the others' results.
+    """
+    def run(cmd):
+        try:
+            return run_command(cmd, **kwargs)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(run, cmds))
+
+
+def command_string(cmd: Union[str, list]) -> str:
+    """Printable form of a command given to run_command()"""
+    return cmd if isinstance(cmd, str) else shlex.join(str(arg) for arg in cmd)
 
-# Simplified interface to os.popen3()
 
 def pipe(cmd, str=None):
-    from subprocess import Popen, PIPE
-    bufsize = 4096
-    MAX = 65536*16
-
-    if str and len(str) > 4096:                 # XXX: Hardcoded Linux 2.4, 2.6 pipe buffer size
-        bufsize = len(str)
-
-    with Popen(cmd, stdin=PIPE, stdout=PIPE, stderr=PIPE, bufsize=bufsize, shell=True) as pipe:
-        if not str is None:
-            pipe.stdin.write(str)
-            pipe.stdin.close()
-
-        out = b""
-        err = b""
-        while True:
-            str = pipe.stdout.read()
-            if str:
-                out += str
-            code = pipe.poll()
-            if code != None:
-                err = pipe.stderr.read()
-                break
-            if len(out) >= MAX:
-                err = "Output exceeds %s bytes and has been truncated" % MAX
-                break
-
-    return (code, out, err)
+    """Run cmd in the shell, feeding it str, and return (code, out, err)
+
+    Kept for existing callers; new code should use run_command().
+    """
+    return run_command(cmd, input=str)
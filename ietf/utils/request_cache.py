@@ -0,0 +1,76 @@
+# Copyright The IETF Trust 2025, All Rights Reserved
+"""Request-scoped memoization of model accessors
+
+While a request_cache() block is active (request_cache_middleware opens one for each
+request), methods decorated with @request_memoize share their results between all
+instances of the same model object, so a document loaded several times during a
+request is only queried once. Outside such a block the methods run unchanged.
+
+Code that changes what a memoized method returns must call invalidate_request_cache().
+Other request-scoped memos can keep their results with request_cache_entries().
+"""
+import contextvars
+
+from contextlib import contextmanager
+from functools import wraps
+
+_cache = contextvars.ContextVar("request_cache", default=None)
+
+
+@contextmanager
+def request_cache():
+    """Memoize @request_memoize methods for the duration of the block"""
+    token = _cache.set({})
+    try:
+        yield
+    finally:
+        _cache.reset(token)
+
+
+def request_cache_entries(namespace, model, pk, create=True):
+    """Get the dict of memoized results for an object in a namespace
+
+    Returns None outside a request_cache() block, or if create is False and there
+    are no results for the object yet.
+    """
+    cache = _cache.get()
+    if cache is None:
+        return None
+    if create:
+        return cache.setdefault((namespace, model, pk), {})
+    return cache.get((namespace, model, pk))
+
+
+def request_memoize(namespace):
+    """Memoize a model method for the current request
+
+    Results are kept per namespace, model and primary key, so that they can be
+    invalidated with invalidate_request_cache(). Lists are copied on the way out.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if _cache.get() is None or self.pk is None:
+                return func(self, *args, **kwargs)
+            try:
+                key = (func.__name__, args, frozenset(kwargs.items()))
+                hash(key)
+            except TypeError:
+                return func(self, *args, **kwargs)  # unhashable arguments
+            entries = request_cache_entries(namespace, type(self), self.pk)
+            if key not in entries:
+                entries[key] = func(self, *args, **kwargs)
+            result = entries[key]
+            return list(result) if isinstance(result, list) else result
+        return wrapper
+    return decorator
+
+
+def invalidate_request_cache(model, pk, namespace=None):
+    """Forget the memoized results for an object, optionally only those in a namespace"""
+    cache = _cache.get()
+    if cache is None:
+        return
+    for key in list(cache):
+        if key[1] is model and key[2] == pk and (namespace is None or key[0] == namespace):
+            del cache[key]
@@ -42,10 +42,14 @@ def save(self, name, content, max_length=None):
 
         if settings.ENABLE_BLOBSTORAGE:
             try:
-                # Retrieve the content and write to the blob store
                 blob_name = Path(saved_name).name  # strips path
-                with self.open(saved_name, "rb") as f:
-                    store_file(self.kind, blob_name, f, allow_overwrite=True)
+                if settings.BLOBSTORAGE_WRITE_BEHIND:
+                    # Queue the file we just wrote, without reading it back
+                    store_file(self.kind, blob_name, Path(self.path(saved_name)), allow_overwrite=True)
+                else:
+                    # Retrieve the content and write to the blob store
+                    with self.open(saved_name, "rb") as f:
+                        store_file(self.kind, blob_name, f, allow_overwrite=True)
             except Exception as err:
                 log(f"Blobstore Error: Failed to shadow {saved_name} at {self.kind}:{blob_name}: {repr(err)}")
         return saved_name  # includes the path!
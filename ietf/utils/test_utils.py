@@ -212,6 +212,7 @@ class TestCase(django.test.TestCase):
         'INTERNET_DRAFT_PATH',
         'BIBXML_BASE_PATH',
         'FTP_DIR',
+        'BLOBSTORAGE_WRITE_BEHIND_DIR',
     ]
 
     parser = html5lib.HTMLParser(strict=True)
@@ -9,6 +9,8 @@
 import os.path
 import pytz
 import shutil
+import subprocess
+import sys
 import types
 
 from mock import call, patch
@@ -41,6 +43,7 @@
 from ietf.admin.sites import AdminSite
 from ietf.person.name import name_parts, unidecode_name
 from ietf.submit.tests import submission_file
+from ietf.utils.cache import TieredFileCache
 from ietf.utils.draft import PlaintextDraft, getmeta
 from ietf.utils.fields import SearchableField
 from ietf.utils.log import unreachable, assertion
@@ -53,6 +56,7 @@
     decode_header_value,
     show_that_mail_was_sent,
 )
+from ietf.utils.pipe import pipe, run_command, run_commands
 from ietf.utils.test_runner import get_template_paths, set_coverage_checking
 from ietf.utils.test_utils import TestCase, unicontent
 from ietf.utils.text import parse_unicode
@@ -735,7 +739,133 @@ def test_assertion(self):
         assertion('False')
         settings.SERVER_MODE = 'test'
 
-class TestRFC2047Strings(TestCase):
+class PipeTests(TestCase):
+    def python(self, code):
+        return [sys.executable, "-c", code]
+
+    def test_run_command(self):
+        # fills both pipes, which deadlocks unless they are drained concurrently
+        noisy = self.python("import sys; sys.stderr.write('e' * 300000); sys.stdout.write('o' * 300000)")
+        code, out, err = run_command(noisy, max_output=None)
+        self.assertEqual((code, out, err), (0, b"o" * 300000, b"e" * 300000))
+
+        code, out, err = run_command(noisy, max_output=1000)
+        self.assertEqual(out, b"o" * 1000)
+        self.assertTrue(err.startswith(b"e" * 1000))
+        self.assertIn(b"Output exceeds 1000 bytes", err)
+
+        code, out, err = run_command(self.python("import sys; sys.stdout.write(sys.stdin.read().upper())"), input=b"x" * 200000)
+        self.assertEqual(out, b"X" * 200000)
+
+        code, out, err = run_command("echo shell; exit 3")
+        self.assertEqual((code, out), (3, b"shell\n"))
+
+        with self.assertRaises(subprocess.TimeoutExpired) as cm:
+            run_command(self.python("import sys, time; print('started', flush=True); time.sleep(30)"), timeout=1)
+        self.assertEqual(cm.exception.output, b"started\n")
+
+        outdir = mkdtemp()
+        try:
+            path = os.path.join(outdir, "out")
+            code, out, err = run_command(noisy, max_output=1000, stdout_path=path)
+            self.assertEqual(out, b"")
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"o" * 300000)
+        finally:
+            shutil.rmtree(outdir)
+
+    def test_run_commands(self):
+        results = run_commands([self.python(f"print({n})") for n in range(4)] + [["/nonexistent/command"]], max_workers=2)
+        self.assertEqual([r[1] for r in results[:4]], [b"0\n", b"1\n", b"2\n", b"3\n"])
+        self.assertIsInstance(results[4], OSError)
+
+    def test_pipe(self):
+        self.assertEqual(pipe("cat", b"input"), (0, b"input", b""))
+
+class TieredFileCacheTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        super().tearDown()
+
+    def make_cache(self, **options):
+        return TieredFileCache(self.cache_dir, {"OPTIONS": dict(MEMORY_MAX_ENTRY_SIZE=100) | options})
+
+    def test_get_set(self):
+        cache = self.make_cache()
+        cache.set("str", "text")
+        cache.set("bytes", b"x" * 5000)  # large enough to go to disk only
+        cache.set("obj", {"a": [1, 2]})
+        cache.set("same", "text")
+        self.assertEqual(cache.get("str"), "text")
+        self.assertEqual(cache.get("bytes"), b"x" * 5000)
+        self.assertEqual(cache.get("obj"), {"a": [1, 2]})
+        self.assertIsNone(cache.get("missing"))
+        # identical values share a data file
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(os.path.join(self.cache_dir, "data"))), 3)
+
+        # another process sees the entries on disk
+        other = self.make_cache()
+        self.assertEqual(other.get("bytes"), b"x" * 5000)
+        self.assertEqual(other.get("str"), "text")
+
+        self.assertFalse(cache.add("str", "other"))
+        # a failed add doesn't write its value
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(os.path.join(self.cache_dir, "data"))), 3)
+        self.assertTrue(cache.add("new", "other"))
+        self.assertTrue(cache.delete("str"))
+        self.assertFalse(cache.has_key("str"))
+        cache.set("zero", "x", timeout=0)
+        self.assertFalse(cache.has_key("zero"))
+        cache.set("expired", "x", timeout=1)
+        with patch("ietf.utils.cache.time.time", return_value=datetime.datetime.now().timestamp() + 10):
+            self.assertIsNone(cache.get("expired"))
+
+        cache.clear()
+        self.assertIsNone(cache.get("obj"))
+        self.assertIsNone(other.get("bytes"))
+
+    def test_eviction_and_stats(self):
+        cache = self.make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=10, MEMORY_MAX_SIZE=250)
+        for n in range(20):
+            cache.set(f"key{n}", f"value{n:090d}")
+        stats = cache.stats()
+        self.assertLessEqual(stats["entries"], 10)
+        self.assertEqual(stats["sets"], 20)
+        self.assertEqual(stats["evictions"], 20 - stats["entries"])
+        self.assertGreater(stats["memory_evictions"], 0)
+        self.assertIsNone(cache.get("key0"))  # least recently used
+        self.assertEqual(cache.get("key19"), f"value{19:090d}")  # from memory
+        cache._memory.clear()
+        self.assertEqual(cache.get("key19"), f"value{19:090d}")  # from disk
+        stats = cache.stats()
+        self.assertEqual((stats["misses"], stats["memory_hits"], stats["disk_hits"]), (1, 1, 1))
+
+    def test_cull_is_bounded(self):
+        cache = self.make_cache(MAX_ENTRIES=30, CULL_FREQUENCY=3, CULL_BATCH_SIZE=5)
+        for n in range(29):
+            cache.set(f"key{n}", f"value{n}")
+        cache.set("expired", "value", timeout=1)
+        with patch("ietf.utils.cache.time.time", return_value=datetime.datetime.now().timestamp() + 10):
+            # the excess plus slack is more than a batch, expired entries go first
+            cache.set("key30", "value30")
+            self.assertEqual(cache.stats()["entries"], 26)
+            self.assertFalse(cache.has_key("expired"))
+            self.assertFalse(cache.has_key("key3"))
+            self.assertTrue(cache.has_key("key4"))
+
+        # a smaller MAX_ENTRIES is reached over several sets
+        cache = self.make_cache(MAX_ENTRIES=10, CULL_BATCH_SIZE=5)
+        cache.set("key31", "value31")
+        self.assertEqual(cache.stats()["entries"], 22)
+        for n in range(32, 36):
+            cache.set(f"key{n}", f"value{n}")
+        self.assertLessEqual(cache.stats()["entries"], 10)
+        self.assertTrue(cache.has_key("key35"))
+
     def test_parse_unicode(self):
         names = (
             ('=?utf-8?b?4Yuz4YuK4Ym1IOGJoOGJgOGIiA==?=', 'ዳዊት በቀለ'),
@@ -268,21 +268,21 @@ def _multiline_to_list(s):
         "KEY_PREFIX": "ietf:dt",
     },
     "htmlized": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "BACKEND": "ietf.utils.cache.TieredFileCache",
         "LOCATION": "/a/cache/datatracker/htmlized",
         "OPTIONS": {
             "MAX_ENTRIES": 100000,  # 100,000
         },
     },
     "pdfized": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "BACKEND": "ietf.utils.cache.TieredFileCache",
         "LOCATION": "/a/cache/datatracker/pdfized",
         "OPTIONS": {
             "MAX_ENTRIES": 100000,  # 100,000
         },
     },
     "slowpages": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "BACKEND": "ietf.utils.cache.TieredFileCache",
         "LOCATION": "/a/cache/datatracker/slowpages",
         "OPTIONS": {
             "MAX_ENTRIES": 5000,